@@ -0,0 +1,61 @@
+"""Benchmark of the json decoders of jsummary
+
+Decodes the benchmark documents with every installed backend and checks that the
+summaries match the one of the json module.
+Run from the repository root:
+    python -m BENCH.bench_decode [--nodes 1000000] [--repeat 3]
+"""
+import argparse
+import json
+import sys
+import time
+from decoders import PARSERS, get_decoder
+from options import Options
+from walker import get_json_tree
+from BENCH.corpus import make_arrays, make_deep, make_records, make_rows
+
+
+def decode(loads, text: bytes):
+    """Time a single decoding of text"""
+    start = time.perf_counter()
+    data = loads(text)
+    return time.perf_counter() - start, data
+
+
+def summary(data):
+    """Summary of data to compare the backends"""
+    Options.reset()
+    get_json_tree(data)
+    return Options.TREE.as_dict(), Options.ITEMS_COUNT
+
+
+def main():
+    """Prints the best decoding time of every backend for every document"""
+    parser = argparse.ArgumentParser(description="Benchmark the json decoders")
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    decoders = []
+    for name in PARSERS[1:]:
+        try:
+            decoders.append(get_decoder(name))
+        except ImportError:
+            print(f"{name:8} not installed")
+    corpus = (("records", make_records(args.nodes)), ("rows", make_rows(args.nodes)),
+              ("arrays", make_arrays(args.nodes)), ("deep", make_deep(500)))
+    for name, data in corpus:
+        text = json.dumps(data).encode()
+        expected = summary(data)
+        print(f"{name:8} {len(text) / 1024**2:8.1f} MB")
+        baseline = None
+        for decoder in reversed(decoders):
+            results = [decode(decoder.loads, text) for _ in range(args.repeat)]
+            best = min(seconds for seconds, _ in results)
+            baseline = baseline or best
+            same = "same" if summary(results[0][1]) == expected else "DIFFERENT"
+            print(f"  {decoder.name:8} {best:8.3f} s  {baseline / best:5.2f}x  {same}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""Throughput benchmark for the string type detection of jsummary
+
+Run from the repository root:
+    python -m BENCH.bench_detect [--strings 1000000]
+"""
+import argparse
+import random
+import re
+import sys
+import time
+import uuid
+from detectors import EXTRA_TYPES, StringTypes
+
+
+def legacy_check_date_time(s: str):
+    """check_date_time() before the detector engine, as reference"""
+    pattern_date = r"^\d{1,4}[-\/\.]{1}\d{1,2}[-\/\.]\d{1,4}$"
+    pattern_date_time = r"^\d{1,4}[-\/]{1}\d{1,2}[-\/]\d{1,4}[ T]\d{1,2}:\d{1,2}"
+    pattern_time = r"^\d{1,2}:\d{1,2}"
+    if re.search(pattern_date, s):
+        return "date"
+    if re.search(pattern_date_time, s):
+        return "date-time"
+    if re.search(pattern_time, s):
+        return "time"
+    return "string"
+
+
+def make_strings(count: int, seed: int = 42):
+    """String values like in api payloads. Many of them repeat."""
+    rnd = random.Random(seed)
+    words = ["active", "pending", "closed", "Springfield", "foo doe", "very low"]
+    makers = (
+        lambda: rnd.choice(words),
+        lambda: f"user {rnd.randint(0, 10**6)}",
+        lambda: f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+        lambda: f"2025-07-06T{rnd.randint(0, 23):02d}:{rnd.choice(['00', '30'])}Z",
+        lambda: f"{rnd.randint(0, 23):02d}:45",
+        lambda: str(uuid.UUID(int=rnd.getrandbits(128))),
+        lambda: f"https://example.com/items/{rnd.randint(0, 1000)}",
+        )
+    return [rnd.choice(makers)() for _ in range(count)]
+
+
+def throughput(detect, strings):
+    """Strings per second for a single pass"""
+    start = time.perf_counter()
+    for s in strings:
+        detect(s)
+    return len(strings) / (time.perf_counter() - start)
+
+
+def main():
+    """Prints strings per second for the legacy function and the engine"""
+    parser = argparse.ArgumentParser(description="Benchmark string type detection")
+    parser.add_argument("--strings", type=int, default=1_000_000)
+    args = parser.parse_args()
+    strings = make_strings(args.strings)
+
+    legacy = throughput(legacy_check_date_time, strings)
+    print(f"{'legacy check_date_time':28} {legacy:>12,.0f} strings/s")
+    for name, engine in (("engine", StringTypes()),
+                         ("engine, no cache", StringTypes(cache_size=0)),
+                         ("engine, all extra types", StringTypes(EXTRA_TYPES))):
+        speed = throughput(engine, strings)
+        print(f"{name:28} {speed:>12,.0f} strings/s  {speed / legacy:5.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
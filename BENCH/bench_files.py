@@ -0,0 +1,94 @@
+"""Benchmark of plain, memory-mapped and compressed file input of jsummary
+
+Every run happens in its own process, so the peak RSS belongs to that run only.
+Run from the repository root:
+    python -m BENCH.bench_files [--nodes 2000000] [--formats json gz bz2 xz zst]
+"""
+import argparse
+import bz2
+import gzip
+import json
+import lzma
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import files
+from summarizer import load_from_file, stream_from_file
+from options import Options
+from walker import get_json_tree
+from BENCH.corpus import make_records
+
+# Modes of a run: load with mmap, load with a plain read() and --stream
+MODES = ("mmap", "read", "stream")
+
+
+def compress(data: bytes, suffix: str):
+    """data compressed in the format of suffix"""
+    if suffix == "zst":
+        try:
+            import zstandard # pylint: disable=import-outside-toplevel
+        except ImportError:
+            return None
+        return zstandard.ZstdCompressor().compress(data)
+    compressions = {"json": bytes, "gz": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress}
+    return compressions[suffix](data)
+
+
+def run(file: str, mode: str):
+    """Summarizes file in this process and prints seconds and peak RSS in MB"""
+    Options.reset()
+    if mode == "read":
+        files.MMAP_MIN = float("inf")
+    start = time.perf_counter()
+    if mode == "stream":
+        stream_from_file(file)
+    else:
+        get_json_tree(load_from_file(file))
+    seconds = time.perf_counter() - start
+    print(seconds, peak_rss())
+
+
+def peak_rss():
+    """Peak RSS of this process in MB. ru_maxrss survives exec() on Linux and
+    would report the parent, so VmHWM is preferred."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    """Prints wall time and peak RSS of every format and mode"""
+    parser = argparse.ArgumentParser(description="Benchmark file input")
+    parser.add_argument("--nodes", type=int, default=2_000_000)
+    parser.add_argument("--formats", nargs="*", default=["json", "gz", "bz2", "xz", "zst"])
+    parser.add_argument("--run", nargs=2, metavar=("FILE", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run(*args.run)
+        return
+
+    data = json.dumps(make_records(args.nodes)).encode()
+    with tempfile.TemporaryDirectory() as folder:
+        for suffix in args.formats:
+            file = os.path.join(folder, "records.json" + ("" if suffix == "json" else "." + suffix))
+            if (content := compress(data, suffix)) is None:
+                print(f"{suffix:5} Requires zstandard")
+                continue
+            with open(file, "wb") as f:
+                f.write(content)
+            size = os.path.getsize(file) / 1024**2
+            for mode in MODES if suffix == "json" else MODES[::2]:
+                cmd = [sys.executable, "-m", "BENCH.bench_files", "--run", file, mode]
+                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+                seconds, rss = map(float, result.stdout.split()[-2:])
+                print(f"{suffix:5} {size:8.1f} MB  {mode:7} {seconds:8.3f} s  " +
+                      f"{rss:8.1f} MB peak RSS")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Benchmark of writing the summary table
+
+Times writing the table of a document with many paths in every output format,
+from the walked tree to the file. The rows are made from generators while they
+are written, like on the commandline. 'tabulate' is the text table of tabulate2
+written a character at a time, the way the text output used to be written.
+Peak memory comes from an extra run with tracemalloc. Keys aren't collapsed, so
+every key of the document is a row.
+Run from the repository root:
+    python -m BENCH.bench_output [--nodes 400000] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from formats import TBLFMT_MD, TBLFMT_TXT, tabulate_table, write_csv, write_json, write_text
+from summarizer import Summarizer
+from BENCH.corpus import make_wide
+
+
+def write_tabulate(table, file):
+    """Text table of tabulate2 for the whole table, a character per write"""
+    for char in tabulate_table(list(table), TBLFMT_TXT):
+        file.write(char)
+
+WRITERS = {
+    "csv": write_csv,
+    "json": write_json,
+    "text": lambda table, file: write_text(table, file, TBLFMT_TXT),
+    "markdown": lambda table, file: write_text(table, file, TBLFMT_MD),
+    "tabulate": write_tabulate,
+}
+
+
+def run(summarizer, data, writer, file: str):
+    """Seconds to write the table of data with writer to file"""
+    summary = summarizer.summarize(data, lazy=True)
+    start = time.perf_counter()
+    with open(file, "w", encoding="utf-8") as f:
+        writer(summary.table, f)
+    return time.perf_counter() - start
+
+def main():
+    """Prints time, throughput and peak memory of every writer"""
+    parser = argparse.ArgumentParser(description="Benchmark the table writers")
+    parser.add_argument("--nodes", type=int, default=400_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--writers", nargs="*", default=list(WRITERS), choices=list(WRITERS))
+    args = parser.parse_args()
+
+    data = make_wide(args.nodes)
+    summarizer = Summarizer(collapse_ids=0, collapse_keys=0)
+    rows = len(summarizer.summarize(data).table)
+    print(f"{rows:,d} rows")
+    with tempfile.TemporaryDirectory() as folder:
+        file = os.path.join(folder, "summary")
+        for name in args.writers:
+            seconds = min(run(summarizer, data, WRITERS[name], file) for _ in range(args.repeat))
+            size = os.path.getsize(file)
+            tracemalloc.start()
+            try:
+                run(summarizer, data, WRITERS[name], file)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            print(f"{name:9} {seconds:7.3f} s {rows / seconds:>12,.0f} rows/s "
+                  f"{size / 1024**2 / seconds:7.1f} MB/s  peak {peak / 1024**2:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
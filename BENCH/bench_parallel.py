@@ -0,0 +1,41 @@
+"""Scaling benchmark for the parallel summary of jsummary
+
+Run from the repository root:
+    python -m BENCH.bench_parallel [--nodes 4000000] [--jobs 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import time
+from options import Options
+from parallel import get_json_tree_parallel
+from BENCH.corpus import make_records
+
+
+def walk(data, jobs):
+    """Time a single run of get_json_tree_parallel()"""
+    Options.reset()
+    start = time.perf_counter()
+    get_json_tree_parallel(data, jobs)
+    return time.perf_counter() - start
+
+
+def main():
+    """Prints time and speedup of the records document for several numbers of processes"""
+    parser = argparse.ArgumentParser(description="Benchmark get_json_tree_parallel()")
+    parser.add_argument("--nodes", type=int, default=4_000_000)
+    parser.add_argument("--jobs", type=int, nargs="*", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_records(args.nodes)
+    print(f"{os.cpu_count()} cores, {len(data['results']):,d} records")
+    serial = None
+    for jobs in args.jobs:
+        best = min(walk(data, jobs) for _ in range(args.repeat))
+        serial = serial or best
+        print(f"{jobs:>3} jobs  {best:8.3f} s  speedup {serial / best:5.2f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Benchmark of the cold start of jsummary
+
+Short runs on small files are dominated by starting the interpreter and
+importing modules. This times fresh processes for a bare interpreter, the import
+of jsummary and complete runs with csv and text output. It lists the slowest
+imports from '-X importtime' and the heavy modules every run loaded. The
+overhead of the csv run over the bare interpreter must stay within the budget,
+else the exit status is 1.
+Run from the repository root:
+    python -m BENCH.bench_startup [--repeat 10] [--budget-ms 100]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modules that runs on local files shouldn't need, except for text output
+HEAVY = ("requests", "tabulate2", "multiprocessing", "ijson")
+# Prints the heavy modules a run loaded, after the run itself
+PROBE = ("import runpy, sys\nsys.argv = {argv!r}\ntry:\n    runpy.run_path('jsummary.py', " +
+         "run_name='__main__')\nfinally:\n    print(' '.join(m for m in {heavy!r} " +
+         "if m in sys.modules), file=sys.stderr)")
+
+
+def best_of(cmd, repeat: int):
+    """Best wall time of cmd in a fresh process in ms"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, capture_output=True, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def import_times(top: int):
+    """The top slowest modules of 'import jsummary' by cumulative time in ms"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import jsummary"],
+                            capture_output=True, text=True, check=True)
+    times = []
+    for line in result.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  ") and name.strip() != "jsummary":
+            # Modules of the interpreter start like site, jsummary comes last
+            times = []
+            continue
+        times.append((int(cumulative) / 1000, name.rstrip()))
+    return sorted(times, reverse=True)[:top]
+
+def loaded_modules(argv):
+    """Heavy modules a run with argv loaded"""
+    code = PROBE.format(argv=["jsummary.py", *argv], heavy=HEAVY)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            check=True)
+    return result.stderr.split()
+
+def main():
+    """Prints the start times and checks the budget"""
+    parser = argparse.ArgumentParser(description="Benchmark the cold start")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=100,
+                        help="Allowed overhead of a csv run over the bare interpreter")
+    parser.add_argument("--top", type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        file = os.path.join(folder, "small.json")
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump({"results": [{"id": i, "name": f"user {i}"} for i in range(100)]}, f)
+        runs = {
+            "python": [sys.executable, "-c", "pass"],
+            "import": [sys.executable, "-c", "import jsummary"],
+            "csv": [sys.executable, "jsummary.py", "-f", file, "-o",
+                    os.path.join(folder, "out.csv")],
+            "text": [sys.executable, "jsummary.py", "-f", file, "-o",
+                     os.path.join(folder, "out.txt")],
+        }
+        times = {name: best_of(cmd, args.repeat) for name, cmd in runs.items()}
+        for name, cmd in runs.items():
+            extra = f"  +{times[name] - times['python']:7.1f} ms" if name != "python" else ""
+            modules = loaded_modules(cmd[2:]) if cmd[1] == "jsummary.py" else []
+            print(f"{name:7} {times[name]:8.1f} ms{extra}  {' '.join(modules)}")
+
+    print("\nSlowest imports of jsummary (cumulative):")
+    for seconds, name in import_times(args.top):
+        print(f"  {seconds:8.1f} ms  {name}")
+
+    overhead = times["csv"] - times["python"]
+    print(f"\ncsv run overhead {overhead:.1f} ms, budget {args.budget_ms:.0f} ms")
+    return 0 if overhead <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Benchmark suite of the jsummary pipeline
+
+Runs every stage from decoding to writing the table on the documents of
+BENCH.corpus. Times are the best of several runs, the peak memory of each stage
+comes from an extra run with tracemalloc, which would distort the times. The
+results are written as json and compared with a stored baseline. Regressions
+above the threshold make the exit status 1.
+
+Run from the repository root:
+    python -m BENCH.bench_suite [--sizes small medium large] [--corpus records deep ...]
+                                [--output results.json] [--save-baseline]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from decoders import get_decoder
+from formats import TBLFMT_TXT
+from jsummary import output_csv, output_text
+from options import Options
+from summarizer import get_summary_table, list_json
+from walker import get_json_tree
+from BENCH.corpus import CORPUS, SIZES
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+STAGES = ("decode", "walk", "list", "table", "csv", "text")
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS = 0.005
+MIN_MB = 0.5
+
+
+def run_stages(text: bytes, folder: str, measure):
+    """Runs the pipeline on text. measure(stage, func, *args) runs a stage and
+    returns its result."""
+    Options.reset()
+    data = measure("decode", get_decoder(Options.PARSER).loads, text)
+    measure("walk", get_json_tree, data)
+    summary = measure("list", list_json, Options.TREE)
+    table = measure("table", get_summary_table, summary)
+    with contextlib.redirect_stdout(io.StringIO()):
+        measure("csv", output_csv, table, os.path.join(folder, "summary.csv"))
+        measure("text", output_text, table, TBLFMT_TXT, os.path.join(folder, "summary.txt"))
+
+
+def bench(text: bytes, folder: str, repeat: int):
+    """Best seconds and peak MB of every stage for text"""
+    stats = {stage: {"seconds": float("inf"), "peak_mb": 0.0} for stage in STAGES}
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        stats[stage]["seconds"] = min(stats[stage]["seconds"], time.perf_counter() - start)
+        return result
+
+    def traced(stage, func, *args):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = func(*args)
+        stats[stage]["peak_mb"] = (tracemalloc.get_traced_memory()[1] - before) / 1024**2
+        return result
+
+    for _ in range(repeat):
+        run_stages(text, folder, timed)
+    tracemalloc.start()
+    try:
+        run_stages(text, folder, traced)
+    finally:
+        tracemalloc.stop()
+    return stats
+
+
+def compare(results, baseline, threshold: float):
+    """Prints results next to baseline. Returns the regressions as
+    (document, stage, measure) tuples."""
+    regressions = []
+    for doc, result in results["documents"].items():
+        base = baseline["documents"].get(doc)
+        if not base:
+            continue
+        print(f"\n{doc} (baseline {baseline['meta']['created']})")
+        for stage, stats in result["stages"].items():
+            old = base["stages"].get(stage)
+            if not old:
+                continue
+            marks = []
+            for measure, noise in (("seconds", MIN_SECONDS), ("peak_mb", MIN_MB)):
+                if stats[measure] > old[measure] * (1 + threshold) and \
+                        stats[measure] - old[measure] > noise:
+                    regressions.append((doc, stage, measure))
+                    marks.append(f"REGRESSION {measure}")
+            print(f"  {stage:7} {stats['seconds']:8.3f} s {change(stats, old, 'seconds')}"
+                  f"  {stats['peak_mb']:8.1f} MB {change(stats, old, 'peak_mb')}  "
+                  + ", ".join(marks))
+    return regressions
+
+
+def change(stats, old, measure):
+    """Relative change of measure against old as text"""
+    if not old[measure]:
+        return "      "
+    return f"{(stats[measure] / old[measure] - 1) * 100:+5.0f}%"
+
+
+def main():
+    """Runs the suite, writes the results and compares them with the baseline"""
+    parser = argparse.ArgumentParser(description="Benchmark suite of jsummary")
+    parser.add_argument("--corpus", nargs="*", default=list(CORPUS), choices=list(CORPUS))
+    parser.add_argument("--sizes", nargs="*", default=["small"], choices=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results to this json file")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store the results as new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown or memory growth as fraction. Default: 0.25")
+    args = parser.parse_args()
+
+    results = {"meta": {"created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                        "python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count(), "parser": get_decoder(Options.PARSER).name,
+                        "repeat": args.repeat, "seed": args.seed},
+               "documents": {}}
+    with tempfile.TemporaryDirectory() as folder:
+        for size in args.sizes:
+            for name in args.corpus:
+                text = json.dumps(CORPUS[name](SIZES[size], args.seed)).encode()
+                stages = bench(text, folder, args.repeat)
+                results["documents"][f"{name}/{size}"] = {
+                    "bytes": len(text), "nodes": Options.CNT, "paths": len(Options.TREE.records),
+                    "stages": stages}
+                times = [f"{stage} {stats['seconds']:.3f}" for stage, stats in stages.items()]
+                total = sum(stats["seconds"] for stats in stages.values())
+                print(f"{name + '/' + size:16} {len(text) / 1024**2:8.1f} MB "
+                      f"{Options.CNT:>10,d} nodes {total:8.3f} s  " + "  ".join(times))
+
+    for file in filter(None, (args.output, args.baseline if args.save_baseline else None)):
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {file}")
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.threshold)
+    print(f"\n{len(regressions)} regressions above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
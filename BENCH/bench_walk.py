@@ -0,0 +1,43 @@
+"""Benchmark for the tree walker of jsummary
+
+Run from the repository root:
+    python -m BENCH.bench_walk [--nodes 1000000] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from options import Options
+from walker import get_json_tree
+from BENCH.corpus import make_arrays, make_deep, make_records, make_rows
+
+
+def walk(data):
+    """Time a single run of get_json_tree()"""
+    Options.reset()
+    start = time.perf_counter()
+    get_json_tree(data)
+    return time.perf_counter() - start
+
+
+def main():
+    """Prints the best time of several walks for wide, array-heavy and deep documents"""
+    parser = argparse.ArgumentParser(description="Benchmark get_json_tree()")
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--depth", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, data in (("records", make_records(args.nodes)), ("rows", make_rows(args.nodes)),
+                       ("arrays", make_arrays(args.nodes)), ("deep", make_deep(args.depth))):
+        try:
+            best = min(walk(data) for _ in range(args.repeat))
+        except RecursionError:
+            print(f"{name:8} RecursionError")
+            continue
+        values = sum(Options.ITEMS_COUNT.values())
+        print(f"{name:8} {Options.CNT:>10,d} nodes {values:>10,d} values"
+              f"  {best:8.3f} s  {values / best:>12,.0f} values/s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Seeded generators of json documents for the benchmarks of jsummary
+
+Every generator takes a rough number of json nodes and a seed and returns the same
+document for the same arguments.
+"""
+import base64
+import random
+import uuid
+
+# Rough number of json nodes per document size of the benchmark suite
+SIZES = {"small": 20_000, "medium": 200_000, "large": 2_000_000}
+# Levels of a single chain in make_forest()
+FOREST_DEPTH = 100
+
+
+def make_records(nodes: int, seed: int = 42):
+    """Array of api-like records with roughly the given number of json nodes"""
+    rnd = random.Random(seed)
+    records = []
+    for i in range(nodes // 16):
+        records.append({
+            "id": i,
+            "name": f"user {rnd.randint(0, 10**6)}",
+            "active": rnd.random() > 0.5,
+            "score": rnd.random() * 100,
+            "created": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+            "tags": [rnd.choice(["a", "b", "c"]) for _ in range(3)],
+            "address": {"city": "Springfield", "zip": rnd.randint(10000, 99999),
+                        "geo": {"lat": rnd.random(), "lon": None}},
+            })
+    return {"results": records, "next": None}
+
+
+def make_rows(nodes: int, seed: int = 42):
+    """Array of flat records with the same keys and value types"""
+    rnd = random.Random(seed)
+    return [{"id": i, "name": f"user {rnd.randint(0, 10**6)}", "active": rnd.random() > 0.5,
+             "score": rnd.random() * 100, "created": f"2025-{rnd.randint(1, 12):02d}-01",
+             "deleted": None, "rank": rnd.randint(0, 100)}
+            for i in range(nodes // 8)]
+
+
+def make_arrays(values: int, seed: int = 42):
+    """Object with large arrays of plain values"""
+    rnd = random.Random(seed)
+    size = values // 5
+    return {"ints": [rnd.randint(0, 1000) for _ in range(size)],
+            "floats": [rnd.random() for _ in range(size)],
+            "flags": [rnd.random() > 0.5 for _ in range(size)],
+            "words": [rnd.choice(["low", "high", "2025-07-06"]) for _ in range(size)],
+            "sparse": [None if rnd.random() > 0.1 else 1 for _ in range(size)]}
+
+
+def make_deep(depth: int):
+    """Object nested depth times"""
+    data = {"leaf": 1}
+    for _ in range(depth):
+        data = {"child": data, "items": [1, "2"]}
+    return data
+
+
+def make_forest(nodes: int, seed: int = 42):
+    """Array of deeply nested objects, see make_deep()"""
+    rnd = random.Random(seed)
+    return [make_deep(rnd.randint(FOREST_DEPTH // 2, FOREST_DEPTH))
+            for _ in range(max(nodes // (FOREST_DEPTH * 4), 1))]
+
+
+def make_wide(nodes: int, seed: int = 42):
+    """Object with a great many distinct keys of values and small objects"""
+    rnd = random.Random(seed)
+    data = {}
+    for i in range(nodes // 3):
+        if i % 2:
+            data[f"field_{i:07d}"] = rnd.choice([rnd.randint(0, 100), "text", None, True])
+        else:
+            data[f"group_{i:07d}"] = {"value": rnd.random()}
+    return data
+
+
+def make_texts(nodes: int, seed: int = 42):
+    """Array of records with long and typed strings"""
+    rnd = random.Random(seed)
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit"]
+    return [{"id": str(uuid.UUID(int=rnd.getrandbits(128))),
+             "title": " ".join(rnd.choices(words, k=6)),
+             "body": " ".join(rnd.choices(words, k=rnd.randint(5, 40))),
+             "email": f"{rnd.choice(words)}.{i}@example.com",
+             "url": f"https://example.com/posts/{i}",
+             "created": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}T10:00:00Z",
+             "thumbnail": base64.b64encode(rnd.randbytes(48)).decode()}
+            for i in range(nodes // 8)]
+
+
+def make_mixed(nodes: int, seed: int = 42):
+    """Array of records with mostly null and inconsistently typed values"""
+    rnd = random.Random(seed)
+    values = (lambda: None, lambda: rnd.randint(0, 100), rnd.random,
+              lambda: "text", lambda: rnd.random() > 0.5, lambda: [1, "a", None],
+              lambda: {"nested": None})
+    weights = (12, 2, 2, 2, 1, 1, 1)
+    return [{key: rnd.choices(values, weights)[0]() for key in "abcdefgh"}
+            for _ in range(nodes // 10)]
+
+
+def make_dynamic(nodes: int, seed: int = 42):
+    """Objects keyed by dates and user ids instead of fixed names"""
+    rnd = random.Random(seed)
+    days = {}
+    for i in range(max(nodes // 200, 1)):
+        day = f"2025-{i // 28 % 12 + 1:02d}-{i % 28 + 1:02d}T{i // 336:02d}:00:00"
+        days[day] = {"total": rnd.randint(0, 1000),
+                     "users": {f"u{rnd.randrange(10**9)}": {"visits": rnd.randint(1, 9),
+                                                           "last": "12:30"}
+                               for _ in range(40)}}
+    return {"days": days}
+
+
+# Documents of the benchmark suite by name
+CORPUS = {"records": make_records, "rows": make_rows, "arrays": make_arrays,
+          "deep": make_forest, "wide": make_wide, "strings": make_texts,
+          "mixed": make_mixed, "dynamic": make_dynamic}
@@ -1,5 +1,42 @@
 """Some tests"""
-from jsummary import get_input, check_date_time, adjust_json_type, RE_URL, RE_FILE
+# pylint: disable=invalid-name
+import argparse
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import math
+import os
+import pickle
+import pstats
+import socket
+import subprocess
+import sys
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import batch
+import decoders
+import files
+import parallel
+from jsummary import get_input, RE_URL, RE_FILE, summarize_files, summarize_urls
+from summarizer import Summarizer, SummaryError, stream_from_file, list_json, get_example
+from summarizer import load_from_file, lines_from_file, get_summary_table, stream_from_url
+from fetch import Response
+from paginate import get_json_tree_paged, next_url
+from profiler import Profile, phase
+from detectors import StringTypes
+from json_lines import is_json_lines, get_json_lines_tree
+from options import Options
+from sampling import Sample, parse_sample
+from server import make_server
+from stats import Distinct, Moments, PathStats, TopValues
+from formats import TBLFMT_MD, TBLFMT_TXT, tabulate_table, write_csv, write_json, write_text
+from walker import check_date_time, adjust_json_type, get_json_tree
 
 def test_get_url():
     """Testing regex detection."""
@@ -8,6 +45,7 @@ def test_get_url():
     assert get_input(RE_FILE, "test.json") == "test.json"
     assert get_input(RE_FILE, "./myfolder/my.json") == "./myfolder/my.json"
     assert get_input(RE_FILE, "..\\my.json") == "..\\my.json"
+    assert get_input(RE_FILE, "dump.json.gz") == "dump.json.gz"
     assert get_input(RE_FILE, "test.txt") is None
 
 def test_check_date_time():
@@ -26,3 +64,764 @@ def test_adjust_json_type():
     assert adjust_json_type("float") == "number"
     assert adjust_json_type("bool") == "boolean"
     assert adjust_json_type("NoneType") == "null"
+
+
+SAMPLE = {
+    "results": [
+        {"id": 1, "name": "foo doe", "age": 20, "registered": None, "friends": ["bar", "baz"]},
+        {"id": 2, "name": "bar doe", "age": 25.5, "registered": True,
+         "profile": {"username": "bar99-ftw", "last_login": "2025-07-06 10:45"},
+         "friends": ["foo", "baz"]},
+        {"id": "3", "name": "baz doe", "age": 19, "registered": True,
+         "profile": {"username": "foo01", "2fa_enabled": True, "last_login": "10:45"}}
+    ],
+    "tags": [1, None, "a", [1, 2], {"q": 1}],
+    "empty": [],
+    "nested": [[{"a": [[None, "1.1.26"]]}]],
+    "text": "multi\nline"
+}
+
+
+def summarize(data):
+    """Runs the recursive walker on a fresh tree and returns its results"""
+    Options.reset()
+    get_json_tree(data)
+    return Options.TREE.as_dict(), Options.ITEMS_COUNT, Options.CNT
+
+
+def test_stream_json_tree(tmp_path):
+    """Streaming parser builds the same tree as the in-memory walker"""
+    expected = summarize(SAMPLE)
+    file = tmp_path / "sample.json"
+    file.write_text(json.dumps(SAMPLE), encoding="utf-8")
+    Options.reset()
+    assert stream_from_file(str(file)) is True
+    assert (Options.TREE.as_dict(), Options.ITEMS_COUNT, Options.CNT) == expected
+    assert list(Options.TREE.as_dict()) == list(expected[0])
+    file.write_text("[]", encoding="utf-8")
+    assert stream_from_file(str(file)) is False
+    # Integers wider than 64 bits and fractions, which ijson returns as Decimal
+    big = {"big": 10 ** 30, "fraction": 0.5}
+    expected = summarize(big)
+    file.write_text(json.dumps(big), encoding="utf-8")
+    Options.reset()
+    assert stream_from_file(str(file)) is True
+    assert (Options.TREE.as_dict(), Options.ITEMS_COUNT, Options.CNT) == expected
+    assert Options.TREE.as_dict()["big"]["example"] == 10 ** 30
+    # The table is the same as the one of the in-memory walk
+    file.write_text('{"f": [1E+5, 2.5e-3, 0.1, 1e400], "big": 100000000000000000000000000000}',
+                    encoding="utf-8")
+    for settings in ({}, {"stats": True}):
+        assert Summarizer(stream=True, **settings).summarize_file(str(file)).table == \
+            Summarizer(**settings).summarize_file(str(file)).table
+
+
+def test_get_json_tree_deep():
+    """Walker handles nesting deeper than the recursion limit"""
+    data = {"leaf": "x"}
+    for _ in range(2000):
+        data = {"c": data, "l": [1]}
+    tree = summarize(data)[0]
+    assert len(tree) == 2000 * 3 + 2
+    assert tree["c." * 2000 + "leaf"]["parent"] == "c"
+    assert tree["c." * 1999 + "l.[][*]"]["parent"] == "l"
+
+
+def test_path_trie():
+    """Trie keeps trimmed examples, depth and parent per distinct path"""
+    Options.reset()
+    get_json_tree({"a": [{"text": "x" * 1000}, {"text": "y"}]})
+    node = Options.TREE.records[-1]
+    assert Options.TREE.name(node) == "a.[].text"
+    assert (node.dots, node.parent, node.count) == (2, "a", 2)
+    assert node.example == "x" * Options.TRIM and node.length == 1000
+    entry = list_json(Options.TREE)[-1]
+    assert get_example(entry, entry["name"]) == "x" * Options.TRIM + "..."
+
+
+def test_string_types():
+    """Extra string types are only detected when enabled"""
+    detect = StringTypes(["uuid", "email", "url", "iso-8601", "base64"])
+    assert detect("123e4567-e89b-12d3-a456-426614174000") == "uuid"
+    assert detect("foo@example.com") == "email"
+    assert detect("https://example.com/a?b=1") == "url"
+    assert detect("2025-07-06T10:45:00+02:00") == "iso-8601"
+    assert detect("2025-07-06 10:45") == "date-time"
+    assert detect("SGVsbG8gV29ybGQhISEh") == "base64"
+    assert detect("hello") == "string"
+    assert check_date_time("foo@example.com") == "string"
+
+
+def test_count_array():
+    """Bulk counted arrays keep the rules of count_items()"""
+    data = {"a": [None] * 10 + [1.5, "x"] + [2] * 10, "b": ["2025-01-01"] * 10,
+            "c": [[None, 1] * 5, [True] * 10]}
+    tree, items, _ = summarize(data)
+    assert tree["a.[][*]"] == {"type": "number", "count": 22, "example": 1.5,
+                               "parent": "", "consistent": False}
+    assert tree["b.[][*]"]["type"] == "date" and tree["b.[][*]"]["consistent"]
+    assert tree["c.[].[][*]"]["count"] == 20
+    assert list(items.items()) == [("null", 15), ("number", 16), ("string", 1),
+                                   ("date", 10), ("boolean", 10)]
+
+
+def test_count_object():
+    """Cached shapes give the same summary as the full walk"""
+    data = {"rows": [{"a": None, "b": "x", "c": 1}, {"a": 2, "b": "2025-01-01", "c": 2},
+                     {"a": 3, "b": "y", "c": 3}, {"a": None, "b": "z", "c": {"d": 1}}]}
+    expected = []
+    for size in (0, 1, 1024):
+        Options.SHAPE_CACHE = size
+        expected.append(summarize(data))
+    Options.SHAPE_CACHE = 1024
+    assert expected[0] == expected[1] == expected[2]
+    tree = expected[0][0]
+    assert tree["rows.[].a"] == {"type": "number", "count": 4, "example": 2,
+                                 "parent": "rows", "consistent": False}
+    assert len(Options.SHAPES) == 3
+
+
+def test_sampling(tmp_path):
+    """Sampled arrays give estimated counts and exact types"""
+    assert parse_sample("10%") == parse_sample("0.1") == Sample(fraction=0.1)
+    assert parse_sample("500") == Sample(size=500)
+    assert parse_sample("2.5s") == Sample(seconds=2.5)
+    for text in ("0", "1.5", "x", "-3s"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_sample(text)
+
+    data = {"rows": [{"id": i, "tags": ["a"] * 3} for i in range(10_000)]}
+    file = tmp_path / "rows.json"
+    file.write_text(json.dumps(data), encoding="utf-8")
+    Options.SAMPLE = Sample(fraction=0.1)
+    try:
+        for streamed in (False, True):
+            Options.reset()
+            if streamed:
+                stream_from_file(str(file))
+            else:
+                get_json_tree(data)
+            tree = Options.TREE.as_dict()
+            assert tree["rows.[].id"]["type"] == "number"
+            assert 9_000 < tree["rows.[].id"]["count"] < 11_000
+            assert isinstance(tree["rows.[].tags.[][*]"]["count"], float)
+            assert sum(Options.ITEMS_COUNT.values()) == pytest.approx(
+                tree["rows.[].id"]["count"] + tree["rows.[].tags.[][*]"]["count"])
+            [(_, items, sampled)] = Options.SAMPLER.blind_spots()
+            assert items == 10_000 and sampled < 1_500
+    finally:
+        Options.SAMPLE = None
+        Options.reset()
+
+
+def test_parallel(monkeypatch):
+    """Merged partial trees give the same summary as the serial walk"""
+    monkeypatch.setattr(parallel, "PARALLEL_MIN", 2)
+    data = dict(SAMPLE, results=SAMPLE["results"] * 3 + [{"id": None, "age": "old"}])
+    expected = summarize(data)
+    Options.reset()
+    parallel.get_json_tree_parallel(data, 2)
+    assert (Options.TREE.as_dict(), Options.ITEMS_COUNT, Options.CNT) == expected
+    assert list(Options.TREE.as_dict()) == list(expected[0])
+    assert list(Options.ITEMS_COUNT) == list(expected[1])
+
+    data = {"leaf": None}
+    for _ in range(2000):
+        data = {"c": data}
+    tree = summarize(data)[0]
+    assert pickle.loads(pickle.dumps(Options.TREE)).as_dict() == tree
+
+
+def test_json_lines(tmp_path, monkeypatch):
+    """JSON Lines are summarized like a top-level array, malformed lines get skipped"""
+    records = SAMPLE["results"] + [[1, None], "x", {"id": 4}]
+    expected = summarize(records)
+    file = tmp_path / "sample.json"
+    lines = [json.dumps(r) for r in records]
+    file.write_text("\n".join(lines[:2] + ['{"id": ', ""] + lines[2:]), encoding="utf-8")
+    assert is_json_lines(str(file))
+    assert not is_json_lines("TEST/test_jsummary.py")
+
+    Options.reset()
+    Options.CNT += 1
+    with open(file, "rb") as f:
+        assert get_json_lines_tree(f).items == len(records)
+    assert (Options.TREE.as_dict(), Options.ITEMS_COUNT, Options.CNT) == expected
+    assert Options.MALFORMED == 1
+
+    monkeypatch.setattr(parallel, "PARALLEL_BYTES", 0)
+    Options.reset()
+    assert parallel.get_json_lines_parallel(str(file), 3) == len(records)
+    assert (Options.TREE.as_dict(), Options.ITEMS_COUNT, Options.CNT) == expected
+    assert list(Options.TREE.as_dict()) == list(expected[0])
+    assert Options.MALFORMED == 1
+
+
+def compress_zstd(data):
+    """zstandard counterpart of gzip.compress()"""
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+@pytest.mark.parametrize("suffix, compress", [("", bytes), (".gz", gzip.compress),
+                                              (".bz2", bz2.compress), (".xz", lzma.compress),
+                                              (".zst", compress_zstd)])
+def test_file_input(tmp_path, monkeypatch, suffix, compress):
+    """Compressed and memory-mapped files are read like plain json files"""
+    monkeypatch.setattr(files, "MMAP_MIN", 0)
+    expected = summarize(SAMPLE)
+    file = str(tmp_path / f"sample.json{suffix}")
+    with open(file, "wb") as f:
+        f.write(compress(json.dumps(SAMPLE).encode()))
+    assert load_from_file(file) == SAMPLE
+    Options.reset()
+    assert stream_from_file(file) is True
+    assert (Options.TREE.as_dict(), Options.ITEMS_COUNT, Options.CNT) == expected
+
+    file = str(tmp_path / f"sample.ndjson{suffix}")
+    with open(file, "wb") as f:
+        f.write(compress("\n".join(json.dumps(r) for r in SAMPLE["results"]).encode()))
+    assert is_json_lines(file)
+    Options.reset()
+    assert lines_from_file(file) == len(SAMPLE["results"])
+    assert Options.TREE.as_dict() == summarize(SAMPLE["results"])[0]
+
+
+@pytest.mark.parametrize("parser", decoders.PARSERS)
+def test_decoders(parser):
+    """Every backend gives the summary of the json module, also for values it
+    can't decode itself"""
+    if parser in decoders.BACKENDS:
+        pytest.importorskip(parser)
+    loads = decoders.get_decoder(parser).loads
+    text = json.dumps(dict(SAMPLE, big=[2**64, -2**63 - 1, 10**30, 1.5, 1e300, True],
+                           odd=["\ud800"])).replace("1.5", "NaN")
+    data = json.loads(text)
+    for value in (text, text.encode(), bytearray(text.encode())):
+        decoded = loads(value)
+        assert repr(decoded) == repr(data)
+        assert summarize(decoded) == summarize(data)
+    with pytest.raises(ValueError):
+        loads(b'{"a": ')
+    assert decoders.has_long_int(b"12345678901234567890")
+    assert not decoders.has_long_int(b"[0.12345678901234567890, 1e12345678901234567890]")
+
+
+class StandIn(BaseHTTPRequestHandler):
+    """Local stand-in for an API with json, paged, error and non-json endpoints"""
+    # Number of '304 Not Modified' answers
+    not_modified = 0
+
+    def do_GET(self): # pylint: disable=invalid-name
+        """Answers /json/<n> with n records, /gzip with compressed SAMPLE, /pages
+        with pages of records, /etag with SAMPLE or 304 for its ETag and
+        anything else with status 500 or text"""
+        headers = {}
+        if self.path.startswith("/etag"):
+            body, status = self.tagged(headers)
+        elif self.path.startswith("/json/"):
+            body, status = json.dumps(SAMPLE["results"] * int(self.path[6:])).encode(), 200
+        elif self.path == "/gzip":
+            body, status = gzip.compress(json.dumps(SAMPLE).encode()), 200
+            headers["Content-Encoding"] = "gzip"
+        elif self.path.startswith("/pages"):
+            body, status = self.page(headers), 200
+        elif self.path == "/text":
+            body, status = b"no json", 200
+        else:
+            body, status = b"", 500
+        self.send_response(status)
+        headers["Content-Length"] = str(len(body))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def tagged(self, headers):
+        """SAMPLE with an ETag. /etag answers 304 to its ETag, /etag/lost never does."""
+        headers["ETag"] = '"v1"'
+        if self.path == "/etag" and self.headers.get("If-None-Match") == '"v1"':
+            StandIn.not_modified += 1
+            return b"", 304
+        return json.dumps(SAMPLE).encode(), 200
+
+    def page(self, headers):
+        """Three pages of SAMPLE records. /pages?cursor=<n> is an array with a
+        Link header, /pages/<n> has a next link in the page."""
+        if "cursor" in self.path:
+            number = int(self.path.split("=")[-1])
+            if number < 2:
+                headers["Link"] = f'</pages?cursor={number + 1}>; rel="next"'
+            return json.dumps(SAMPLE["results"][number:number + 1]).encode()
+        number = int(self.path.split("/")[-1])
+        link = f"/pages/{number + 1}" if number < 2 else None
+        return json.dumps({"page": number, "results": [SAMPLE["results"][number]],
+                           "next": link}).encode()
+
+    def log_message(self, format, *args): # pylint: disable=redefined-builtin
+        pass
+
+
+@pytest.fixture(name="server")
+def fixture_server():
+    """Runs StandIn on a free local port"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_summarize_urls(server, tmp_path):
+    """Every url gets a table and a row in the report"""
+    Options.URLS = [(f"{server}/json/{n}", None) for n in (1, 5, 2)]
+    Options.URLS += [(f"{server}/text", None), (f"{server}/fail", {"X-Test": "1"})]
+    Options.OUTPUT = str(tmp_path / "report.csv")
+    try:
+        summarize_urls()
+    finally:
+        Options.URLS, Options.OUTPUT = None, "screen"
+    with open(tmp_path / "report.csv", encoding="utf-8") as f:
+        report = list(csv.reader(f))
+    assert [row[2] for row in report[1:6]] == ["200", "200", "200", "200", "500"]
+    assert report[4][8] == "Couldn't parse json" and report[5][8] == "Status 500"
+    assert report[2][7] == str(5 * 21)
+    with open(tmp_path / "report_002.csv", encoding="utf-8") as f:
+        assert "results" not in f.read()
+    assert not (tmp_path / "report_004.csv").exists()
+
+
+def test_paginate(server):
+    """Records of all pages are summarized as one array"""
+    Options.reset()
+    pager = get_json_tree_paged(f"{server}/pages/0")
+    assert (pager.pages, pager.records, pager.stopped) == (3, 3, None)
+    paged = (Options.TREE.as_dict(), Options.ITEMS_COUNT, Options.CNT)
+    assert paged == summarize({"page": 0, "results": SAMPLE["results"], "next": "/pages/1"})
+
+    Options.reset()
+    pager = get_json_tree_paged(f"{server}/pages?cursor=0")
+    assert (pager.pages, pager.records) == (3, 3)
+    assert Options.TREE.as_dict() == summarize(SAMPLE["results"])[0]
+
+    Options.MAX_RECORDS = 2
+    try:
+        Options.reset()
+        pager = get_json_tree_paged(f"{server}/pages/0")
+    finally:
+        Options.MAX_RECORDS = 0
+    assert (pager.pages, pager.records) == (2, 2)
+    assert "max-records" in pager.stopped
+    with pytest.raises(SummaryError, match="Status 500"):
+        get_json_tree_paged(f"{server}/missing")
+
+    resp = Response(0, "http://x/api?page=1&cursor=a", 200, 0, 0,
+                    {"meta": {"next_cursor": "b c"}}, None)
+    assert next_url(resp) == "http://x/api?page=1&cursor=b+c"
+    assert next_url(resp._replace(data={"_links": {"next": {"href": "/api?page=2"}}})) == \
+        "http://x/api?page=2"
+
+
+def test_stream_from_url(server):
+    """Compressed response bodies are streamed into the same tree"""
+    expected = summarize(SAMPLE)
+    Options.reset()
+    assert stream_from_url(f"{server}/gzip") is True
+    assert (Options.TREE.as_dict(), Options.ITEMS_COUNT, Options.CNT) == expected
+    assert stream_from_url(f"{server}/text") is None
+    assert stream_from_url(f"{server}/fail") is None
+
+
+def test_profile(tmp_path):
+    """Phases get measured and reported with the counts of the tree"""
+    Options.reset()
+    Options.PROFILER = Profile(str(tmp_path / "walk.prof"))
+    try:
+        with phase("walk"):
+            get_json_tree(SAMPLE)
+        with phase("table"):
+            get_summary_table(list_json(Options.TREE))
+        # Phases inside others keep the peak of the outer ones
+        with phase("load"):
+            data = bytearray(4 * 1024**2)
+            del data
+            with phase("decode"):
+                pass
+        Options.PROFILER.write(str(tmp_path / "profile.json"))
+    finally:
+        Options.PROFILER = None
+    with open(tmp_path / "profile.json", encoding="utf-8") as f:
+        report = json.load(f)
+    assert list(report["phases"]) == ["walk", "table", "load", "decode"]
+    assert report["phases"]["load"]["peak_mb"] >= 4 > report["phases"]["decode"]["peak_mb"]
+    assert report["phases"]["walk"]["wall"] > 0
+    assert report["counts"]["nodes"] == Options.CNT
+    assert report["counts"]["paths"] == len(Options.TREE.records)
+    assert report["counts"]["leaves"] == sum(Options.ITEMS_COUNT.values())
+    assert pstats.Stats(str(tmp_path / "walk.prof")).total_calls > 0
+
+
+def test_summarizer(server, tmp_path):
+    """Summarizers keep their own settings and results, also side by side in threads"""
+    data = dict(SAMPLE, results=SAMPLE["results"] * 500, key="9a4d1c2e-5b7f-4e0a-8c3d-2f6b1e9a7c40")
+    settings = [{}, {"trim": 3, "symbol_array": "<>"}, {"detect": ["uuid"], "shape_cache": 0},
+                {"mask": 2, "redacted": ["name"], "indent": "-"}]
+    expected = [Summarizer(**s).summarize(data).table for s in settings]
+    assert len({str(table) for table in expected}) == len(settings)
+    results = {}
+
+    def run(index):
+        summarizer = Summarizer(**settings[index % len(settings)])
+        results[index] = [summarizer.summarize(data).table for _ in range(5)]
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == len(threads)
+    for index, tables in results.items():
+        assert all(table == expected[index % len(settings)] for table in tables)
+
+    file = tmp_path / "sample.json"
+    file.write_text(json.dumps(SAMPLE), encoding="utf-8")
+    summary = Summarizer().summarize_file(str(file))
+    assert (summary.tree.as_dict(), summary.items_count, summary.nodes) == summarize(SAMPLE)
+    assert summary.rows == list_json(summary.tree)
+    assert Summarizer(stream=True).summarize_url(f"{server}/gzip").table == summary.table
+    with pytest.raises(SummaryError):
+        Summarizer().summarize_file(str(tmp_path / "missing.json"))
+    with pytest.raises(SummaryError):
+        Summarizer().summarize_url(f"{server}/fail")
+    with pytest.raises(ValueError):
+        Summarizer(colour="red")
+
+
+def test_batch(tmp_path):
+    """Every file of a directory gets a table, bad files an error row"""
+    folder = tmp_path / "drop"
+    (folder / "sub").mkdir(parents=True)
+    for number in range(3):
+        (folder / f"{number}.json").write_text(json.dumps(SAMPLE["results"][number:]),
+                                               encoding="utf-8")
+    (folder / "sub" / "lines.ndjson.gz").write_bytes(
+        gzip.compress("\n".join(json.dumps(r) for r in SAMPLE["results"]).encode()))
+    (folder / "sub" / "bad.json").write_text('{"a": ', encoding="utf-8")
+    (folder / "notes.txt").write_text("no json", encoding="utf-8")
+    found = batch.find_files(str(folder))
+    assert [f.replace(str(folder), "") for f in found] == \
+        ["/0.json", "/1.json", "/2.json", "/sub/bad.json", "/sub/lines.ndjson.gz"]
+    assert batch.find_files(str(folder / "*.json")) == found[:3]
+
+    summarizer = Summarizer(trim=5)
+    for jobs in (1, 2):
+        results = sorted(batch.summarize_batch(found, summarizer, jobs))
+        assert [r.index for r in results] == list(range(5))
+        assert results[3].error == "Couldn't parse json file" and results[3].table is None
+        for result, file in zip(results, found):
+            if not result.error:
+                assert result.table == summarizer.summarize_file(file).table
+
+    Options.FILES, Options.OUTPUT = found, str(tmp_path / "index.csv")
+    try:
+        summarize_files()
+    finally:
+        Options.FILES, Options.OUTPUT = None, "screen"
+    with open(tmp_path / "index.csv", encoding="utf-8") as f:
+        index = list(csv.reader(f))
+    assert [row[7] for row in index[1:6]] == ["", "", "", "Couldn't parse json file", ""]
+    assert index[6][7] == "1 errors"
+    assert (tmp_path / "index_005.csv").exists() and not (tmp_path / "index_004.csv").exists()
+
+
+def test_lazy_imports(tmp_path):
+    """Runs on local files with csv or json output don't import requests or tabulate2"""
+    file = tmp_path / "sample.json"
+    file.write_text(json.dumps(SAMPLE), encoding="utf-8")
+    for target in ("summary.csv", "summary.json"):
+        code = ("import sys, jsummary\n"
+                f"sys.argv = ['jsummary.py', '-f', {str(file)!r}, '-o', "
+                f"{str(tmp_path / target)!r}]\n"
+                "jsummary.main()\n"
+                "print('requests' in sys.modules, 'tabulate2' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                check=True, env=dict(os.environ, XDG_CACHE_HOME=str(tmp_path)))
+        assert result.stdout.split()[-2:] == ["False", "False"]
+    with open(tmp_path / "summary.json", encoding="utf-8") as f:
+        rows = json.load(f)
+    assert rows[0]["NAME"] == "{}"
+    assert {"Sum of all items:", "WARNING:"} <= {r["NAME"] for r in rows}
+
+
+def csv_text(table, delimiter=","):
+    """table as the csv of write_csv()"""
+    text = io.StringIO()
+    write_csv(table, text, delimiter)
+    return text.getvalue()
+
+def test_server(tmp_path):
+    """Requests to '--serve' get the table of the Summarizer with their own settings"""
+    httpd = make_server("127.0.0.1:0", Summarizer(), max_body=10_000)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    body = json.dumps(SAMPLE).encode()
+
+    def post(query="", data=body, headers=None):
+        request = urllib.request.Request(f"{base}/summary{query}", data, headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=10) as resp:
+                return resp.status, resp.read().decode()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode()
+
+    try:
+        status, text = post()
+        table = Summarizer(indent="").summarize(SAMPLE).table
+        assert status == 200 and [r["NAME"] for r in json.loads(text)] == [r[0] for r in table[1:]]
+        assert post("?format=csv&delimiter=;")[1] == csv_text(table, ";")
+        (tmp_path / "sample.json").write_text(json.dumps(SAMPLE), encoding="utf-8")
+        assert post(f"?file={tmp_path / 'sample.json'}", b"",
+                    {"Accept": "text/markdown"})[1].startswith("| NAME")
+        assert post("?trim=x")[0] == 400 and post("?format=xml")[0] == 400
+        assert post(data=b"{bad")[0] == 422 and post(data=b"[" * 10_001)[0] == 413
+
+        results = {}
+        def run(trim):
+            results[trim] = post(f"?trim={trim}&format=csv")[1]
+        threads = [threading.Thread(target=run, args=(trim,)) for trim in (3, 8, 3, 8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for trim, text in results.items():
+            assert text == csv_text(Summarizer(trim=trim, indent="").summarize(SAMPLE).table)
+        with urllib.request.urlopen(f"{base}/metrics", timeout=10) as resp:
+            metrics = resp.read().decode()
+        assert 'jsummary_requests_total{status="200"} 7' in metrics
+        assert "jsummary_in_flight 0" in metrics
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_server_unix_socket(tmp_path):
+    """'--serve' also answers on a Unix socket"""
+    body = json.dumps(SAMPLE).encode()
+    socket_path = str(tmp_path / "jsummary.sock")
+    httpd = make_server(socket_path, Summarizer())
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            client.sendall(b"POST /summary?format=csv HTTP/1.1\r\nHost: x\r\n" +
+                           f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() +
+                           body)
+            response = b"".join(iter(lambda: client.recv(65536), b""))
+        assert response.startswith(b"HTTP/1.1 200") and b"Sum of all items:" in response
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert not os.path.exists(socket_path)
+    # Only sockets get replaced, never other files
+    other = tmp_path / "data.json"
+    other.write_text("{}")
+    with pytest.raises(SummaryError, match="no Unix socket"):
+        make_server(str(other), Summarizer())
+    assert other.read_text() == "{}"
+
+
+def test_formats():
+    """Streamed tables are the same as the ones of tabulate2 and json.dump()"""
+    summarizer = Summarizer(sample="50%", detect=["uuid"])
+    table = summarizer.summarize(dict(SAMPLE, key="9a4d1c2e-5b7f-4e0a-8c3d-2f6b1e9a7c40")).table
+    mixed = [["NAME", "NUMBER", "TEXT"], ["a", 3.14159, "日本語"], ["b", "1,234.5", None],
+             ["c", 1e-7, "True"], [None, 2]]
+    for rows in (table, mixed, [["A", "B"], ["line\nbreak", 1]]):
+        for formatting in (TBLFMT_TXT, TBLFMT_MD, "plain"):
+            text = io.StringIO()
+            write_text(iter(rows), text, formatting)
+            assert text.getvalue() == tabulate_table(rows, formatting)
+    text = io.StringIO()
+    write_json(summarizer.result(lazy=True).table, text)
+    assert text.getvalue() == json.dumps([dict(zip(table[0], row)) for row in table[1:]],
+                                         indent=1, ensure_ascii=False, default=str)
+
+
+def test_stats():
+    """Sketches of --stats, merged like the partial trees of --jobs"""
+    exact, estimate, small = Distinct(), Distinct(), Distinct()
+    for number in range(10):
+        exact.add(number)
+        exact.add(str(number))
+    for number in range(20_000):
+        (estimate if number % 2 else small).add(number)
+    assert exact.count() == 20
+    estimate.merge(small)
+    assert isinstance(estimate.count(), float) and abs(estimate.count() - 20_000) < 2_000
+
+    moments, first, second = Moments(), Moments(), Moments()
+    for number in (2, 4, 4, 4, 5, 5, 7, 9):
+        moments.add(number)
+        (first if number < 5 else second).add(number)
+    first.merge(second)
+    for merged in (moments, first):
+        assert (merged.minimum, merged.maximum, merged.mean, merged.stddev()) == (2, 9, 5.0, 2.0)
+    # Squares of large numbers don't overflow
+    huge, first, second = Moments(), Moments(), Moments()
+    for number in (1e300, 3e300, -1e300, 1.7e308):
+        huge.add(number)
+        (first if number < 2e300 else second).add(number)
+    first.merge(second)
+    for merged in (huge, first):
+        assert math.isclose(merged.mean, 4.250000075e307)
+        assert math.isclose(merged.stddev(), 7.361215888866e307)
+
+    top, other = TopValues(4), TopValues(4)
+    for number in range(1000):
+        top.add("often" if number % 3 else f"once{number}")
+        other.add(f"once{number}" if number % 2 else "often")
+    top.merge(other)
+    assert [value for value, _ in top.top(3)] == ["often"]
+    stats = PathStats(2)
+    for value in ("a", "bb", None, True):
+        stats.add(value)
+    assert (stats.distinct.count(), stats.lengths.mean, stats.top.total) == (3, 1.5, 3)
+
+
+def test_stats_table(monkeypatch):
+    """Columns of --stats, the same with --jobs"""
+    monkeypatch.setattr(parallel, "PARALLEL_MIN", 2)
+    summarizer = Summarizer(stats=True, top_k=2, redacted=["name"])
+    data = dict(SAMPLE, results=SAMPLE["results"] * 30)
+    table = summarizer.summarize(data).table
+    assert table[0][7:] == ["DISTINCT", "MIN", "MAX", "MEAN", "STDDEV", "LENGTH", "TOP"]
+    rows = {row[0].strip(): row[7:] for row in table[1:] if row[0]}
+    assert rows["results.[].age"] == ["3", 19, 25.5, "21.5", "2.85774", None, "20 33%, 25.5 33%"]
+    assert rows["results.[].name"] == ["3", None, None, None, None, "7..7, mean 7.0", None]
+    assert rows["results.[].registered"][-1] == "true 100%"
+    assert summarizer.replace(jobs=2).summarize(data).table == table
+    assert Summarizer().summarize(data).table[0][-1] == "PARENT"
+
+
+def test_collapse(monkeypatch):
+    """Map-like objects get collapsed into one wildcard path, also with --jobs"""
+    monkeypatch.setattr(parallel, "PARALLEL_MIN", 2)
+    names = ["anna", "bob", "carl", "dora", "emil", "fynn"]
+    data = [{"id": n, "users": {f"u{n * 10 + i:04d}": {"visits": i, "last": "12:30"}
+                                for i in range(3)},
+             "names": {names[(n + i) % 6]: [i] for i in range(2)}, "meta": {"a": 1}}
+            for n in range(20)]
+    summarizer = Summarizer(collapse_keys=4)
+    summary = summarizer.summarize(data)
+    tree = summary.tree.as_dict()
+    assert [name for name in tree if "users" in name or "names" in name] == [
+        "[].users.{}", "[].users.{*}.{}", "[].users.{*}.visits", "[].users.{*}.last",
+        "[].names.{}", "[].names.{*}.[]", "[].names.{*}.[][*]"]
+    assert tree["[].users.{*}.visits"]["count"] == 60
+    assert tree["[].users.{*}.{}"]["parent"] == "users"
+    assert tree["[].meta.a"]["count"] == 20
+    notes = [row[4] for row in summary.table if row[0] == "COLLAPSED:"]
+    assert notes == ["[].users: 60 keys collapsed into '{*}'.",
+                     "[].names: 6 keys collapsed into '{*}'."]
+    assert summarizer.replace(jobs=2).summarize(data).table == summary.table
+    assert "[].users.<key>.visits" in summarizer.replace(symbol_key="<key>").summarize(
+        data).tree.as_dict()
+    assert pickle.loads(pickle.dumps(summary.tree)).wildcards()[0].keys.count() == 60
+
+    tree = Summarizer(collapse_ids=0, collapse_keys=0).summarize(data).tree
+    assert len(tree) == 199
+    assert "[].users.u0001.visits" in tree.as_dict() and not tree.wildcards()
+
+
+def test_limits(monkeypatch, tmp_path):
+    """--max-depth skips deep containers, --max-nodes stops early, also streamed and with --jobs"""
+    monkeypatch.setattr(parallel, "PARALLEL_MIN", 2)
+    data = {"results": [{"id": i, "user": {"geo": {"lat": 1.5}}} for i in range(100)]}
+    summary = Summarizer(max_depth=3).summarize(data)
+    rows = {row[0].strip(): row for row in summary.table[1:] if row[0]}
+    assert rows["results.[].user.{}"][4] == "truncated" and rows["results.[].id"][3] == "100"
+    assert "results.[].user.geo.{}" not in rows and rows["results.[].{}"][4] == "N/A"
+    assert rows["LIMIT:"][4] == "Arrays and objects deeper than --max-depth 3 were not walked."
+    assert Summarizer(max_depth=3, jobs=2).summarize(data).table == summary.table
+    file = tmp_path / "limits.json"
+    file.write_text(json.dumps(data))
+    assert Summarizer(max_depth=3, stream=True).summarize_file(str(file)).table == summary.table
+
+    for summarizer in (Summarizer(max_nodes=50), Summarizer(max_nodes=50, stream=True)):
+        summary = summarizer.summarize_file(str(file))
+        rows = {row[0].strip(): row for row in summary.table[1:] if row[0]}
+        assert summary.nodes <= 51 and rows["results.[]"][4] == "truncated"
+        assert rows["LIMIT:"][4].startswith("Stopped after --max-nodes 50 nodes.")
+    summary = Summarizer(time_budget=1e-9).summarize({"a": [{"b": 1}] * 10})
+    assert [row[0] for row in summary.table if row[0] == "LIMIT:"] == ["LIMIT:"]
+    assert "LIMIT:" not in [row[0] for row in Summarizer().summarize(data).table]
+
+
+def test_limits_flat(tmp_path):
+    """Node and time limits also stop inside plain arrays and wide objects"""
+    data = {"wide": {f"k{i}": i for i in range(50_000)}, "flat": list(range(200_000))}
+    file = tmp_path / "flat.json"
+    file.write_text(json.dumps(data))
+    for limit in ({"max_nodes": 10}, {"time_budget": 1e-9}):
+        for summarizer in (Summarizer(**limit), Summarizer(stream=True, **limit)):
+            summary = summarizer.summarize_file(str(file))
+            rows = {row[0].strip(): row for row in summary.table[1:] if row[0]}
+            assert rows["wide.{}"][4] == "truncated" and "flat.[]" not in rows
+            assert rows["LIMIT:"][4].startswith("Stopped after")
+    for summarizer in (Summarizer(max_nodes=100), Summarizer(max_nodes=100, stream=True)):
+        file.write_text(json.dumps({"flat": data["flat"]}))
+        rows = {row[0].strip(): row for row in summarizer.summarize_file(str(file)).table[1:]
+                if row[0]}
+        assert rows["flat.[][*]"][3] == "99" and rows["flat.[]"][4] == "truncated"
+
+
+def test_cache(server, tmp_path, monkeypatch):
+    """Unchanged files and urls come from the cache, changed ones get walked again"""
+    file = tmp_path / "sample.json"
+    file.write_text(json.dumps(SAMPLE), encoding="utf-8")
+    folder = tmp_path / "cache"
+    summarizer = Summarizer(cache=str(folder))
+    expected = Summarizer().summarize_file(str(file))
+    for summary in (summarizer.summarize_file(str(file)),
+                    summarizer.summarize_url(f"{server}/etag"),
+                    summarizer.summarize_url(f"{server}/etag/lost")):
+        assert summary.table == expected.table
+    assert len(os.listdir(folder)) == 3
+    # New entries of files have no content hash. It is added once a file got touched.
+    os.utime(file, ns=(2, 2))
+    summarizer.summarize_file(str(file))
+
+    def walk(*_):
+        raise AssertionError("Walked an unchanged input")
+    monkeypatch.setattr("summarizer.get_json_tree_parallel", walk)
+    os.utime(file, ns=(1, 1))
+    not_modified = StandIn.not_modified
+    for summary in (summarizer.summarize_file(str(file)),
+                    summarizer.summarize_file(str(file), lazy=True),
+                    summarizer.summarize_url(f"{server}/etag"),
+                    summarizer.summarize_url(f"{server}/etag/lost")):
+        assert list(summary.table) == expected.table and list(summary.rows) == expected.rows
+    assert StandIn.not_modified == not_modified + 1
+    assert summarizer.replace(jobs=2, verbose=True).summarize_file(str(file)).nodes == \
+        expected.nodes
+    monkeypatch.undo()
+
+    file.write_text(json.dumps(SAMPLE["results"]), encoding="utf-8")
+    changed = summarizer.summarize_file(str(file))
+    assert changed.table == Summarizer().summarize_file(str(file)).table != expected.table
+    for entry in folder.iterdir():
+        entry.write_bytes(b"broken")
+    assert summarizer.summarize_file(str(file)).table == changed.table
+    file.write_text(json.dumps(SAMPLE), encoding="utf-8")
+    summarizer.replace(cache_size=0).summarize_file(str(file))
+    assert not os.listdir(folder)
+    for partial in ({"sample": "50%"}, {"max_nodes": 5}, {"time_budget": 60}):
+        summarizer.replace(**partial).summarize_file(str(file))
+    assert not os.listdir(folder)
+
+    # Nothing that the table hides ends up on disk
+    file.write_text(json.dumps([{"password": "hunter2-secret", "name": "alice-doe"}] * 3))
+    hidden = summarizer.replace(redacted=["password"], mask=3, stats=True)
+    expected = hidden.summarize_file(str(file))
+    stored = b"".join(entry.read_bytes() for entry in folder.iterdir())
+    assert b"hunter2" not in stored and b"alice" not in stored and b"***ce-doe" in stored
+    assert hidden.summarize_file(str(file)).table == expected.table
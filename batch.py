@@ -0,0 +1,98 @@
+"""Batch summary of jsummary
+
+'--dir' summarizes all json files of a directory or glob pattern in one run.
+The files are spread over a process pool and each one is summarized on its own.
+A file that can't be summarized becomes an error instead of ending the run."""
+import glob
+import os
+import re
+import time
+from typing import NamedTuple
+from summarizer import SummaryError
+
+# Files of a directory that get summarized
+RE_JSON_FILE = re.compile(r"\.(?:json|ndjson|jsonl)(?:\.(?:gz|bz2|xz|zst))?$")
+# Files per task of a process. Small files are cheap, so several go at once.
+MAX_CHUNK = 16
+
+# Summarizer of the worker processes
+WORKER = []
+
+
+class FileSummary(NamedTuple):
+    """Result of a file
+
+    Variables:
+        index - int: Position of the file in the batch
+        file - str: Path of the file
+        size - int: Bytes of the file. None if it can't be read.
+        nodes - int: Number of walked json nodes
+        paths - int: Number of json paths
+        items - int or float: Number of json values. Float for estimates.
+        seconds - float: Time of the summary
+        table - list: Summary table. None on errors.
+        error - str: Error message or None
+    """
+    index: int
+    file: str
+    size: int
+    nodes: int
+    paths: int
+    items: int
+    seconds: float
+    table: list
+    error: str
+
+
+def find_files(pattern: str):
+    """Sorted json files for '--dir'. A directory gives all .json, .ndjson and
+    .jsonl files below it, compressed or not, anything else is a glob pattern
+    like 'drops/**/*.json'."""
+    if os.path.isdir(pattern):
+        return sorted(os.path.join(folder, name) for folder, _, names in os.walk(pattern)
+                      for name in names if RE_JSON_FILE.search(name))
+    return sorted(file for file in glob.glob(pattern, recursive=True) if os.path.isfile(file))
+
+def summarize_batch(files: list, summarizer, jobs: int):
+    """Summarizes files with the settings of summarizer
+
+    Args:
+        files - list: Paths of the files
+        summarizer - Summarizer: Settings of the summaries
+        jobs - int: Number of processes. 1 summarizes in this process.
+    Return:
+        Iterator of FileSummary in the order the files get done"""
+    worker = summarizer.replace(jobs=1, profiler=None, verbose=False)
+    tasks = list(enumerate(files))
+    if jobs < 2 or len(files) < 2:
+        for index, file in tasks:
+            yield summarize_one(worker, index, file)
+        return
+    chunk = max(1, min(MAX_CHUNK, len(files) // (jobs * 4)))
+    import multiprocessing # pylint: disable=import-outside-toplevel
+    with multiprocessing.Pool(jobs, init_worker, (worker,)) as pool:
+        yield from pool.imap_unordered(summarize_task, tasks, chunk)
+
+def init_worker(summarizer):
+    """Initializer of the worker processes. Keeps the Summarizer for all tasks"""
+    WORKER.append(summarizer)
+
+def summarize_task(task):
+    """Worker of summarize_batch(). Summarizes the file of an (index, file) task"""
+    return summarize_one(WORKER[0], *task)
+
+def summarize_one(summarizer, index: int, file: str):
+    """Summary of a single file as FileSummary. Errors end up in the result."""
+    start = time.perf_counter()
+    try:
+        size = os.path.getsize(file)
+    except OSError as e:
+        return FileSummary(index, file, None, None, None, None, 0.0, None, e.strerror)
+    try:
+        summary = summarizer.summarize_file(file)
+    except SummaryError as e:
+        return FileSummary(index, file, size, None, None, None, time.perf_counter() - start,
+                           None, str(e).removeprefix("Error: "))
+    return FileSummary(index, file, size, summary.nodes, len(summary.tree),
+                       sum(summary.items_count.values()), time.perf_counter() - start,
+                       summary.table, None)
@@ -0,0 +1,245 @@
+"""Summary cache of jsummary
+
+Endpoints and files that get summarized again and again mostly didn't change
+since the last run. The cache keeps their summaries on disk and only loads and
+walks an input again once it changed:
+
+    Files - Same size and modification time, else the same content hash.
+    Urls - A '304 Not Modified' answer to If-None-Match and If-Modified-Since
+           with the ETag and Last-Modified of the cached response, else the
+           same content hash of the body.
+
+An entry is found by the input and the settings that change the summary, both
+hashed, so headers like API keys aren't written to disk. Entries are pickle
+files in the cache directory. Once all of them together are larger than the
+size of the cache, the least recently used ones get removed.
+
+A process scans the directory once and then adds up the entries it writes, so
+summarizing many files in a row, like '--dir' does, doesn't scan it again for
+each of them. With '--jobs' the other processes' entries are only seen by the
+next scan, so the cache can grow beyond its size by them until then."""
+import hashlib
+import os
+import pickle
+import threading
+from typing import NamedTuple
+
+# Format of the entries. Entries of other versions are never found.
+VERSION = 2
+# Bytes per read for the content hash of files
+HASH_CHUNK = 1024 * 1024
+# Suffix of the entry files
+SUFFIX = ".pickle"
+# Share of the size that is left after the least recently used entries were
+# removed, so a full cache isn't scanned again with the next entry
+EVICT_TO = 0.9
+# Errors of entries that are broken or were written by another version of jsummary
+BROKEN = (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError,
+          TypeError, ValueError)
+
+
+class Validators(NamedTuple):
+    """What tells if an input changed since its summary was cached
+
+    Variables:
+        size - int: Bytes of a file
+        mtime - int: Modification time of a file in nanoseconds
+        etag - str: ETag header of a response
+        modified - str: Last-Modified header of a response
+        digest - str: sha256 of the content. None for streamed responses.
+    """
+    size: int = None
+    mtime: int = None
+    etag: str = None
+    modified: str = None
+    digest: str = None
+
+
+class Unchanged(Exception):
+    """Raised while loading an input that is the same as the one of its cached
+    summary
+
+    Args:
+        validators - Validators: Current validators of the input"""
+    def __init__(self, validators):
+        super().__init__("Input unchanged since it was cached")
+        self.validators = validators
+
+
+def default_directory():
+    """Cache directory of the user like ~/.cache/jsummary"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "jsummary")
+
+def digest_file(path: str):
+    """sha256 of a file as it is on disk"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def check_file(path: str, cached):
+    """Validators of a local file. The content only gets hashed if there is a
+    cached summary of the same size but another modification time.
+
+    Args:
+        cached - Validators: Of the cached summary of the file or None
+    Return:
+        Validators: None if the file can't be read
+    Raises Unchanged if it is the file of cached."""
+    try:
+        stat = os.stat(path)
+        current = Validators(size=stat.st_size, mtime=stat.st_mtime_ns)
+        if cached is not None and (cached.size, cached.mtime) == (current.size, current.mtime):
+            raise Unchanged(cached)
+        if cached is None or cached.size != current.size:
+            return current
+        current = current._replace(digest=digest_file(path))
+    except OSError:
+        return None
+    if cached.digest == current.digest:
+        raise Unchanged(current)
+    return current
+
+def conditional_headers(headers: dict, cached):
+    """headers with If-None-Match and If-Modified-Since for the response of cached"""
+    if cached is None:
+        return headers
+    headers = dict(headers)
+    if cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached.modified:
+        headers["If-Modified-Since"] = cached.modified
+    return headers
+
+def check_response(resp, cached, content=None):
+    """Validators of a requests.Response to conditional_headers()
+
+    Args:
+        cached - Validators: Of the cached summary of the url or None
+        content - bytes: Body of the response. None while it gets streamed.
+    Return:
+        Validators: None for other status codes than 200
+    Raises Unchanged for '304 Not Modified' or the body of cached."""
+    if cached is not None and resp.status_code == 304:
+        raise Unchanged(cached)
+    if resp.status_code != 200:
+        return None
+    current = Validators(etag=resp.headers.get("ETag"),
+                         modified=resp.headers.get("Last-Modified"),
+                         digest=hashlib.sha256(content).hexdigest() if content is not None
+                         else None)
+    if cached is not None and current.digest and cached.digest == current.digest:
+        raise Unchanged(current)
+    return current
+
+
+class SummaryCache:
+    """Summaries on disk together with the validators of their input. Get the
+    one of a directory with shared(), so the threads of a process add up the
+    size of the entries together.
+
+    Args:
+        directory - str: Folder of the entries. Gets created with the first one.
+        max_size - int: Most bytes of all entries together
+    Variables:
+        total - int: Bytes of all entries by the last scan and the entries
+                     written since. None before the first scan.
+        lock - threading.Lock: Guards total
+    """
+    instances = {}
+    instances_lock = threading.Lock()
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        self.total = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, directory: str, max_size: int):
+        """The cache of directory with max_size of this process"""
+        with cls.instances_lock:
+            return cls.instances.setdefault((directory, max_size), cls(directory, max_size))
+
+    @staticmethod
+    def key(source: str, settings: dict):
+        """Name of the entry of source, a path or url, summarized with settings"""
+        text = repr((VERSION, source, sorted(settings.items())))
+        return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def path(self, key: str):
+        """File of an entry"""
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key: str):
+        """Validators and summary of an entry. None if there is none or it can't
+        be read. Marks the entry as recently used."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                validators, summary = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except BROKEN:
+            remove(path)
+            return None
+        return validators, summary
+
+    def put(self, key: str, validators, summary):
+        """Stores an entry and removes the least recently used ones beyond
+        max_size. Errors only mean that nothing gets cached.
+
+        Return:
+            bool: True if the entry was stored"""
+        path = self.path(key)
+        # Written next to the entry first, so other processes never read half of it
+        temp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp, "wb") as f:
+                pickle.dump((validators, summary), f, pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(temp)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp, path)
+            with self.lock:
+                if self.total is not None:
+                    self.total += size - replaced
+                if self.total is None or self.total > self.max_size:
+                    self.evict()
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            remove(temp)
+            return False
+        return True
+
+    def evict(self):
+        """Scans the entries for total. If they don't fit into max_size, the least
+        recently used ones get removed until EVICT_TO of it is left."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as found:
+            for entry in found:
+                if not entry.name.endswith(SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        if total > self.max_size:
+            for _, size, path in sorted(entries):
+                if total <= self.max_size * EVICT_TO:
+                    break
+                remove(path)
+                total -= size
+        self.total = total
+
+def remove(path: str):
+    """Removes a file that other processes may have removed already"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,91 @@
+"""Json decoders of jsummary
+
+orjson, ujson and simdjson decode large documents up to a few times faster than
+the json module of the standard library. The first installed one is used by
+default, '--parser' picks one. Documents a backend can't decode exactly like the
+json module get decoded by the json module, so the summary never depends on the
+backend."""
+import json
+from functools import lru_cache
+from importlib import import_module
+from typing import Callable, NamedTuple
+
+# Optional backends in the order of preference for 'auto'
+BACKENDS = ("orjson", "ujson", "simdjson")
+PARSERS = ("auto", *BACKENDS, "json")
+# Module names on pypi
+PACKAGES = {"orjson": "orjson", "simdjson": "pysimdjson", "ujson": "ujson"}
+
+# orjson turns integers beyond 64 bits into floats. Integers with this many
+# digits could be too large, documents with them go to the json module.
+INT_DIGITS = 19
+# Digits -> '0', parts of floats -> '.', anything else -> 'x'
+DIGITS = bytes(b"0"[0] if c in b"0123456789" else b"."[0] if c in b".eE" else b"x"[0]
+               for c in range(256))
+# Bytes checked for long integers at a time
+CHECK_CHUNK = 1024 * 1024
+
+
+class Decoder(NamedTuple):
+    """Json decoder chosen by '--parser'
+
+    Variables:
+        name - str: Module name of the backend
+        loads: Decodes str, bytes or a bytes-like object like json.loads().
+               Raises ValueError for invalid json.
+    """
+    name: str
+    loads: Callable
+
+
+def has_long_int(data):
+    """True if data might contain an integer with INT_DIGITS or more digits.
+    Digits in strings can give false positives, never false negatives."""
+    if isinstance(data, str):
+        data = data.encode()
+    view = memoryview(data)
+    number = b"x" + b"0" * INT_DIGITS
+    for start in range(0, len(view), CHECK_CHUNK):
+        # Chunks overlap by one number, the first one starts with a separator
+        prefix = b"x" if start == 0 else b""
+        chunk = prefix + bytes(view[max(start - len(number), 0):start + CHECK_CHUNK])
+        if number in chunk.translate(DIGITS):
+            return True
+    return False
+
+def stdlib_loads(data):
+    """json.loads() for bytes-like objects as well"""
+    return json.loads(data if isinstance(data, (str, bytes)) else str(data, "utf-8"))
+
+def fast_loads(name: str, backend: Callable):
+    """loads() of a backend with the json module as fallback"""
+    def loads(data):
+        if name == "orjson":
+            if has_long_int(data):
+                return stdlib_loads(data)
+            buffer = data if isinstance(data, (str, bytes)) else memoryview(data)
+        else:
+            buffer = data if isinstance(data, (str, bytes)) else bytes(data)
+        try:
+            return backend(buffer)
+        except (ValueError, RuntimeError):
+            # NaN, Infinity, lone surrogates and integers a backend rejects
+            return stdlib_loads(data)
+    return loads
+
+@lru_cache(maxsize=None)
+def get_decoder(parser="auto"):
+    """Decoder of '--parser'. 'auto' is the first installed backend or json.
+    Raises ImportError if the chosen backend is not installed."""
+    if parser == "json":
+        return Decoder("json", stdlib_loads)
+    for name in BACKENDS if parser == "auto" else (parser,):
+        try:
+            module = import_module(name)
+        except ImportError as e:
+            if parser == "auto":
+                continue
+            raise ImportError(f"Error: '--parser {name}' requires {name}. " +
+                              f"Install with 'pip install {PACKAGES[name]}'") from e
+        return Decoder(name, fast_loads(name, module.loads))
+    return Decoder("json", stdlib_loads)
@@ -0,0 +1,95 @@
+"""String type detection of jsummary
+
+All enabled patterns are combined into a single compiled regex. Cheap length and
+first-character checks run before it and results for short strings are memoized."""
+import re
+import string
+from typing import NamedTuple
+
+
+class Detector(NamedTuple):
+    """Pattern for a string type
+
+    Variables:
+        name - str: Type name shown in the summary
+        pattern - str: Regex matched at the start of the string
+        first - str: ASCII characters a match can start with
+        min_len - int: Minimum length of a match
+        unicode_digits - bool: Pattern starts with \\d, which also matches
+                    non-ASCII digits
+    """
+    name: str
+    pattern: str
+    first: str
+    min_len: int
+    unicode_digits: bool = False
+
+
+HEX = string.hexdigits
+ALNUM = string.ascii_letters + string.digits
+
+# Order matters: the first matching detector wins.
+DETECTORS = (
+    Detector("iso-8601",
+             r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})$",
+             string.digits, 17, True),
+    Detector("uuid", r"[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}$", HEX, 36),
+    Detector("date", r"\d{1,4}[-\/\.]{1}\d{1,2}[-\/\.]\d{1,4}$", string.digits, 5, True),
+    Detector("date-time", r"\d{1,4}[-\/]{1}\d{1,2}[-\/]\d{1,4}[ T]\d{1,2}:\d{1,2}",
+             string.digits, 9, True),
+    Detector("time", r"\d{1,2}:\d{1,2}", string.digits, 3, True),
+    Detector("email", r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$", ALNUM + "._%+-", 6),
+    Detector("url", r"[A-Za-z][A-Za-z0-9+.-]*://[^\s/?#]+\S*$", string.ascii_letters, 5),
+    Detector("base64",
+             r"(?:[A-Za-z0-9+/]{4}){4,}(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?$",
+             ALNUM + "+/", 16),
+)
+DEFAULT_TYPES = ("date", "date-time", "time")
+EXTRA_TYPES = tuple(d.name for d in DETECTORS if d.name not in DEFAULT_TYPES)
+# Examples of these types get trimmed, masked and redacted in the summary
+TEXT_TYPES = frozenset(("string",) + EXTRA_TYPES)
+
+
+class StringTypes:
+    """Callable detector engine. Returns the type of a string or 'string'
+
+    Args:
+        extra - iterable: Names from EXTRA_TYPES to detect in addition to
+                    date, date-time and time
+        cache_size - int: Maximum number of memoized strings. 0 disables the cache.
+    Only strings up to CACHE_LEN characters get memoized.
+    """
+    CACHE_LEN = 64
+
+    def __init__(self, extra=(), cache_size=65536):
+        names = set(DEFAULT_TYPES) | set(extra)
+        unknown = names.difference(d.name for d in DETECTORS)
+        if unknown:
+            raise ValueError(f"Unknown string types: {', '.join(sorted(unknown))}")
+        detectors = [d for d in DETECTORS if d.name in names]
+        self.names = {f"t{i}": d.name for i, d in enumerate(detectors)}
+        self.pattern = re.compile("|".join(f"(?P<t{i}>{d.pattern})"
+                                           for i, d in enumerate(detectors)))
+        self.first = frozenset("".join(d.first for d in detectors))
+        self.unicode_digits = any(d.unicode_digits for d in detectors)
+        self.min_len = min(d.min_len for d in detectors)
+        self.cache = {}
+        self.cache_size = cache_size
+
+    def __call__(self, s: str):
+        if len(s) < self.min_len or (s[0] not in self.first and not (
+                self.unicode_digits and s[0].isdecimal())):
+            return "string"
+        if len(s) > self.CACHE_LEN or not self.cache_size:
+            return self.detect(s)
+        found = self.cache.get(s)
+        if found is None:
+            if len(self.cache) >= self.cache_size:
+                self.cache.clear()
+            found = self.cache[s] = self.detect(s)
+        return found
+
+    def detect(self, s: str):
+        """Runs the combined pattern on a string without checks or cache"""
+        match = self.pattern.match(s)
+        return self.names[match.lastgroup] if match else "string"
@@ -0,0 +1,8 @@
+"""Errors of jsummary
+
+Kept apart from the summarizer, so the modules it imports can raise them too."""
+
+
+class SummaryError(Exception):
+    """Input that can't be summarized, like a missing file or invalid json.
+    The commandline exits with the message."""
@@ -0,0 +1,118 @@
+"""Concurrent HTTP requests of jsummary
+
+All requests share one keep-alive session, so connections to the same host are
+reused. A bounded pool of threads runs the requests and the results are yielded
+as soon as they arrive, while the caller summarizes them."""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class Response(NamedTuple):
+    """Result of a request
+
+    Variables:
+        index - int: Position of the url in the batch
+        url - str: The url
+        status - int: HTTP status code. None if there is no response.
+        seconds - float: Time of request and json decoding
+        size - int: Bytes of the response body
+        data: Decoded json. None on any error.
+        error - str: Error message or None
+        links - dict: Parsed 'Link' header of the response
+    """
+    index: int
+    url: str
+    status: int
+    seconds: float
+    size: int
+    data: object
+    error: str
+    links: dict = None
+
+
+def make_session(workers: int, headers=None):
+    """Keep-alive session with a connection pool for workers threads"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def fetch(session, url: str, headers=None, timeout=5, loads=json.loads):
+    """Requests url with session and decodes the json. Never raises.
+
+    Args:
+        session - requests.Session: Shared session
+        url - str: The url
+        headers - dict: Headers of this url in addition to the session headers
+        timeout - float: Timeout in seconds
+        loads: Json decoder for the body like json.loads()
+    Return:
+        Response: With index None"""
+    start = time.perf_counter()
+    status = size = data = error = links = None
+    try:
+        resp = session.get(url, headers=headers, timeout=timeout)
+        status, size, links = resp.status_code, len(resp.content), resp.links
+        if status == 200:
+            data = loads(resp.content)
+        else:
+            error = f"Status {status}"
+    except ValueError:
+        error = "Couldn't parse json"
+    except (requests.ConnectTimeout, requests.ReadTimeout):
+        error = f"Timeout after {timeout} seconds"
+    except requests.RequestException as e:
+        error = f"Request failed: {e.__class__.__name__}"
+    return Response(None, url, status, time.perf_counter() - start, size, data, error, links)
+
+class BodyReader:
+    """File-like view of a streamed response body for incremental parsers
+
+    Args:
+        resp - requests.Response: Response requested with stream=True
+        chunk_size - int: Bytes per read from the connection
+    Variables:
+        size - int: Decoded bytes read so far
+    gzip and deflate get decoded on the fly. The timeout of the request applies
+    to every chunk, not to the whole transfer."""
+    def __init__(self, resp, chunk_size: int):
+        self.resp = resp
+        self.chunks = resp.iter_content(chunk_size)
+        self.size = 0
+
+    def read(self, size=-1):
+        """Next chunk of the body. Empty at the end or for size 0."""
+        if size == 0:
+            return b""
+        chunk = next(self.chunks, b"")
+        self.size += len(chunk)
+        return chunk
+
+    def close(self):
+        """Releases the connection of the response"""
+        self.resp.close()
+
+def fetch_all(urls, workers=8, headers=None, timeout=5, loads=json.loads):
+    """Requests all urls concurrently over one session
+
+    Args:
+        urls - list: (url, headers) tuples. headers can be None.
+        workers - int: Maximum number of parallel requests
+        headers - dict: Headers shared by all requests
+        timeout - float: Timeout per request in seconds
+        loads: Json decoder for the bodies like json.loads()
+    Return:
+        Generator of Response in the order of arrival"""
+    with make_session(workers, headers) as session, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch, session, url, url_headers, timeout, loads): index
+                   for index, (url, url_headers) in enumerate(urls)}
+        for future in as_completed(futures):
+            yield future.result()._replace(index=futures[future])
@@ -0,0 +1,61 @@
+"""File input of jsummary
+
+Files ending with .gz, .bz2, .xz or .zst are decompressed as a stream while they
+are read, so archived dumps never get unpacked to disk. Large uncompressed files
+are memory-mapped instead of being copied into memory."""
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+from contextlib import contextmanager
+
+# Uncompressed files from this size on are memory-mapped
+MMAP_MIN = 1024 * 1024
+# Errors of truncated or corrupt compressed files
+READ_ERRORS = (OSError, EOFError, lzma.LZMAError)
+
+
+def open_zstd(file: str):
+    """Opens a zstandard file like gzip.open(). Requires the zstandard package."""
+    try:
+        import zstandard # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise ImportError("Error: .zst files require zstandard. " +
+                          "Install with 'pip install zstandard'") from e
+    # Buffered for readline(), across frames for files of several frames
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(
+        open(file, "rb"), read_across_frames=True, closefd=True)) # pylint: disable=consider-using-with
+
+# Suffixes of compressed files and their openers in binary mode
+COMPRESSIONS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open, ".zst": open_zstd}
+
+
+def compression(file: str):
+    """Suffix of a compressed file like '.gz'. None for uncompressed files."""
+    suffix = os.path.splitext(file)[1].lower()
+    return suffix if suffix in COMPRESSIONS else None
+
+def strip_compression(file: str):
+    """file without the suffix of its compression, 'a.json.gz' -> 'a.json'"""
+    return file[:-len(suffix)] if (suffix := compression(file)) else file
+
+def open_input(file: str, buffering=-1):
+    """Opens file in binary mode. Compressed files are decompressed while they
+    are read. buffering only applies to uncompressed files."""
+    if suffix := compression(file):
+        return COMPRESSIONS[suffix](file)
+    return open(file, "rb", buffering=buffering) # pylint: disable=consider-using-with
+
+@contextmanager
+def read_input(file: str):
+    """Context manager with the complete content of file as bytes-like object.
+    Compressed files are decompressed in memory, uncompressed files from
+    MMAP_MIN bytes on are memory-mapped and only valid inside the context."""
+    with open_input(file) as f:
+        if compression(file) or os.fstat(f.fileno()).st_size < MMAP_MIN:
+            yield f.read()
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
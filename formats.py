@@ -0,0 +1,285 @@
+"""Output formats of jsummary
+
+Writes the summary table as csv, json or text table into any text file object,
+like an output file or the response of '--serve'. The table can be any iterable
+of rows with the header first, also a generator like summarizer.iter_summary_table().
+csv and json rows are written as they come. Text tables need the width of every
+column first, so their rows are kept and measured in a single pass before the
+first line gets written. The text tables are the same as the ones of tabulate2."""
+import csv
+import io
+import json
+import math
+import re
+from itertools import islice
+from typing import NamedTuple
+
+# tabulate2 formats of the text outputs
+TBLFMT_TXT = "mixed_grid"
+TBLFMT_MD = "github"
+TBLFMT_SCREEN = "plain"
+
+# Column types in the order of tabulate2, a column gets the most generic one
+NONE, BOOL, INT, FLOAT, STR = range(5)
+# Numbers like '1,234.5', see tabulate2
+RE_THOUSANDS = re.compile(r"^(([+-]?[0-9]{1,3})(?:,([0-9]{3}))*)?(?(1)\.[0-9]*|\.[0-9]+)?$")
+# Space between the header and the column border
+MIN_PADDING = 2
+# Rows per write of the text writers
+WRITE_CHUNK = 512
+
+
+class TextFormat(NamedTuple):
+    """Lines of a text table like the TableFormat of tabulate2
+
+    Variables:
+        above, below_header, between, below - tuple: (begin, fill, separator, end)
+                    of a horizontal line or None
+        row - tuple: (begin, separator, end) of a row
+        padding - int: Spaces on both sides of a cell
+        colons - bool: Mark the alignment with colons below the header like markdown
+    """
+    above: tuple
+    below_header: tuple
+    between: tuple
+    below: tuple
+    row: tuple
+    padding: int
+    colons: bool
+
+TEXT_FORMATS = {
+    "mixed_grid": TextFormat(("┍", "━", "┯", "┑"), ("┝", "━", "┿", "┥"), ("├", "─", "┼", "┤"),
+                             ("┕", "━", "┷", "┙"), ("│", "│", "│"), 1, False),
+    "github": TextFormat(None, ("| ", "-", " | ", " |"), None, None, ("| ", " | ", " |"), 0, True),
+    "plain": TextFormat(None, None, None, None, ("", "  ", ""), 0, False),
+}
+
+
+def format_table(table, formatting):
+    """Table as text in a tabulate2 format"""
+    text = io.StringIO()
+    write_text(table, text, formatting)
+    return text.getvalue()
+
+def tabulate_table(table, formatting):
+    """Table as text from tabulate2 itself. tabulate2 is only imported for tables
+    the text writer can't measure."""
+    from tabulate2 import tabulate # pylint: disable=import-outside-toplevel
+    return tabulate(table, headers="firstrow", tablefmt=formatting, preserve_whitespace=True)
+
+def write_csv(table, file, delimiter=","):
+    """Writes table as csv to file"""
+    csv.writer(file, delimiter=delimiter).writerows(table)
+
+def write_json(table, file):
+    """Writes table as json array with an object per row to file. The keys
+    are the names of the header."""
+    rows = iter(table)
+    header = next(rows)
+    file.write("[")
+    separator = "\n "
+    for row in rows:
+        # An object per row, indented like json.dump(..., indent=1) of the whole array
+        text = json.dumps(dict(zip(header, row)), indent=1, ensure_ascii=False, default=str)
+        file.write(separator + text.replace("\n", "\n "))
+        separator = ",\n "
+    file.write("]" if separator == "\n " else "\n]")
+
+def write_text(table, file, formatting):
+    """Writes table as text table in a tabulate2 format to file. Tables with
+    cells that need the special handling of tabulate2 like colors, line breaks,
+    control characters or rows longer than the header are written by tabulate2."""
+    rows = table if isinstance(table, list) else list(table)
+    layout = measure_columns(rows) if formatting in TEXT_FORMATS and len(rows) > 1 else None
+    if layout is None:
+        file.write(tabulate_table(rows, formatting))
+        return
+    style = TEXT_FORMATS[formatting]
+    lines = text_lines(rows, layout, style)
+    file.write(next(lines))
+    while chunk := list(islice(lines, WRITE_CHUNK)):
+        file.write("\n" + "\n".join(chunk))
+
+def text_lines(rows, layout, style: TextFormat):
+    """Lines of a text table without line breaks
+
+    Args:
+        rows - list: Header and rows
+        layout - tuple: Types, widths and decimals of the columns from measure_columns()
+        style - TextFormat: Lines of the table"""
+    types, widths, decimals = layout
+    numbers = [kind in (INT, FLOAT) for kind in types]
+    pad = " " * style.padding
+    yield from header_lines(rows[0], widths, numbers, style)
+    full = [width + 2 * style.padding for width in widths]
+    between = line(full, style.between) if style.between else None
+    for index, row in enumerate(islice(rows, 1, None)):
+        if between and index:
+            yield between
+        cells = [pad + align(format_cell(value, types[column], decimals[column]),
+                             widths[column], numbers[column]) + pad
+                 for column, value in enumerate(row)]
+        cells += [pad + " " * width + pad for width in widths[len(cells):]]
+        yield row_line(cells, style.row)
+    if style.below:
+        yield line(full, style.below)
+
+def header_lines(header, widths, numbers, style: TextFormat):
+    """Lines of a text table down to the line below the header"""
+    pad = " " * style.padding
+    full = [width + 2 * style.padding for width in widths]
+    if style.above:
+        yield line(full, style.above)
+    yield row_line([pad + align(str(name), width, number) + pad
+                    for name, width, number in zip(header, widths, numbers)], style.row)
+    if style.colons:
+        begin, fill, separator, end = style.below_header
+        yield begin + separator.join(fill * (width - 1) + ":" if number else
+                                     ":" + fill * (width - 1)
+                                     for width, number in zip(full, numbers)) + end
+    elif style.below_header:
+        yield line(full, style.below_header)
+
+def align(text: str, width: int, right: bool):
+    """text padded to width on screen, numbers to the right"""
+    width += len(text) - text_width(text)
+    return text.rjust(width) if right else text.ljust(width)
+
+def line(widths, style):
+    """Horizontal line of a text table"""
+    begin, fill, separator, end = style
+    return row_line([fill * width for width in widths], (begin, separator, end))
+
+def row_line(cells, style):
+    """Row of a text table. Trailing spaces get removed like in tabulate2."""
+    begin, separator, end = style
+    return (begin + separator.join(cells) + end).rstrip()
+
+def measure_columns(rows):
+    """Single pass over rows for the type, width and decimals of each column
+
+    Return:
+        tuple: Lists of types, widths and the most digits after the point of
+               float columns. None if tabulate2 has to write the table."""
+    count = len(rows[0])
+    types = [BOOL] * count
+    widths = [0] * count
+    # Width of float columns before the aligned points and the most decimals
+    integral = [0] * count
+    decimals = [-1] * count
+    # Like tabulate2, the longest row decides the number of columns
+    longest = 0
+    for row in islice(rows, 1, None):
+        longest = max(longest, len(row))
+        if longest > count:
+            return None
+        for column, value in enumerate(row):
+            kind = value_type(value)
+            width = text_width("" if value is None else str(value))
+            if kind is None or width is None:
+                return None
+            types[column] = max(types[column], kind)
+            widths[column] = max(widths[column], width)
+            if types[column] <= FLOAT:
+                try:
+                    before, after = float_width(value)
+                except ValueError:
+                    return None
+                integral[column] = max(integral[column], before)
+                decimals[column] = max(decimals[column], after)
+        for column in range(len(row), count):
+            integral[column] = max(integral[column], 1)
+    del types[longest:], widths[longest:], decimals[longest:]
+    for column, name in enumerate(rows[0][:longest]):
+        width = text_width(str(name))
+        if width is None:
+            return None
+        if types[column] == FLOAT:
+            widths[column] = integral[column] + decimals[column]
+        widths[column] = max(widths[column], width + MIN_PADDING)
+    return types, widths, decimals
+
+def value_type(value): # pylint: disable=too-many-return-statements
+    """Type of a cell like _type() of tabulate2, numbers in strings included.
+    None for bytes, which only tabulate2 writes."""
+    kind = type(value)
+    if value is None:
+        return NONE
+    if kind is bytes:
+        return None
+    if kind is bool:
+        return BOOL
+    if kind is int:
+        return INT
+    if kind is float:
+        return FLOAT
+    if kind is not str:
+        return STR if hasattr(value, "isoformat") or not is_float(value) else FLOAT
+    if not value:
+        return NONE
+    if value in ("True", "False"):
+        return BOOL
+    if value[-1].isalpha() and value.lower() not in ("inf", "-inf", "nan"):
+        return STR
+    try:
+        int(value)
+        return INT
+    except ValueError:
+        pass
+    thousands = RE_THOUSANDS.match(value)
+    if thousands and "." not in value:
+        return INT
+    if thousands or is_float(value):
+        return FLOAT
+    return STR
+
+def is_float(value):
+    """True if value is a number for tabulate2. Strings that overflow to
+    infinity aren't."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return False
+    return not isinstance(value, str) or not (math.isinf(number) or math.isnan(number)) or \
+        value.lower() in ("inf", "-inf", "nan")
+
+def format_float(value):
+    """Cell of a float column"""
+    if value is None or value == "":
+        return ""
+    if isinstance(value, str):
+        value = value.replace(",", "")
+    return format(float(value), "g")
+
+def after_point(text: str):
+    """Digits after the point of a formatted float, -1 without a point"""
+    point = text.rfind(".")
+    point = text.rfind("e") if point < 0 else point
+    return len(text) - point - 1 if point >= 0 else -1
+
+def float_width(value):
+    """Width of value in a float column before and after the point"""
+    text = format_float(value)
+    point = after_point(text)
+    return len(text) - point, point
+
+def format_cell(value, kind: int, decimals: int):
+    """Text of a cell in a column of type kind, floats aligned at the point"""
+    if kind == FLOAT:
+        text = format_float(value)
+        return text + " " * (decimals - after_point(text))
+    return "" if value is None else str(value)
+
+def text_width(text: str):
+    """Width of text on screen. None for text that tabulate2 measures itself,
+    like text with colors, line breaks or other control characters."""
+    if text.isascii():
+        return len(text) if text.isprintable() else None
+    if not text.isprintable():
+        return None
+    try:
+        from wcwidth import wcswidth # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return len(text)
+    width = wcswidth(text)
+    return width if width >= 0 else None
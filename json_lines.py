@@ -0,0 +1,123 @@
+"""JSON Lines input of jsummary
+
+NDJSON or JSON Lines files hold one json value per line. The values are summarized
+as the items of an implicit top-level array, read line by line, so memory only
+depends on the longest line. Malformed lines are counted and skipped."""
+import json
+from itertools import islice
+from decoders import get_decoder
+from files import READ_ERRORS, open_input, strip_compression
+from options import Options
+from walker import limited, set_container, walk
+
+SUFFIXES = (".ndjson", ".jsonl")
+# Number and maximum length of the lines read to detect json lines in other files
+PEEK_LINES = 10
+PEEK_SIZE = 1024 * 1024
+
+
+def is_json_lines(file: str):
+    """True if file ends with .ndjson or .jsonl (before a compression suffix), or
+    if at least two of its first lines are complete json objects or arrays.
+    Lines of indented json never are, but a malformed line in json lines does
+    not hide the others."""
+    if strip_compression(file).lower().endswith(SUFFIXES):
+        return True
+    records = 0
+    try:
+        with open_input(file) as f:
+            for _ in range(PEEK_LINES):
+                line = f.readline(PEEK_SIZE)
+                if not line:
+                    break
+                try:
+                    records += isinstance(json.loads(line), (dict, list))
+                except ValueError:
+                    continue
+    except (ImportError, *READ_ERRORS):
+        return False
+    return records >= 2
+
+
+class LineReader:
+    """Iterator over the json values of the lines in a binary file
+
+    Args:
+        f: File opened in binary mode
+        start - int: Byte offset of the first line. A line starting before
+                    belongs to the previous chunk and gets skipped.
+        stop - int: Lines starting at or after this offset are not read.
+                    None reads to the end of the file.
+    Variables:
+        items - int: Lines with json values, including lines left out by
+                    the sampler
+        records - int: Lines parsed and returned
+        malformed - int: Lines that are no valid json
+    """
+    def __init__(self, f, start=0, stop=None):
+        self.f = f
+        self.start = start
+        self.stop = stop
+        self.items = 0
+        self.records = 0
+        self.malformed = 0
+        self.lines = self.read()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.lines)
+
+    def read(self):
+        """Generator behind the iterator. Lines after the first Sampler.min_size
+        values are sampled with Sampler.keep() before they get parsed."""
+        position = self.start
+        if self.start:
+            self.f.seek(self.start - 1)
+            position += len(self.f.readline()) - 1
+        sampler = Options.SAMPLER
+        loads = get_decoder(Options.PARSER).loads
+        for line in self.f:
+            if self.stop is not None and position >= self.stop:
+                break
+            position += len(line)
+            if not line.strip():
+                continue
+            if sampler and not sampler.keep(self.records + 1):
+                self.items += 1
+                continue
+            try:
+                value = loads(line)
+            except ValueError:
+                self.malformed += 1
+                continue
+            self.items += 1
+            self.records += 1
+            yield value
+
+
+def get_json_lines_tree(f, start=0, stop=None):
+    """JSON lines counterpart of get_json_tree()
+
+    Args:
+        f: File opened in binary mode
+        start, stop - int: Byte range of the lines, see LineReader
+    Return:
+        LineReader: Holds the number of items and malformed lines. The root is
+                    not counted in Options.CNT, so partial trees can be merged.
+    """
+    tree = Options.TREE
+    array = tree.child(tree.root, Options.SYMBOL_ARRAY)
+    set_container(array, "array", 0)
+    reader = LineReader(f, start, stop)
+    sampler = Options.SAMPLER
+    # Sampled lines stand for 1 / fraction lines, the first ones for themselves
+    walk((limited(islice(reader, sampler.min_size if sampler else None), array), array, None, 1))
+    if sampler:
+        walk((limited(reader, array), array, None, 1 / sampler.sample.fraction))
+        if reader.items > sampler.min_size:
+            sampler.add(array, reader.items, reader.records)
+    array.size = reader.items
+    Options.MALFORMED += reader.malformed
+    return reader
@@ -1,13 +1,21 @@
 """jsummary"""
+# Options is a thread-local instance with upper case attributes
+# pylint: disable=invalid-name
 import argparse
-import csv
-import json
 import os
 import re
 import sys
+import time
 from ast import literal_eval
-import requests
-from tabulate2 import tabulate
+from batch import find_files, summarize_batch
+from cache import default_directory
+from decoders import PARSERS, get_decoder
+from detectors import EXTRA_TYPES
+from formats import TBLFMT_MD, TBLFMT_SCREEN, TBLFMT_TXT, write_csv, write_json, write_text
+from options import Options
+from profiler import Profile, phase
+from sampling import parse_sample
+from summarizer import Summarizer, SummaryError, debug, format_count
 
 # REGEX-Patterns and Messages
 RE_URL = ("Enter URL ('https://example.com/endpoint'): ",
@@ -15,76 +23,14 @@ RE_URL = ("Enter URL ('https://example.com/endpoint'): ",
           r"^https?://.+")
 RE_FILE = ("Enter input filename or path ('./myfolder/my.json'): ",
           "Invalid filename or path",
-          r"^(?:\.{1,2}\/|\.{1,2}\\)?(?:\w|\d)*(?:\w|\d|\.|\/|\\)*?(?:\w|\d|\W)+\.json$")
+          r"^(?:\.{1,2}\/|\.{1,2}\\)?(?:\w|\d)*(?:\w|\d|\.|\/|\\)*?(?:\w|\d|\W)+" +
+          r"\.(?:json|ndjson|jsonl)(?:\.(?:gz|bz2|xz|zst))?$")
 RE_HEADERS = ("Enter header(s) ('key : value') - 'ENTER' when done: ",
               "Invalid input", r"^[\w\W]+:{1}.+$")
-RE_OUTPUT = ("Enter output filename or path (can be .csv, .txt, .md or 'ENTER' for screen): ",
+RE_OUTPUT = ("Enter output filename or path (can be .csv, .txt, .md, .json or 'ENTER' for " +
+             "screen): ",
           "Invalid filename or path",
-          r"^(?:\.{1,2}/|\.{1,2}\\)?(?:\w|\d)+(?:\w|\d|/|\\)*(?:\w|\d)+(\.csv|\.txt|\.md)$")
-
-# Other global VARS
-
-TBLFMT_TXT = "mixed_grid"
-TBLFMT_MD = "github"
-TBLFMT_SCREEN = "plain"
-
-
-# Datacontainer
-class Options:
-    """Data container for json summary.
-    
-    Variables:
-        INTERACTIVE - bool: Indicator if user input is needed and if the commandline 
-                        prompt will get printed at the end of the program
-        FILE - str: Stores the filename or path of the json file. 
-                    Gets set to none if input is a url.
-        URL - str: Same as FILE but for url.
-        HEADERS - dict: Stores HTTP Headers. Can be extended via
-                        user input or commandline arguments.
-        OUTPUT - str: Stores the output name or path for the output file.
-                        Default is 'screen' for CLI output.
-        TREE - dict: Container for initial recursion from get_json_tree().
-        ITEMS_COUNT - dict: Container for precise counting of json values
-                    (number, string, boolean, null). Note that strings will be 
-                    separated into string, date, date-time and time. 
-    """
-    INTERACTIVE = True
-    FILE = None
-    URL = None
-    HEADERS = {
-        "Accept": "application/json"
-    }
-    OUTPUT = "screen"
-    TREE = {}
-    ITEMS_COUNT = {}
-    SYMBOL_ARRAY = "[]"
-    SYMBOL_OBJECT = "{}"
-    SYMBOL_ARRAY_ITEM = "[*]"
-    INDENT = "  "
-    MASK = 0
-    TRIM = 50 # set to -1 for full length
-    REDACTED = []
-    REQUEST_TIMEOUT = 5
-    CSV_DELIMITER = ","
-    CNT = 0
-    DEBUG = False
-
-    @classmethod
-    def print_config(cls):
-        """Prints configuration"""
-        if cls.FILE:
-            print(f"FILE: {cls.FILE}")
-        else:
-            print(f"URL: {cls.URL}")
-            print(f"HEADERS: {cls.HEADERS}")
-        print(f"OOUTPUT: {cls.OUTPUT}\n")
-
-    @classmethod
-    def is_debug(cls):
-        """Returns if programm is in debug mode"""
-        return cls.DEBUG
-
-
+          r"^(?:\.{1,2}/|\.{1,2}\\)?(?:\w|\d)+(?:\w|\d|/|\\)*(?:\w|\d)+(\.csv|\.txt|\.md|\.json)$")
 
 
 def main():
@@ -98,26 +44,42 @@ def main():
         print("Success: Loading user input:")
     Options.print_config()
 
-    if Options.FILE:
-        jsn = load_from_file(Options.FILE)
-    else:
-        jsn = load_from_url(Options.URL)
-    if not jsn:
-        sys.exit("Error: Can't load json data. Exiting...")
+    if Options.SERVE:
+        # http.server is only imported for '--serve'
+        from server import serve # pylint: disable=import-outside-toplevel
+        try:
+            serve(Options.SERVE, Summarizer.from_options(), Options.MAX_BODY,
+                  Options.CSV_DELIMITER)
+        except SummaryError as e:
+            sys.exit(str(e))
+        return
+
+    if Options.URLS or Options.FILES:
+        if Options.URLS:
+            summarize_urls()
+        else:
+            summarize_files()
+        write_profile()
+        print("\nSuccess: Summary complete.\n")
+        return
 
-    get_json_tree(jsn)
-    if not Options.TREE:
+    summarizer = Summarizer.from_options()
+    try:
+        # The rows of the table are made while they are written
+        summary = summarizer.summarize_file(Options.FILE, lazy=True) if Options.FILE else \
+            summarizer.summarize_url(Options.URL, lazy=True)
+    except SummaryError as e:
+        sys.exit(str(e))
+    if not summary.tree:
         sys.exit("Error: Can't analyze json structure. Exiting...")
 
-    debug(f"Parsing json took {Options.CNT:,d} recursions")
-
-    if table := get_summary_table(list_json(Options.TREE)):
+    debug(f"Parsing json took {summary.nodes:,d} recursions")
 
-        print(f"Sucess: Outputting table to {Options.OUTPUT}\n")
-        if not Options.is_debug():
-            output(table)
-    else:
-        sys.exit("Error: Can't create table. Exiting...")
+    print(f"Sucess: Outputting table to {Options.OUTPUT}\n")
+    if not Options.is_debug():
+        with phase("output"):
+            output(summary.table)
+    write_profile()
 
     print("\nSuccess: Summary complete.\n")
 
@@ -129,6 +91,12 @@ def main():
               f"\tpython jsummary.py {str_input} {str_output} {str_header}",
               "\n\nRun 'python json_summary.py -' for more options.\n")
 
+def write_profile():
+    """Writes the report of '--profile' if it is set"""
+    if Options.PROFILER:
+        Options.PROFILER.write(Options.PROFILE)
+        print(f"Success: Profile written to {Options.PROFILE}")
+
 # Input & Verification
 def user_input(func):
     """Looped wrapper function for get_input().
@@ -181,7 +149,7 @@ def get_input(verify: tuple, source= None):
         return source, True
     # Else get interactive user input
 
-    if Options.CNT == 0:
+    if Options.RETRIES == 0:
         print("User input or 'q' to quit")
 
     try:
@@ -191,10 +159,10 @@ def get_input(verify: tuple, source= None):
             return None, True
         if not check:
             print(error_message)
-            Options.CNT += 1
+            Options.RETRIES += 1
             return None, False
 
-        Options.CNT = 0
+        Options.RETRIES = 0
         return source, True
     except EOFError:
         print("\nUser interrupted input.")
@@ -250,164 +218,34 @@ def get_headers():
         #               "space before and after ' : '")
         #         header = None
 
-def check_date_time(s: str):
-    """Detects date, date-time and time patterns in a string
-
-    Args:
-        s - string: Input string that will be checked
-    Return:
-        str: String with value 'date', 'date-time', 'time' or 'string'
-    """
-    pattern_date = r"^\d{1,4}[-\/\.]{1}\d{1,2}[-\/\.]\d{1,4}$"
-    pattern_date_time = r"^\d{1,4}[-\/]{1}\d{1,2}[-\/]\d{1,4}[ T]\d{1,2}:\d{1,2}"
-    pattern_time = r"^\d{1,2}:\d{1,2}"
-    if re.search(pattern_date, s):
-        return "date"
-    if re.search(pattern_date_time, s):
-        return "date-time"
-    if re.search(pattern_time, s):
-        return "time"
-    return "string"
-
-
-def adjust_json_type(t: str):
-    """Swap python types to json types
-
-    Args:
-        s - str: String valie of python type
-    Return:
-        t - str: String value of json type"""
-    match t:
-        case "NoneType":
-            t = "null"
-        case "list":
-            t = "array"
-        case "dict":
-            t = "object"
-        case "int":
-            t = "number"
-        case "float":
-            t = "number"
-        case "bool":
-            t = "boolean"
-        case _:
-            pass
-    return t
-
-def check_consistency(a: dict, b: dict):
-    """Checks if a count mismatch results from 'null' values
-    
-    Args:
-        a - dict: Options.ITEMS_COUNT
-        b - dict: Counted items from the output table
-    Return:
-        level - str: 'Info' or 'Warning'
-        msg - list: Infomessage for 2 tablerows"""
-    difference = {}
-    for k, v in a.items():
-        difference[k] = v - b.get(k, 0)
-    nulls = abs(difference.get("null", 0))
-    rest = sum(abs(v) for (k, v) in difference.items() if k != "null")
-    debug("Difference", difference)
-    if nulls == rest:
-        level = "INFO:"
-        msg = ["Inconsistent data detected.", "Most likely from occasional 'null' values."]
-    else:
-        level = "WARNING:"
-        msg = ["Inconsistent data detected.", "Most likely due to mixed types in json values"]
-    return level, msg
-
-def table_statistics(table, is_consistent, sum_item_count, secondary_itemcount):
-    """Add statistics to table"""
-    table.append([None, None, None, None, None, None])
-    for k, v in sorted(Options.ITEMS_COUNT.items(), key=lambda v: v[1], reverse=True):
-        table.append([f"Sum of {k}:",None, None, f"{v:,d}", None, None, None])
-
-        item_sum = sum(list(Options.ITEMS_COUNT.values()))
-        debug(item_sum)
-
-        checksum = 0 if sum_item_count == item_sum else ("Count mismatch" +
-                                                         f"{item_sum:,d}/{sum_item_count:,d}")
-
-    table.append(["Sum of all items:", None, None,
-                f"{sum_item_count:,d}" if sum_item_count > 0 else None,
-                f"{checksum:,d}" if checksum > 0 else None, None, None])
-    debug("Results ITEM_COUNT", Options.ITEMS_COUNT)
-    debug("Results from rows", secondary_itemcount)
-    if not is_consistent:
-        level, msg = check_consistency(Options.ITEMS_COUNT, secondary_itemcount)
-        table.append([level, None, None, None, msg[0], None, None])
-        table.append([None, None, None, None, msg[1], None, None])
-    return table
-
-def get_parent(path: str):
-    """Get parent from a dot-separated string"""
-    parent = ""
-    path_parent = None
-    if "." in path:
-        path_parent = path.split(".")
-        for i in range(len(path_parent) -2, -1, -1):
-            if Options.SYMBOL_ARRAY not in path_parent[i]:
-                parent = path_parent[i]
-                break
-
-    return parent, path_parent
-
-def process_list_items(data, path, path_parent, dot):
-    """Subfunction of get_json_tree() for list items"""
-    for i in data:
-        # In case a list itself contains values.
-        # Assuming that the content of the list is type-consistent.
-        if type(i).__name__ not in ["list", "dict"]:
-
-            list_type = type(i).__name__
-            if isinstance(i, str):
-                list_type = check_date_time(i)
-            else:
-                list_type = adjust_json_type(list_type)
-            if path and path_parent:
-                parent = path_parent[-1]
-            else:
-                parent = ""
-
-            if isinstance(i, str):
-                list_type = check_date_time(i)
-            else:
-                list_type = adjust_json_type(list_type)
-
-            count_items(path + dot + Options.SYMBOL_ARRAY +
-                        Options.SYMBOL_ARRAY_ITEM, list_type, i, parent)
-
-        else:
-            # Default case for lists
-            get_json_tree(i, f"{path}{dot}{Options.SYMBOL_ARRAY}")
-
 # Program
 def load_config():
     """Loads commandline arguments and verifies input"""
 
     args = parse_args()
     Options.DEBUG = args.debug
+    Options.STREAM = args.stream
+    Options.SAMPLE = args.sample
+    Options.JSON_LINES = args.ndjson
+    Options.JOBS = args.jobs if args.jobs else os.cpu_count() or 1
+    Options.WORKERS = args.workers if args.workers else Options.WORKERS
+    Options.PAGINATE = args.paginate
+    Options.MAX_PAGES = args.max_pages if args.max_pages else Options.MAX_PAGES
+    Options.MAX_RECORDS = args.max_records if args.max_records else Options.MAX_RECORDS
+    Options.CURSOR_PARAM = args.cursor_param if args.cursor_param else Options.CURSOR_PARAM
+    Options.PARSER = args.parser
+    Options.CACHE = None if args.no_cache else args.cache_dir or default_directory()
+    Options.CACHE_SIZE = args.cache_size * 1024 * 1024 if args.cache_size else Options.CACHE_SIZE
+    Options.PROFILE = args.profile
+    if args.profile:
+        Options.PROFILER = Profile(args.profile_walk)
+    try:
+        get_decoder(Options.PARSER)
+    except ImportError as e:
+        sys.exit(e.msg)
 
     # Checks and changes
-
-    if args.file or args.url:
-        Options.INTERACTIVE = False
-        if args.file:
-            # Verification filename or path
-            Options.FILE = get_input(RE_FILE, args.file)
-            if not Options.FILE:
-                sys.exit("Error: Not a valid input file. Exiting...")
-            Options.URL = None
-            Options.HEADERS = None
-        elif args.url:
-            # Verification url
-            Options.URL = get_input(RE_URL, args.url)
-            if not Options.URL:
-                sys.exit("Error: Not a valid url. Exiting...")
-            Options.FILE = None
-    elif args.file and args.url:
-        sys.exit("Error: You can either load a local json file or a remote one.")
+    load_input_args(args)
 
     # Verify commandline arguments
     if args.header:
@@ -420,14 +258,15 @@ def load_config():
             print("Trying default headers instead.")
 
     Options.OUTPUT = args.output if args.output else Options.OUTPUT
-    # Making sure, that indent is off for csv
-    if Options.OUTPUT.endswith(".csv"):
+    # Making sure, that indent is off for csv and json
+    if Options.OUTPUT.endswith((".csv", ".json")):
         Options.INDENT = ""
 
     # Setting the rest of the cli arguments if available
     Options.SYMBOL_ARRAY = args.array if args.array else Options.SYMBOL_ARRAY
     Options.SYMBOL_ARRAY_ITEM = args.arrayitem if args.arrayitem else Options.SYMBOL_ARRAY_ITEM
     Options.SYMBOL_OBJECT = args.object if args.object else Options.SYMBOL_OBJECT
+    Options.SYMBOL_KEY = args.anykey if args.anykey else Options.SYMBOL_KEY
     Options.INDENT = args.indent if args.indent else Options.INDENT
     Options.MASK = args.mask if args.mask else Options.MASK
     Options.TRIM = args.trim if args.trim else Options.TRIM
@@ -439,8 +278,93 @@ def load_config():
         for a in args.redacted:
             Options.REDACTED.append(a)
 
+    Options.DETECT = args.detect if args.detect else Options.DETECT
+    load_walk_args(args)
+
+    # New tree with the chosen symbols and string types
+    Options.reset()
+
     print("Success: Loading commandline arguments:")
 
+def load_walk_args(args):
+    """Sub-function of load_config(). Sets the options of the tree walk: shape
+    cache, collapsed keys, statistics and limits"""
+    Options.SHAPE_CACHE = args.shape_cache if args.shape_cache is not None else Options.SHAPE_CACHE
+    Options.COLLAPSE_IDS = args.collapse_ids if args.collapse_ids is not None else \
+        Options.COLLAPSE_IDS
+    Options.COLLAPSE_KEYS = args.collapse_keys if args.collapse_keys is not None else \
+        Options.COLLAPSE_KEYS
+    Options.STATS = args.stats
+    Options.TOP_K = args.top_k if args.top_k else Options.TOP_K
+    Options.MAX_DEPTH = args.max_depth if args.max_depth else Options.MAX_DEPTH
+    Options.MAX_NODES = args.max_nodes if args.max_nodes else Options.MAX_NODES
+    Options.TIME_BUDGET = args.time_budget if args.time_budget else Options.TIME_BUDGET
+
+def load_input_args(args):
+    """Sub-function of load_config(). Verifies the input arguments file, url, urls, dir
+    and serve"""
+    if args.serve:
+        Options.INTERACTIVE = False
+        Options.SERVE = args.serve
+        Options.MAX_BODY = args.max_body
+        Options.FILE = Options.URL = None
+    elif args.urls:
+        Options.INTERACTIVE = False
+        Options.URLS = load_url_list(args.urls)
+        Options.FILE = Options.URL = None
+    elif args.dir:
+        Options.INTERACTIVE = False
+        Options.FILES = find_files(args.dir)
+        if not Options.FILES:
+            sys.exit(f"Error: No json files in {args.dir}. Exiting...")
+        Options.FILE = Options.URL = Options.HEADERS = None
+    elif args.file or args.url:
+        Options.INTERACTIVE = False
+        if args.file:
+            # Verification filename or path
+            Options.FILE = get_input(RE_FILE, args.file)
+            if not Options.FILE:
+                sys.exit("Error: Not a valid input file. Exiting...")
+            Options.URL = None
+            Options.HEADERS = None
+        elif args.url:
+            # Verification url
+            Options.URL = get_input(RE_URL, args.url)
+            if not Options.URL:
+                sys.exit("Error: Not a valid url. Exiting...")
+            Options.FILE = None
+    elif args.file and args.url:
+        sys.exit("Error: You can either load a local json file or a remote one.")
+
+def load_url_list(file: str):
+    """Reads the urls for '--urls'. One url per line, optionally followed by its
+    own headers like "{'key': 'value'}". Empty lines and lines starting with '#'
+    are skipped.
+
+    Return:
+        list: (url, headers or None) tuples"""
+    try:
+        with open(file, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except (FileNotFoundError, UnicodeDecodeError):
+        sys.exit(f"Error: Can't read url list {file}")
+    urls = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        url, _, headers = line.partition(" ")
+        if not re.match(RE_URL[2], url):
+            sys.exit(f"Error: Not a valid url in line {number} of {file}. Exiting...")
+        try:
+            headers = literal_eval(headers.strip()) if headers.strip() else None
+        except (ValueError, SyntaxError):
+            headers = None
+        if headers is not None and not isinstance(headers, dict):
+            sys.exit(f"Error: Invalid headers in line {number} of {file}. Exiting...")
+        urls.append((url, headers))
+    return urls
+
 def parse_args():
     """Loader for commanline arguments. Returns args."""
     parser = argparse.ArgumentParser(description="Get a summary of a local or remote json file.")
@@ -448,19 +372,47 @@ def parse_args():
     parser.add_argument("-i", "--interactive", action="store_true", default="true",
                         help="Interactive version with user input. Default choice.")
     parser.add_argument("-f", "--file", type=str, default=None,
-                        help="Enter the filename or path to a json file. Requires '--output." +
+                        help="Enter the filename or path to a json file. Compressed .gz, .bz2, " +
+                        ".xz and .zst files are read directly. Requires '--output." +
                         "Overrides interactive version.")
     parser.add_argument("-u", "--url", type=str, default=None,
                         help="Enter the url to a json file. Requires '--output'." +
                         "Overrides interactive version.\n" \
                         "If your API key is part of the url, you can include it." + 
                         "Otherwise use '--header' for header-data.")
+    parser.add_argument("-U", "--urls", type=str, default=None,
+                        help="Enter a file with one url per line to summarize them all. Each " +
+                        "url can be followed by its own headers in the format of '--header'. " +
+                        "Writes a table per url and a report with the timings to '--output'.")
+    parser.add_argument("-B", "--dir", type=str, default=None,
+                        help="Enter a directory or a glob pattern like 'drops/**/*.json' to " +
+                        "summarize all its json files. Writes a table per file and an index " +
+                        "with size, nodes, time and errors to '--output'. Files are spread " +
+                        "over '--jobs' processes.")
+    parser.add_argument("--serve", type=str, nargs="?", const="127.0.0.1:8080", default=None,
+                        metavar="ADDRESS",
+                        help="Run a server that summarizes json bodies, files and urls over " +
+                        "HTTP on 'host:port' or a Unix socket path. The other options are the " +
+                        "defaults of every request. Default: '127.0.0.1:8080'")
+    parser.add_argument("--max-body", type=int, default=64 * 1024 * 1024,
+                        help="Largest request body of '--serve' in bytes. Default: 64 MB")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Number of parallel requests for '--urls'. Default: 8")
+    parser.add_argument("-P", "--paginate", action="store_true", default=False,
+                        help="Follow the next links or cursors of '--url' and summarize the " +
+                        "records of all pages as one array.")
+    parser.add_argument("--max-pages", type=int, default=None,
+                        help="Stop '--paginate' after n pages. Default: no limit")
+    parser.add_argument("--max-records", type=int, default=None,
+                        help="Stop '--paginate' after n records. Default: no limit")
+    parser.add_argument("--cursor-param", type=str, default=None,
+                        help="Query parameter for cursors of the next page. Default: 'cursor'")
     parser.add_argument("-H", "--header", type=str, default=None,
                         help="Enter HTTP headers in the format \"{ 'key1': 'value1'," +
                         "'key2': 'value2', ...}\"")
     parser.add_argument("-o", "--output", type=str, default=None,
                         help="Enter the filename or path your output file. Allowed formats are" +
-                        ".txt, .csv and .md. Required by '--file' and '--url'.")
+                        ".txt, .csv, .md and .json. Required by '--file' and '--url'.")
     # Optional arguments
     parser.add_argument("-d","--delimiter", type=str, default=None, help="Change the csv delimiter")
     parser.add_argument("-A", "--array", type=str, default=None,
@@ -469,6 +421,8 @@ def parse_args():
                         help="Change the symbol for arrays. Default: '[*]'")
     parser.add_argument("-O", "--object", type=str, default=None,
                         help="Change the symbol for object. Default: '{}'")
+    parser.add_argument("-K", "--anykey", type=str, default=None,
+                        help="Change the symbol for collapsed object keys. Default: '{*}'")
     parser.add_argument("-I", "--indent", type=str, default=None,
                         help="Change the type of indent. Default: '  '")
     parser.add_argument("-M", "--mask", type=int, default=None,
@@ -482,305 +436,192 @@ def parse_args():
                         "enter 'password' to mask that entry.")
     parser.add_argument("-t", "--timeout", type=float, default=None,
                         help="Add a custom timeout for http requests")
+    parser.add_argument("-S", "--stream", action="store_true", default=False,
+                        help="Parse the input file or the response of '--url' in chunks " +
+                        "instead of loading it completely. Keeps memory low for huge " +
+                        "files and API exports. Requires 'ijson'.")
+    parser.add_argument("--detect", type=str, nargs="*", default=None, choices=EXTRA_TYPES,
+                        help="Detect extra string types besides date, date-time and time.")
+    parser.add_argument("--shape-cache", type=int, default=None,
+                        help="Number of cached object shapes for repeated records. Default: 1024." +
+                        "Set 0 to disable the cache.")
+    parser.add_argument("--collapse-ids", type=int, default=None,
+                        help="Collapse the keys of an object path into '{*}' once it has more " +
+                        "keys that look like ids, numbers, dates or hashes. Default: 8. " +
+                        "Set 0 to disable.")
+    parser.add_argument("--collapse-keys", type=int, default=None,
+                        help="Collapse all keys of an object path into '{*}' once it has more " +
+                        "keys. Default: 1000. Set 0 to disable.")
+    parser.add_argument("--stats", action="store_true", default=False,
+                        help="Add statistics of the values of every path: distinct values, " +
+                        "min, max, mean and standard deviation of numbers, string lengths and " +
+                        "the most frequent values. Memory per path stays fixed.")
+    parser.add_argument("--top-k", type=int, default=None,
+                        help="Number of most frequent values per path for '--stats'. Default: 3")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="Don't walk arrays and objects deeper than this level. They are " +
+                        "marked as 'truncated'. The root is level 1.")
+    parser.add_argument("--max-nodes", type=int, default=None,
+                        help="Stop the walk after this many nodes and summarize the part " +
+                        "before. Walks in a single process.")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="Stop the walk after this many seconds and summarize the part " +
+                        "before. Walks in a single process.")
+    parser.add_argument("-s", "--sample", type=parse_sample, default=None,
+                        help="Summarize large arrays from a random sample. Enter a fraction " +
+                        "('0.1' or '10%%'), a number of items per array ('1000') or a time " +
+                        "budget ('30s'). Counts become estimates.")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of processes for the top-level array or the files of " +
+                        "'--dir'. Set 0 for all cores. Not used with '--stream'. Default: 1")
+    parser.add_argument("-L", "--ndjson", action="store_true", default=False,
+                        help="Read the input file as JSON Lines with one json value per line." +
+                        "Detected automatically for .ndjson and .jsonl files.")
+    parser.add_argument("--parser", type=str, default="auto", choices=PARSERS,
+                        help="Json decoder. 'auto' takes the fastest installed one of " +
+                        "orjson, ujson and simdjson, else the json module. Default: 'auto'")
+    parser.add_argument("--no-cache", action="store_true", default=False,
+                        help="Always load and walk '--file' and '--url' instead of taking " +
+                        "the summary of the last run while the input didn't change.")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help="Directory of the summary cache. Default: '~/.cache/jsummary'")
+    parser.add_argument("--cache-size", type=int, default=None,
+                        help="Most MB of all cached summaries. The least recently used ones " +
+                        "get removed first. Default: 256")
+    parser.add_argument("--profile", type=str, default=None,
+                        help="Write wall and CPU time, peak memory and counts of every phase " +
+                        "as json report to this file. Slows the run down.")
+    parser.add_argument("--profile-walk", type=str, default=None,
+                        help="Write a cProfile dump of the tree walk to this file. " +
+                        "Requires '--profile'.")
     parser.add_argument("-D", "--debug", action="store_true", default=False,
                         help="Enable debug comments. Not fully implemented yet.")
     return parser.parse_args()
 
-def load_from_file(file: str):
-    """Loads and parses a local json file
-
-    Args:
-        file - str: String with filename or path
-    Return:
-        jsn: Json decoded object.
-    Handles FILENOTFOUND and JSONDecodeError with sys.exit()"""
-    if os.name != "nt":
-        file = file.replace("\\","/")
-    try:
-        with open(file, "r", encoding="utf-8") as f:
-            jsn = f.read()
-            print("Success: File loaded")
-    except FileNotFoundError:
-        sys.exit(f"File not found in {file}")
-    try:
-        jsn = json.loads(jsn)
-        print("Success: JSON decoded from file")
-    except json.JSONDecodeError:
-        sys.exit("Error: Couldn't parse json file")
-
-    return jsn
-
-def load_from_url(url):
-    """HTTP request and json decoding
-
-    Args:
-        url - str: String with url
-    Return:
-        jsn: Json decoded object
-    Handles HTTPError, ConnectionError, ConnectTimeout, ReadTimeout and 
-    JSONDecodeError with None return -> sys.exit() in main()"""
-    try:
-        req = requests.get(url, headers = Options.HEADERS, timeout=Options.REQUEST_TIMEOUT)
-        if req.status_code != 200:
-            print(f"Error: Status {req.status_code}")
-            return None
-
-        print(f"Sucess: Loading Data from {Options.URL}")
-
-    except requests.HTTPError as e:
-        print(f"Error: {e.args[0]}")
-        return None
-    except (requests.ConnectTimeout, requests.ConnectionError, requests.ReadTimeout):
-        print(f"Error: Timeout from {Options.URL}." +
-              "Curent settin is {Options.REQUEST_TIMEOUT} seconds.\n" +
-              "Maybe try to increase '--timeout' in the commandline options.")
-        sys.exit("Exiting...")
-
-    try:
-        print("Success: Parsing json data")
-        return req.json()
-    except json.JSONDecodeError:
-        print("Error: Couldn't parse json file\n")
-        return None
-
-def get_json_tree(data, path=""):
-    """Recursion through JSON structure
-
-    Args:
-        data: Initially a json object. Later any type that is inside the jason values.
-        path - str: Empty string in the beginng. Later a concacatinated path-structure
-    Return:
-        None: Function is only updating the Options.TREE dict"""
-
-    Options.CNT += 1
-    # Step 1. Preparing the input path
-    dot = "." if path else ""
-    current_type = type(data).__name__
-    if isinstance(data, str):
-        current_type = check_date_time(data)
-    else:
-        current_type = adjust_json_type(current_type)
-
-    parent, path_parent = get_parent(path)
-
-    # Lists / Arrays
-    if isinstance(data, list):
-        Options.TREE[path + dot + Options.SYMBOL_ARRAY] = {"type": current_type,
-                                                    "size": len(data), "parent": parent}
-        process_list_items(data, path, path_parent, dot)
-
-    # Dicts / Json objects
-    elif isinstance(data, dict):
-        Options.TREE[path + dot + Options.SYMBOL_OBJECT] = {"type": current_type,
-                                                    "size": len(data), "parent": parent}
-        for k,v in data.items():
-            get_json_tree(v, f"{path}{dot}{k}")
-
-    # Endpoints / Leafs with actual data
-    else:
-        # Process and count existing entries
-        if Options.TREE.get(path):
-
-            count_items(path, current_type, data, parent)
-
-        # Process new entries
+def summarize_urls():
+    """Fetches all Options.URLS concurrently and summarizes each response as it
+    arrives. Outputs a table per url and a report with status and timing."""
+    # requests is only imported for urls
+    from fetch import fetch_all # pylint: disable=import-outside-toplevel
+    report = {}
+    size = 0
+    start = time.perf_counter()
+    summarizer = Summarizer.from_options()
+    for resp in fetch_all(Options.URLS, Options.WORKERS, Options.HEADERS,
+                          Options.REQUEST_TIMEOUT, get_decoder(Options.PARSER).loads):
+        if resp.error:
+            print(f"Error: {resp.url} {resp.error}")
         else:
-            count_items(path, current_type, data, parent)
-
-def count_items(path, item_type, content, parent):
-    """Sub-function of get_json_tree() handling the counting logic
-    
-    Args:
-        path - str: curren path of the recursion. Is key for Options.TREE
-        item_type - str: Current dataype in the pipeline
-        content: Current value of the json object
-        parent str: Name of the parent object
-    Return:
-        None: Updates Options.TREE dict  
-    """
-    # Path exists in Tree
-
-    if Options.TREE.get(path, None) and Options.TREE[path].get("type") not in ["array", "object"]:
-        Options.TREE[path]["count"] += 1 # Add 1 to tree
-        # Current Type matches existing type
-        if Options.TREE[path]["type"] == item_type:
-            if Options.ITEMS_COUNT.get(item_type, None):
-                Options.ITEMS_COUNT[item_type] += 1 # Add 1 to item_count
-            else:
-                Options.ITEMS_COUNT[item_type] = 1  # Or create
-        else:
-            # type is different
-            old_type = Options.TREE[path]["type"]
-            old_example = Options.TREE[path]["example"]
-            # Only change type and example if it was "null"
-            Options.TREE[path]["type"] = item_type if old_type == "null" else old_type
-            Options.TREE[path]["example"] = content if old_type == "null" else old_example
-            Options.TREE[path]["consistent"] = False # Switch misex to true in any case
-            # Item-count exists
-            if Options.ITEMS_COUNT.get(item_type):
-                Options.ITEMS_COUNT[item_type] += 1 # add 1
-            else:
-                Options.ITEMS_COUNT[item_type] = 1 # create new item
-    else:
-        Options.TREE[path] = {"type": item_type, "count":  1,
-                              "example": content, "parent": parent, "consistent": True}
-        if not Options.ITEMS_COUNT.get(item_type, None):
-            Options.ITEMS_COUNT[item_type] = 1
+            print(f"Success: Loading Data from {resp.url}")
+        report[resp.index] = summarize_response(summarizer, resp)
+        size += resp.size or 0
+    table = [["#", "URL", "STATUS", "FETCH", "SUMMARY", "BYTES", "PATHS", "ITEMS", "OUTPUT"]]
+    table += [report[index] for index in sorted(report)]
+    table.append(["Total:", f"{len(report):,d} urls", None,
+                  f"{time.perf_counter() - start:.3f}", None,
+                  f"{size:,d}", None, None, None])
+    print(f"\nSucess: Outputting report to {Options.OUTPUT}\n")
+    output(table)
+
+def summarize_response(summarizer, resp):
+    """Sub-function of summarize_urls(). Summarizes a fetch.Response with
+    summarizer and returns its row for the report"""
+    row = [resp.index + 1, resp.url, resp.status, f"{resp.seconds:.3f}"]
+    size = f"{resp.size:,d}" if resp.size is not None else None
+    if resp.error or not resp.data:
+        return row + [None, size, None, None, resp.error or "Empty json"]
+    start = time.perf_counter()
+    summary = summarizer.summarize(resp.data)
+    target = output_numbered(summary.table, resp.index + 1, resp.url)
+    return row + [f"{time.perf_counter() - start:.3f}", size, len(summary.tree),
+                  format_count(sum(summary.items_count.values())), target]
+
+def summarize_files():
+    """Summarizes all Options.FILES in '--jobs' processes. Outputs a table per
+    file as soon as it is done and an index with size, counts, timing and errors."""
+    index = {}
+    start = time.perf_counter()
+    width = max(3, len(str(len(Options.FILES))))
+    for result in summarize_batch(Options.FILES, Summarizer.from_options(), Options.JOBS):
+        target = None
+        if result.error:
+            print(f"Error: {result.file} {result.error}")
         else:
-            Options.ITEMS_COUNT[item_type] += 1
+            target = output_numbered(result.table, result.index + 1, result.file, width)
+        index[result.index] = [
+            result.index + 1, result.file,
+            f"{result.size:,d}" if result.size is not None else None,
+            f"{result.nodes:,d}" if result.nodes is not None else None,
+            f"{result.paths:,d}" if result.paths is not None else None,
+            format_count(result.items) if result.items is not None else None,
+            f"{result.seconds:.3f}", result.error, target]
+    errors = sum(1 for row in index.values() if row[7])
+    table = [["#", "FILE", "BYTES", "NODES", "PATHS", "ITEMS", "SUMMARY", "ERROR", "OUTPUT"]]
+    table += [index[number] for number in sorted(index)]
+    table.append(["Total:", f"{len(index):,d} files", None, None, None, None,
+                  f"{time.perf_counter() - start:.3f}", f"{errors:,d} errors", None])
+    print(f"\nSucess: Outputting index to {Options.OUTPUT}\n")
+    output(table)
+
+def output_numbered(table, number: int, title: str, width=3):
+    """Outputs the table of a single input of '--urls' or '--dir'. Files get
+    the number after the name of Options.OUTPUT, the screen gets title.
 
-def list_json(tree):
-    """Creates an aggregated list of dicts from the Options.TREE dict
-
-    Args:
-        tree - dict: The Options.TREE dict
     Return:
-        json_summary - list: Contains the aggregated values"""
-    json_summary = []
-    # Note: Enumerate requires k and v in brackets
-    for k, v in tree.items():
-        elements = k.count(".")
-        elements += 1 if k.count("[") > 1 else 0
-        if v.get("size"):
-            if v.get("type") == "list":
-                symbol = Options.SYMBOL_ARRAY
-            else:
-                symbol = Options.SYMBOL_OBJECT
-            json_summary.append({"name": k, "type": v["type"], "symbol": symbol,
-                                 "size": v["size"], "parent": v["parent"]})
-        else:
-            elements += 1
-            example = v.get("example", None)
-            count = v.get("count", None)
-            json_summary.append({"name": k, "type": v["type"],
-                                 "consistent": v.get("consistent", None),
-                                 "count": count, "example": example, "parent": v["parent"]})
-    return json_summary
-
-def get_summary_table(json_summary):
-    """Creates the final summary table for csv or tabulate2 output
-    
-    Args:
-        json_summary - list: The list of dicts created in reduce_json()
-    Return:
-        table - list: List from json_summary and Options.ITEM_COUNT
-        
-    Note that all the modifications INDENT, MASK, TRIM and REDACTED are handled here"""
-
-    table = []
-    header = ["NAME", "TYPE", "SIZE", "COUNT", "EXAMPLE", "CONSITENT", "PARENT"]
-    table.append(header)
-    sum_item_count = 0
-    secondary_itemcount = {}
-    is_consistent = True
-    for entry in json_summary:
-        name = entry.get("name")
-        # Indent, if output is not csv
-        name = Options.INDENT * name.count(".") + name
-        entry_type = entry.get("type", "")
-        size = entry.get("size", 0)
-        count = entry.get("count", 0)
-
-        # double checking
-        if count is None:
-            count = 0
-        if size is None:
-            size = 0
-
-        example = entry.get("example", "N/A")
-        # Masking, trimming and redacting of example cell
-        if entry_type == "string":
-            example = example.replace("\n","\\n")
-            if Options.REDACTED:
-                key = name.split(".")[-1]
-                if example and key in Options.REDACTED:
-                    example = "*" * len(example)
-            if example:
-                example = "*" * Options.MASK + example[Options.MASK:Options.TRIM] + (""
-                            "..." if len(example) > Options.TRIM - (len(example) ) else "")
-
-        consistent = entry.get("consistent", None)
-
-        # Add row items count to secondary counter
-        if count:
-            if secondary_itemcount.get(entry_type):
-                secondary_itemcount[entry_type] += count
-            else:
-                secondary_itemcount[entry_type] = count
-        # create a marker for consistency check
-        if not consistent and entry_type not in ["array", "object"]:
-            is_consistent = False
-
-        # Second counter for verification of Options.ITEMS_COUNT
-        if isinstance(count, int):
-            sum_item_count += count
-
-        row = [name, entry_type, f"{size:,d}" if size > 0 else None,
-               f"{count:,d}" if count > 0 else None, example, consistent,
-               entry.get("parent", None)]
-        table.append(row)
-
-    # Append statistics to the table
-    table = table_statistics(table, is_consistent, sum_item_count, secondary_itemcount)
-
-    return table
-
-def output(table):
-    """Route to different output methods"""
-
-    match Options.OUTPUT:
-        case c if Options.OUTPUT.endswith(".csv"):
-            output_csv(table)
-        case c if Options.OUTPUT.endswith(".md"):
-            output_text(table, TBLFMT_MD)
-        case c if Options.OUTPUT.endswith(".txt"):
-            output_text(table, TBLFMT_TXT)
+        str: The target of the table"""
+    target = Options.OUTPUT
+    if target == "screen":
+        print(f"\n{title}\n")
+    else:
+        stem, ext = os.path.splitext(Options.OUTPUT)
+        target = f"{stem}_{number:0{width}d}{ext}"
+    output(table, target)
+    return target
+
+def output(table, target=None):
+    """Route to different output methods. Default target is Options.OUTPUT"""
+    target = target or Options.OUTPUT
+    match target:
+        case c if target.endswith(".csv"):
+            output_csv(table, target)
+        case c if target.endswith(".md"):
+            output_text(table, TBLFMT_MD, target)
+        case c if target.endswith(".txt"):
+            output_text(table, TBLFMT_TXT, target)
+        case c if target.endswith(".json"):
+            output_json(table, target)
         case _:
-            print(tabulate(table, headers="firstrow",
-                           tablefmt=TBLFMT_SCREEN, preserve_whitespace=True))
+            write_text(table, sys.stdout, TBLFMT_SCREEN)
+            print()
     debug(c)
 
-def output_csv(table):
+def output_csv(table, target=None):
     """Output table to as csv file or exit on any exception"""
 
     try:
-        with open(Options.OUTPUT, "w", encoding="utf-8") as file:
-            writer = csv.writer(file, delimiter=Options.CSV_DELIMITER)
-            for row in table:
-                writer.writerow(row)
+        with open(target or Options.OUTPUT, "w", encoding="utf-8") as file:
+            write_csv(table, file, Options.CSV_DELIMITER)
         print("Success: Writing csv file")
     except (PermissionError, OSError) as e:
         sys.exit(e)
 
-def output_text(table, formatting):
+def output_text(table, formatting, target=None):
     """Output table to as txt or md file or exit on any exception"""
     try:
-        with open(Options.OUTPUT, "w", encoding="utf-8") as file:
-            for row in tabulate(table, headers="firstrow",
-                                tablefmt=formatting, preserve_whitespace=True):
-                file.write(row)
+        with open(target or Options.OUTPUT, "w", encoding="utf-8") as file:
+            write_text(table, file, formatting)
         print("Success: Writing file")
     except (PermissionError, OSError) as e:
         sys.exit(e)
 
-# Info
-
-
-def debug(*args):
-    """Print debug messages if a global variable 'DEBUG' is true.
-    
-    Args:
-        *args
-    Side effects:
-        'DEBUG: arg[0] --- arg[...] --- arg[n] :::END'
-    Return:
-        None"""
-    if Options.is_debug():
-        print("DEBUG: ", end="")
-        for a in args:
-
-            print(a, end=" --- ")
-        print("   :::End")
+def output_json(table, target=None):
+    """Output table as json file with an object per row or exit on any exception"""
+    try:
+        with open(target or Options.OUTPUT, "w", encoding="utf-8") as file:
+            write_json(table, file)
+        print("Success: Writing json file")
+    except (PermissionError, OSError) as e:
+        sys.exit(e)
 
 if __name__ == "__main__":
     main()
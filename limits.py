@@ -0,0 +1,67 @@
+"""Limits of the tree walk for jsummary
+
+'--max-depth', '--max-nodes' and '--time-budget' cap the work of a walk. The depth
+is checked at every array and object. Arrays and objects nested deeper than the
+limit are recorded with their type and size, but not walked. Nodes and time are
+counted at every value, plain arrays and objects in slices that fit into the
+limits. Once one is hit, the walk stops and the summary is made from what was seen.
+Either way the arrays and objects that weren't walked completely are marked as
+truncated in Options.TREE."""
+import time
+
+# Reasons of truncated paths
+DEPTH = "depth"
+NODES = "nodes"
+TIME = "time"
+
+
+class Limits:
+    """Checks the limits of a walk
+
+    Args:
+        max_depth - int: Deepest level of arrays and objects that gets walked. 0 for no limit.
+        max_nodes - int: Number of values after which the walk stops. 0 for no limit.
+        seconds - float: Time budget of the walk. 0 for no limit.
+    Variables:
+        counting - bool: True with a node or time limit. Every value has to be counted then.
+        nodes - int: Number of values walked so far, plain values included
+        deadline - float: End of the time budget. Starts with the first count.
+        stopped - str: NODES or TIME once the walk has to stop. None before.
+    """
+    def __init__(self, max_depth=0, max_nodes=0, seconds=0):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.seconds = seconds
+        self.counting = bool(max_nodes or seconds)
+        self.nodes = 0
+        self.deadline = None
+        self.stopped = None
+
+    def check(self, level: int):
+        """Reason not to walk an array or object at level. None if it can be walked."""
+        if self.max_depth and level > self.max_depth:
+            return DEPTH
+        return self.stopped
+
+    def count(self, nodes=1):
+        """Counts nodes more walked values. Reason to stop the walk before them,
+        None while they fit into the limits."""
+        if self.stopped is None:
+            if self.max_nodes and self.nodes + nodes > self.max_nodes:
+                self.stopped = NODES
+            elif self.seconds and self.expired():
+                self.stopped = TIME
+            else:
+                self.nodes += nodes
+        return self.stopped
+
+    def allowed(self, nodes: int):
+        """How many of nodes more values fit into the node limit"""
+        return max(min(nodes, self.max_nodes - self.nodes), 0) if self.max_nodes else nodes
+
+    def expired(self):
+        """True once the time budget is used up"""
+        now = time.perf_counter()
+        if self.deadline is None:
+            self.deadline = now + self.seconds
+        return now >= self.deadline
@@ -0,0 +1,200 @@
+"""Options of jsummary
+
+Options holds the settings and results of a summary. Every thread has its own
+values, so summaries can run side by side in threads (see summarizer.Summarizer).
+The class attributes are the defaults of every thread."""
+# The attributes of Options are upper case like constants
+# pylint: disable=invalid-name
+import threading
+from collections import OrderedDict
+from detectors import StringTypes
+from limits import Limits
+from pathtrie import Collapse, PathTrie
+from sampling import Sampler
+
+
+# Datacontainer
+class ThreadOptions(threading.local): # pylint: disable=too-many-instance-attributes
+    """Data container for json summary. Use the instance Options.
+    
+    Variables:
+        INTERACTIVE - bool: Indicator if user input is needed and if the commandline 
+                        prompt will get printed at the end of the program
+        FILE - str: Stores the filename or path of the json file. 
+                    Gets set to none if input is a url.
+        URL - str: Same as FILE but for url.
+        URLS - list: (url, headers) of all urls from '--urls'. None for a single input.
+        WORKERS - int: Number of parallel requests for URLS
+        FILES - list: Paths of all files from '--dir'. None for a single input.
+        SERVE - str: Address of '--serve', 'host:port' or a Unix socket. None for no server.
+        MAX_BODY - int: Largest request body of SERVE in bytes
+        PAGINATE - bool: Follow the next links of URL and summarize all pages
+        MAX_PAGES - int: Maximum number of pages. 0 for no limit.
+        MAX_RECORDS - int: Maximum number of records from all pages. 0 for no limit.
+        CURSOR_PARAM - str: Query parameter for cursors of the next page
+        NOTES - list: (level, message) rows for the end of the summary table
+        HEADERS - dict: Stores HTTP Headers. Can be extended via
+                        user input or commandline arguments.
+        OUTPUT - str: Stores the output name or path for the output file.
+                        Default is 'screen' for CLI output.
+        TREE - PathTrie: Trie of all json paths filled by get_json_tree().
+        ITEMS_COUNT - dict: Container for precise counting of json values
+                    (number, string, boolean, null). Note that strings will be 
+                    separated into string, date, date-time and time. 
+        CNT - int: Number of walked json nodes
+        STREAM - bool: Parse the input file incrementally with ijson instead
+                    of loading it completely into memory.
+        CHUNK_SIZE - int: Number of bytes read per chunk in streaming mode.
+        DETECT - list: Extra string types to detect (see detectors.EXTRA_TYPES)
+        DETECTOR - StringTypes: Detector engine for string values
+        SHAPE_CACHE - int: Maximum number of cached object shapes. 0 disables the cache.
+        STATS - bool: Keep statistics of the values of every path (see stats.PathStats)
+        TOP_K - int: Number of most frequent values shown per path with STATS
+        SHAPES - OrderedDict: Cache of object shapes, least recently used first
+        SYMBOL_KEY - str: Wildcard segment of collapsed object keys
+        COLLAPSE_IDS - int: Collapse the keys of a path that look like ids, numbers,
+                    dates or hashes once it has more of them. 0 disables it.
+        COLLAPSE_KEYS - int: Collapse all keys of a path once it has more. 0 disables it.
+        MAX_DEPTH - int: Deepest level of arrays and objects that gets walked. 0 for no limit.
+        MAX_NODES - int: Stop the walk after this many nodes. 0 for no limit.
+        TIME_BUDGET - float: Stop the walk after this many seconds. 0 for no limit.
+        LIMITS - Limits: Checks the limits above. None without limits.
+        SAMPLE - Sample: Sampling of large arrays from '--sample'. None walks everything.
+        SAMPLER - Sampler: Draws the samples. None if SAMPLE is None.
+        JOBS - int: Number of processes for the top-level array. 1 walks serially.
+        JSON_LINES - bool: Read the input file as JSON Lines (NDJSON). Detected
+                    automatically for .ndjson and .jsonl files.
+        MALFORMED - int: Number of skipped lines that are no valid json
+        PARSER - str: Json decoder from '--parser' (see decoders.PARSERS)
+        PROFILE - str: File of the '--profile' report. None disables profiling.
+        PROFILER - profiler.Profile: Measures the phases if PROFILE is set
+        CACHE - str: Directory of the summary cache (see cache.py). None disables it.
+        CACHE_SIZE - int: Most bytes of all cached summaries together
+        CACHED - cache.Validators: Of the cached summary of the input. None without one.
+        VALIDATORS - cache.Validators: Of the input of this run for the cache. None if
+                    it can't be cached.
+        RETRIES - int: Invalid user inputs in a row
+        VERBOSE - bool: Print messages about the progress and skipped input
+    """
+    INTERACTIVE = True
+    FILE = None
+    URL = None
+    URLS = None
+    WORKERS = 8
+    FILES = None
+    SERVE = None
+    MAX_BODY = 64 * 1024 * 1024
+    PAGINATE = False
+    MAX_PAGES = 0
+    MAX_RECORDS = 0
+    CURSOR_PARAM = "cursor"
+    NOTES = []
+    HEADERS = {
+        "Accept": "application/json"
+    }
+    OUTPUT = "screen"
+    TREE = PathTrie()
+    ITEMS_COUNT = {}
+    SYMBOL_ARRAY = "[]"
+    SYMBOL_OBJECT = "{}"
+    SYMBOL_ARRAY_ITEM = "[*]"
+    SYMBOL_KEY = "{*}"
+    INDENT = "  "
+    MASK = 0
+    TRIM = 50 # set to -1 for full length
+    REDACTED = []
+    REQUEST_TIMEOUT = 5
+    CSV_DELIMITER = ","
+    CNT = 0
+    DEBUG = False
+    STREAM = False
+    CHUNK_SIZE = 64 * 1024
+    DETECT = []
+    DETECTOR = StringTypes()
+    SHAPE_CACHE = 1024
+    STATS = False
+    TOP_K = 3
+    SHAPES = OrderedDict()
+    COLLAPSE_IDS = 8
+    COLLAPSE_KEYS = 1000
+    MAX_DEPTH = 0
+    MAX_NODES = 0
+    TIME_BUDGET = 0
+    LIMITS = None
+    SAMPLE = None
+    SAMPLER = None
+    JOBS = 1
+    JSON_LINES = False
+    MALFORMED = 0
+    PARSER = "auto"
+    PROFILE = None
+    PROFILER = None
+    CACHE = None
+    CACHE_SIZE = 256 * 1024 * 1024
+    CACHED = None
+    VALIDATORS = None
+    RETRIES = 0
+    VERBOSE = True
+
+    def __init__(self):
+        super().__init__()
+        # Fresh copies of the mutable defaults for every thread
+        self.HEADERS = dict(ThreadOptions.HEADERS)
+        self.REDACTED = []
+        self.DETECT = []
+        self.reset()
+
+    def print_config(self):
+        """Prints configuration"""
+        if self.FILE:
+            print(f"FILE: {self.FILE}")
+        elif self.URLS:
+            print(f"URLS: {len(self.URLS)}")
+            print(f"HEADERS: {self.HEADERS}")
+        elif self.FILES:
+            print(f"FILES: {len(self.FILES)}")
+        elif self.SERVE:
+            print(f"SERVE: {self.SERVE}")
+        else:
+            print(f"URL: {self.URL}")
+            print(f"HEADERS: {self.HEADERS}")
+        print(f"OOUTPUT: {self.OUTPUT}\n")
+
+    def is_debug(self):
+        """Returns if programm is in debug mode"""
+        return self.DEBUG
+
+    def configure(self, settings: dict):
+        """Sets settings, a dict of attribute names and values, for this thread
+        and clears the results"""
+        for name, value in settings.items():
+            setattr(self, name, value)
+        self.reset()
+
+    def reset(self):
+        """Clears the results of a previous run"""
+        collapse = Collapse(self.SYMBOL_KEY, self.SYMBOL_OBJECT, self.COLLAPSE_IDS,
+                            self.COLLAPSE_KEYS) if self.COLLAPSE_IDS or self.COLLAPSE_KEYS else None
+        self.TREE = PathTrie(self.SYMBOL_ARRAY, self.SYMBOL_ARRAY_ITEM, collapse)
+        self.TREE.on_fold = self.folded
+        self.ITEMS_COUNT = {}
+        self.CNT = 0
+        self.MALFORMED = 0
+        self.NOTES = []
+        self.CACHED = None
+        self.VALIDATORS = None
+        self.DETECTOR = StringTypes(self.DETECT)
+        self.SHAPES = OrderedDict()
+        self.SAMPLER = Sampler(self.SAMPLE) if self.SAMPLE else None
+        self.LIMITS = Limits(self.MAX_DEPTH, self.MAX_NODES, self.TIME_BUDGET) if \
+            self.MAX_DEPTH or self.MAX_NODES or self.TIME_BUDGET else None
+
+    def folded(self, moved: dict):
+        """Called by TREE when it collapsed keys. Cached shapes and sampled arrays
+        of the moved nodes go to the nodes they were merged into."""
+        self.SHAPES.clear()
+        if self.SAMPLER:
+            self.SAMPLER.move(moved)
+
+
+Options = ThreadOptions()
@@ -0,0 +1,137 @@
+"""Pagination of jsummary
+
+Follows the next links or cursors of a paged endpoint. The records of all pages
+are summarized as one logical top-level array. The next page is fetched in the
+background while the current one is walked."""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from decoders import get_decoder
+from errors import SummaryError
+from fetch import fetch, make_session
+from options import Options
+from walker import find_array, get_json_tree, get_json_tree_around, open_array, walk
+
+# Keys holding the url of the next page
+NEXT_KEYS = ("next", "next_page", "nextPage", "next_url", "nextUrl")
+# Keys holding a cursor for the next page
+CURSOR_KEYS = ("next_cursor", "nextCursor", "cursor")
+# Objects in the page that can hold the keys above
+LINK_KEYS = ("links", "_links", "meta", "paging", "pagination")
+
+
+def next_url(resp):
+    """Url of the page after resp from the 'Link' header, a next link or a
+    cursor in the page. None on the last page."""
+    if resp.links and "next" in resp.links:
+        return urljoin(resp.url, resp.links["next"]["url"])
+    if not isinstance(resp.data, dict):
+        return None
+    places = [resp.data] + [resp.data[k] for k in LINK_KEYS if isinstance(resp.data.get(k), dict)]
+    for place in places:
+        for key in NEXT_KEYS + CURSOR_KEYS:
+            value = place.get(key)
+            if isinstance(value, dict):
+                # HAL style {"next": {"href": "..."}}
+                value = value.get("href")
+            if isinstance(value, bool) or value in (None, ""):
+                continue
+            if key in NEXT_KEYS and str(value).startswith(("http://", "https://", "/", "?")):
+                return urljoin(resp.url, value)
+            return with_cursor(resp.url, value)
+    return None
+
+def with_cursor(url: str, cursor):
+    """Returns url with the query parameter Options.CURSOR_PARAM set to cursor"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k != Options.CURSOR_PARAM]
+    query.append((Options.CURSOR_PARAM, str(cursor)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class Pager:
+    """Walks the records of all pages into the top-level array of the first page
+
+    Args:
+        submit: Starts fetch() of an url in the background. Returns the future.
+        first - fetch.Response: The first page
+        key: Key of the records in a page. None if the page is the array.
+    Variables:
+        pages - int: Number of walked pages
+        records - int: Number of walked records
+        stopped - str: Reason why pages are left, or None
+    """
+    def __init__(self, submit, first, key):
+        self.submit = submit
+        self.resp = first
+        self.key = key
+        self.pages = 0
+        self.records = 0
+        self.stopped = None
+        self.visited = {first.url}
+
+    def prefetch(self):
+        """Starts fetching the page after the current one. Returns the future or None"""
+        url = next_url(self.resp)
+        if url is None:
+            return None
+        if url in self.visited:
+            self.stopped = f"Page {self.pages + 1} links to an earlier page"
+        elif Options.MAX_PAGES and self.pages >= Options.MAX_PAGES:
+            self.stopped = f"Stopped after {self.pages:,d} pages (--max-pages)"
+        elif Options.MAX_RECORDS and self.records >= Options.MAX_RECORDS:
+            self.stopped = f"Stopped after {self.records:,d} records (--max-records)"
+        if self.stopped:
+            return None
+        self.visited.add(url)
+        return self.submit(url, None, Options.REQUEST_TIMEOUT)
+
+    def walk_pages(self, items, array, weight):
+        """walk_items of get_json_tree_around(). Walks the records of the first
+        page and of all following pages into array."""
+        while True:
+            self.pages += 1
+            if Options.MAX_RECORDS:
+                items = items[:Options.MAX_RECORDS - self.records]
+            self.records += len(items)
+            upcoming = self.prefetch()
+            if Options.SAMPLER and len(items) > Options.SAMPLER.min_size:
+                items, weight = Options.SAMPLER.draw(array, items, 1)
+            walk(open_array(items, array, weight))
+            if upcoming is None:
+                break
+            self.resp = upcoming.result()
+            items = self.resp.data
+            if self.key is not None and isinstance(items, dict):
+                items = items.get(self.key)
+            if self.resp.error or not isinstance(items, list):
+                self.stopped = f"Page {self.pages + 1}: {self.resp.error or 'No records'}"
+                break
+            weight = 1
+        array.size = self.records
+
+
+def get_json_tree_paged(url: str):
+    """Paged counterpart of load_from_url() and get_json_tree()
+
+    Args:
+        url - str: Url of the first page
+    Return:
+        Pager: Result with the number of pages and records
+    Raises SummaryError if the first page can't be loaded."""
+    with make_session(1, Options.HEADERS) as session, \
+            ThreadPoolExecutor(max_workers=1) as pool:
+        loads = get_decoder(Options.PARSER).loads
+        first = fetch(session, url, None, Options.REQUEST_TIMEOUT, loads)
+        if first.error or not first.data:
+            raise SummaryError(f"Error: Can't load json data. {first.error or 'Empty json'}")
+        key, array = find_array(first.data)
+        submit = partial(pool.submit, partial(fetch, session, loads=loads))
+        pager = Pager(submit, first, key)
+        if array is None:
+            get_json_tree(first.data)
+            pager.pages = 1
+            return pager
+        get_json_tree_around(first.data, key, pager.walk_pages)
+        return pager
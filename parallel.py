@@ -0,0 +1,169 @@
+"""Parallel summary of jsummary
+
+The top-level array (the json root or the largest array directly inside the root
+object) or the lines of a JSON Lines file are split into chunks. A process pool
+builds a partial tree for each chunk and the partial trees get merged in the order
+of the chunks, so the result is the same as the one of a serial walk."""
+import os
+from files import compression, open_input
+from json_lines import get_json_lines_tree
+from options import Options
+from walker import find_array, get_json_tree, get_json_tree_around, merge_tree, open_array
+from walker import set_container, walk
+
+# Arrays with less items are walked serially
+PARALLEL_MIN = 10_000
+# JSON Lines files with less bytes are read serially
+PARALLEL_BYTES = 16 * 1024 * 1024
+# Chunks per process. More chunks balance uneven records better.
+CHUNKS_PER_JOB = 4
+# Options needed to walk a chunk in a spawned process
+SETTINGS = ("SYMBOL_ARRAY", "SYMBOL_OBJECT", "SYMBOL_ARRAY_ITEM", "SYMBOL_KEY", "TRIM",
+            "DETECT", "SHAPE_CACHE", "COLLAPSE_IDS", "COLLAPSE_KEYS", "MAX_DEPTH", "SAMPLE",
+            "STATS", "TOP_K", "CHUNK_SIZE", "PARSER")
+
+# Arrays of the forked workers by id(), one for every running walk_chunks()
+ARRAYS = {}
+
+
+def get_json_tree_parallel(data, jobs: int):
+    """Parallel counterpart of get_json_tree()
+
+    Args:
+        data: The json data
+        jobs - int: Number of processes
+    Return:
+        None: Updates Options.TREE, Options.ITEMS_COUNT and Options.CNT like
+              get_json_tree(). Small data is walked serially."""
+    key, array = find_array(data)
+    level = 1 if key is None else 2
+    if jobs < 2 or array is None or len(array) < PARALLEL_MIN or serial_limits(level):
+        get_json_tree(data)
+        return
+
+    path = [key, Options.SYMBOL_ARRAY] if key is not None else [Options.SYMBOL_ARRAY]
+    def walk_items(items, node, weight):
+        """Walks the items of the top-level array in chunks"""
+        if Options.SAMPLER and len(items) > Options.SAMPLER.min_size:
+            items, weight = Options.SAMPLER.draw(node, items, weight)
+        walk_chunks(items, path, weight, jobs)
+    get_json_tree_around(data, key, walk_items)
+
+def serial_limits(level: int):
+    """True if the limits of the walk need a single process. Nodes and time can't
+    be counted across processes, a top-level array at level beyond the depth
+    limit isn't walked at all."""
+    return bool(Options.MAX_NODES or Options.TIME_BUDGET or 0 < Options.MAX_DEPTH < level)
+
+def walk_chunks(array, path, weight, jobs):
+    """Sub-function of get_json_tree_parallel(). Summarizes the chunks of array
+    in a process pool and merges the partial summaries in order"""
+    size = -(-len(array) // (jobs * CHUNKS_PER_JOB))
+    bounds = [(start, min(start + size, len(array))) for start in range(0, len(array), size)]
+    settings = {name: getattr(Options, name) for name in SETTINGS}
+    import multiprocessing # pylint: disable=import-outside-toplevel
+    if "fork" in multiprocessing.get_all_start_methods():
+        # Forked workers share the array, so only the bounds get sent
+        context = multiprocessing.get_context("fork")
+        ARRAYS[id(array)] = array
+        tasks = [(path, start, (id(array), stop), weight) for start, stop in bounds]
+    else:
+        context = multiprocessing.get_context()
+        tasks = [(path, start, array[start:stop], weight) for start, stop in bounds]
+    try:
+        with context.Pool(jobs, init_worker, (settings,)) as pool:
+            for result in pool.imap(walk_chunk, tasks):
+                merge_chunk(*result)
+    finally:
+        ARRAYS.pop(id(array), None)
+
+def merge_chunk(tree, items_count, cnt, sampled):
+    """Sub-function of walk_chunks(). Merges the result of walk_chunk() into the Options"""
+    pairs = merge_tree(tree, items_count, cnt)
+    if Options.SAMPLER:
+        for index, (arrays, items, sampled_items) in sampled:
+            Options.SAMPLER.add(pairs[index][0], items, sampled_items, arrays)
+
+def init_worker(settings):
+    """Initializer of the worker processes. Takes over the options of the main process"""
+    for name, value in settings.items():
+        setattr(Options, name, value)
+
+def walk_chunk(task):
+    """Worker of walk_chunks(). Walks the items of a chunk as items of the array at path
+
+    Args:
+        task - tuple: Path of the array, start of the chunk, the chunk or the
+                    key in ARRAYS and its stop and the weight of the items
+    Return:
+        tuple: Partial tree, ITEMS_COUNT, CNT and sampled arrays as
+               (index in tree.records, [arrays, items, sampled items])"""
+    path, start, chunk, weight = task
+    if isinstance(chunk, tuple):
+        key, stop = chunk
+        chunk = ARRAYS[key][start:stop]
+    Options.reset()
+    if Options.SAMPLER:
+        # Every chunk draws different samples
+        Options.SAMPLER.random.seed(start)
+    tree = Options.TREE
+    node = tree.root
+    for segment in path:
+        node = tree.child(node, segment)
+    walk(open_array(chunk, node, weight), len(path))
+    return tree, Options.ITEMS_COUNT, Options.CNT, sampled_arrays()
+
+def sampled_arrays():
+    """Sampling stats of a worker as (index in Options.TREE.records, stats)"""
+    if not Options.SAMPLER:
+        return []
+    index = {record: i for i, record in enumerate(Options.TREE.records)}
+    return [(index[array], stats) for array, stats in Options.SAMPLER.arrays.items()]
+
+def get_json_lines_parallel(file: str, jobs: int):
+    """Parallel counterpart of json_lines.get_json_lines_tree()
+
+    Args:
+        file - str: Path of the JSON Lines file
+        jobs - int: Number of processes
+    Return:
+        int: Number of json values in the file. Small files are read serially.
+    Lines are split into chunks by their byte offset, so every process reads its
+    own part of the file. Compressed files can't be split and are read serially."""
+    Options.CNT += 1
+    size = os.path.getsize(file)
+    if jobs < 2 or size < PARALLEL_BYTES or compression(file) or serial_limits(1):
+        with open_input(file, Options.CHUNK_SIZE) as f:
+            return get_json_lines_tree(f).items
+
+    tree = Options.TREE
+    array = tree.child(tree.root, Options.SYMBOL_ARRAY)
+    set_container(array, "array", 0)
+    step = -(-size // (jobs * CHUNKS_PER_JOB))
+    tasks = [(file, start, min(start + step, size)) for start in range(0, size, step)]
+    settings = {name: getattr(Options, name) for name in SETTINGS}
+    items = 0
+    import multiprocessing # pylint: disable=import-outside-toplevel
+    with multiprocessing.Pool(jobs, init_worker, (settings,)) as pool:
+        for result, chunk_items, malformed in pool.imap(walk_lines, tasks):
+            merge_chunk(*result)
+            items += chunk_items
+            Options.MALFORMED += malformed
+    array.size = items
+    return items
+
+def walk_lines(task):
+    """Worker of get_json_lines_parallel(). Walks the lines of a byte range
+
+    Args:
+        task - tuple: File, start and stop of the byte range
+    Return:
+        tuple: Result like walk_chunk(), number of json values and malformed lines"""
+    file, start, stop = task
+    Options.reset()
+    if Options.SAMPLER:
+        Options.SAMPLER.random.seed(start)
+    with open(file, "rb", buffering=Options.CHUNK_SIZE) as f:
+        reader = get_json_lines_tree(f, start, stop)
+    return ((Options.TREE, Options.ITEMS_COUNT, Options.CNT, sampled_arrays()),
+            reader.items, reader.malformed)
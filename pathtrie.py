@@ -0,0 +1,418 @@
+"""Path trie of jsummary. Holds the summary of every distinct json path
+
+Objects used as maps, keyed by ids, dates or names instead of fixed fields, would
+add a path for every key and everything below it. With a Collapse setting the trie
+folds such keys into a single wildcard segment, so its size follows the schema and
+not the number of keys."""
+import re
+import sys
+from typing import NamedTuple
+
+# Keys that look like data instead of field names: numbers, dates and times, uuids,
+# hashes and ids with a short prefix like 'u101' or 'user_1234'
+RE_DYNAMIC_KEY = re.compile(r"[+-]?\d[\d\-:./TZ +]*"
+                            r"|[0-9a-fA-F]{8}(?:-?[0-9a-fA-F]{4}){3}-?[0-9a-fA-F]{12}"
+                            r"|[0-9a-fA-F]{16,}"
+                            r"|[A-Za-z_]{1,16}[-_:]?\d{3,}")
+
+
+class Collapse(NamedTuple):
+    """Setting of collapsing the keys of map-like objects into a wildcard
+
+    Variables:
+        symbol - str: Wildcard segment of the collapsed keys
+        symbol_object - str: Segment of objects, never collapsed
+        ids - int: Collapse the keys of a path looking like RE_DYNAMIC_KEY once it
+                   has more of them. 0 never does.
+        keys - int: Collapse all keys of a path once it has more. 0 never does.
+    """
+    symbol: str = "{*}"
+    symbol_object: str = "{}"
+    ids: int = 8
+    keys: int = 1000
+
+
+class PathNode: # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    """One segment of a json path and the summary of the values at that path
+
+    Variables:
+        segment - str: Interned key or symbol of the segment
+        up - PathNode: Node of the enclosing path. None for the root.
+        children - dict: Child nodes by segment. Values directly inside an
+                    array are stored under None. None until the first child.
+        dots - int: Number of dots in the path name. -1 while the name is empty.
+        anchor - str: Parent name for the children of this path
+        parent - str: Parent name of this path
+        type - str: Json type. None as long as nothing was recorded here.
+        count - int: Number of values (leafs only)
+        size - int: Size of the last array or object seen (containers only)
+        example: First value found (or first value after 'null')
+        length - int: Length of a trimmed string example before trimming
+        consistent - bool: False if there are values of mixed types (leafs only)
+        stats - stats.PathStats: Statistics of the values with '--stats' (leafs only)
+        keys - stats.Distinct: Distinct keys of a wildcard segment. None for others.
+        truncated - str: Limit that kept an array or object from being walked
+                    completely, see limits.py. None if it was.
+    """
+    __slots__ = ("segment", "up", "children", "dots", "anchor", "parent",
+                 "type", "count", "size", "example", "length", "consistent", "stats", "keys",
+                 "truncated")
+
+    def __init__(self, segment="", up=None, dots=-1, anchor="", parent=""):
+        self.segment = segment
+        self.up = up
+        self.children = None
+        self.dots = dots
+        self.anchor = anchor
+        self.parent = parent
+        self.type = None
+        self.count = None
+        self.size = None
+        self.example = None
+        self.length = None
+        self.consistent = None
+        self.stats = None
+        self.keys = None
+        self.truncated = None
+
+
+# Slots of PathNode without the links to other nodes
+STATE = ("segment", "dots", "anchor", "parent", "type", "count", "size", "example",
+         "length", "consistent", "stats", "keys", "truncated")
+
+
+class PathTrie: # pylint: disable=too-many-instance-attributes
+    """Trie of json paths with the summary records in order of appearance
+
+    Variables:
+        root - PathNode: Node of the empty root path
+        records - list: All nodes with a summary, in order of their first record
+        symbol_array - str: Segment of arrays. Segments containing it are
+                    skipped when looking for a parent name.
+        symbol_item - str: Segment for values directly inside an array. It is
+                    appended to the array path without a dot.
+        collapse - Collapse: Folding of map-like objects. None keeps every key.
+        maps - set: Nodes of which all keys get collapsed
+        folds - int: Number of folds so far. Nodes from before a fold may be gone.
+        on_fold: Called with {folded node: node it went into} after every fold
+    """
+    def __init__(self, symbol_array="[]", symbol_item="[*]", collapse=None):
+        self.root = PathNode()
+        self.records = []
+        self.symbol_array = symbol_array
+        self.symbol_item = symbol_item
+        self.collapse = collapse
+        self.maps = set()
+        self.folds = 0
+        self.on_fold = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def child(self, node: PathNode, segment: str):
+        """Returns the child of node for segment. Creates it if neccessary. Keys
+        collapsed by self.collapse return the wildcard child."""
+        if node.children is None:
+            node.children = {}
+        child = node.children.get(segment)
+        if child is None:
+            if self.collapse is not None:
+                child = self.collapse_key(node, segment)
+                if child is not None:
+                    return child
+            child = self.new_child(node, segment)
+        return child
+
+    def new_child(self, node: PathNode, segment: str):
+        """Creates the child of node for segment"""
+        segment = sys.intern(segment)
+        if node.dots < 0:
+            dots = segment.count(".") if segment else -1
+        else:
+            dots = node.dots + 1 + segment.count(".")
+        # Parent is the last segment before this one that is not an array or wildcard
+        parent = node.anchor
+        *names, last = segment.split(".")
+        for name in names:
+            if self.symbol_array not in name:
+                parent = name
+        wildcard = self.collapse is not None and last == self.collapse.symbol
+        anchor = parent if self.symbol_array in last or wildcard else last
+        child = node.children[segment] = PathNode(segment, node, dots, anchor,
+                                                  sys.intern(parent))
+        return child
+
+    def collapse_key(self, node: PathNode, segment: str):
+        """Sub-function of child(). Wildcard child of node if the new key segment
+        gets collapsed, else None
+
+        Id-like keys go to an existing wildcard. Once node has more id-like keys
+        than collapse.ids, or more keys at all than collapse.keys, they get folded."""
+        collapse = self.collapse
+        if segment in (collapse.symbol, collapse.symbol_object) or \
+                self.symbol_array in segment:
+            return None
+        children = node.children
+        dynamic = RE_DYNAMIC_KEY.fullmatch(segment) is not None
+        wildcard = children.get(collapse.symbol)
+        if wildcard is None or not (dynamic or node in self.maps):
+            if dynamic and collapse.ids and \
+                    sum(1 for key in children if key and RE_DYNAMIC_KEY.fullmatch(key)) >= \
+                    collapse.ids:
+                wildcard = self.fold(node, False)
+            elif collapse.keys and self.count_keys(node, wildcard) >= collapse.keys:
+                wildcard = self.fold(node, True)
+            else:
+                return None
+        wildcard.keys.add(segment)
+        return wildcard
+
+    def count_keys(self, node: PathNode, wildcard: PathNode):
+        """Number of keys of node, the collapsed ones included. Symbols are only
+        left out once there are enough keys to matter."""
+        count = len(node.children) + (wildcard.keys.count() if wildcard is not None else 0)
+        if count >= self.collapse.keys:
+            count -= len(node.children) - len(self.keys_of(node))
+        return count
+
+    def keys_of(self, node: PathNode):
+        """Key segments of the children of node, without symbols and the wildcard"""
+        symbols = (self.collapse.symbol, self.collapse.symbol_object)
+        return [key for key in node.children
+                if key is not None and key not in symbols and self.symbol_array not in key]
+
+    def fold(self, node: PathNode, everything: bool):
+        """Moves the id-like keys of node, or all its keys if everything is True,
+        and the paths below them into the wildcard child
+
+        Return:
+            PathNode: The wildcard child
+        The summaries are merged into the paths below the wildcard and the records
+        keep the order of their first appearance."""
+        # hashlib is only imported for collapsed keys
+        from stats import Distinct # pylint: disable=import-outside-toplevel
+        wildcard = node.children.get(self.collapse.symbol)
+        if wildcard is None:
+            wildcard = self.new_child(node, self.collapse.symbol)
+            wildcard.keys = Distinct()
+        if everything:
+            self.maps.add(node)
+        moved = {}
+        for key in self.keys_of(node):
+            if everything or RE_DYNAMIC_KEY.fullmatch(key):
+                wildcard.keys.add(key)
+                self.graft(node.children.pop(key), wildcard, moved)
+        if not moved:
+            return wildcard
+        seen = set()
+        records = [moved.get(record, record) for record in self.records]
+        self.records[:] = [record for record in records
+                           if not (record in seen or seen.add(record))]
+        self.folds += 1
+        if self.on_fold is not None:
+            self.on_fold(moved)
+        return wildcard
+
+    def graft(self, part: PathNode, target: PathNode, moved: dict):
+        """Sub-function of fold(). Merges part and the paths below it into target
+
+        Args:
+            part - PathNode: Node taken out of the trie
+            target - PathNode: Node of the same path below the wildcard
+            moved - dict: Gets target of every node below part by node"""
+        stack = [(part, target)]
+        while stack:
+            part, target = stack.pop()
+            moved[part] = target
+            if part.type is not None:
+                self.merge(target, part)
+            if part.keys is not None:
+                if target.keys is None:
+                    target.keys = part.keys
+                else:
+                    target.keys.merge(part.keys)
+            for key, child in reversed(list((part.children or {}).items())):
+                if key is None:
+                    linked = self.item(target)
+                else:
+                    if target.children is None:
+                        target.children = {}
+                    linked = target.children.get(key) or self.new_child(target, key)
+                stack.append((child, linked))
+
+    @staticmethod
+    def merge(node: PathNode, part: PathNode):
+        """Adds the summary of part, a node of the same path, to node. The values
+        of part count as later values, like in a serial walk. Doesn't touch records."""
+        node.truncated = node.truncated or part.truncated
+        if node.type is None or node.size is not None or part.size is not None:
+            # New paths take everything, the last array or object seen wins
+            node.type, node.count, node.size = part.type, part.count, part.size
+            node.example, node.length, node.consistent = part.example, part.length, part.consistent
+            node.stats = part.stats
+            return
+        node.count += part.count
+        if part.stats is not None:
+            if node.stats is None:
+                node.stats = part.stats
+            else:
+                node.stats.merge(part.stats)
+        node.consistent = node.consistent and part.consistent and node.type == part.type
+        # Only change type and example if it was "null"
+        if node.type == "null" and part.type != "null":
+            node.type = part.type
+            node.example, node.length = part.example, part.length
+
+    def item(self, node: PathNode):
+        """Returns the child for values directly inside the array of node"""
+        if node.children is None:
+            node.children = {}
+        child = node.children.get(None)
+        if child is None:
+            # Array values use the last segment of the path holding the array as parent
+            owner = node.up
+            parent = owner.segment.rsplit(".", 1)[-1] if owner and owner.dots > 0 else ""
+            dots = node.dots if node.dots >= 0 else self.symbol_item.count(".")
+            child = node.children[None] = PathNode(self.symbol_item, node, dots, "",
+                                                   sys.intern(parent))
+        return child
+
+    def name(self, node: PathNode, names=None):
+        """Returns the dotted path name of node
+
+        Args:
+            node - PathNode: Any node of the trie
+            names - dict: Optional cache of already known names by node"""
+        chain = []
+        while node.up is not None and not (names and node in names):
+            chain.append(node)
+            node = node.up
+        name = names[node] if node.up is not None else ""
+        for link in reversed(chain):
+            up = link.up
+            if up.dots >= 0 and up.children.get(None) is not link:
+                name += "."
+            name += link.segment
+            if names is not None:
+                names[link] = name
+        return name
+
+    def match(self, other):
+        """Pairs every record of another trie with the node of the same path in
+        this trie. Missing nodes get created. Keys collapsed in either trie go to
+        the wildcard, the collapsed keys of other are added to the ones of this trie.
+
+        Args:
+            other - PathTrie: Trie with the same symbols
+        Return:
+            list: (node, record of other) in the order of other.records"""
+        nodes = {other.root: self.root}
+        pairs = []
+        folds = self.folds
+        for record in other.records:
+            chain = []
+            link = record
+            while link not in nodes:
+                chain.append(link)
+                link = link.up
+            for link in reversed(chain):
+                up = nodes[link.up]
+                if link.up.children.get(None) is link:
+                    nodes[link] = self.item(up)
+                elif link.keys is not None and self.collapse is not None:
+                    # Collapse the same keys as other did
+                    nodes[link] = self.fold(up, link.up in other.maps)
+                else:
+                    nodes[link] = self.child(up, link.segment)
+                if link.keys is not None:
+                    if nodes[link].keys is None:
+                        nodes[link].keys = link.keys
+                    else:
+                        nodes[link].keys.merge(link.keys)
+            pairs.append((nodes[record], record))
+        if self.folds != folds:
+            # Nodes matched before a fold may have been moved below a wildcard
+            pairs = [(self.resolve(node), record) for node, record in pairs]
+        return pairs
+
+    def resolve(self, node: PathNode):
+        """Node of the path of node in this trie. node itself unless it was folded."""
+        path = []
+        while node.up is not None:
+            path.append(node)
+            node = node.up
+        # Links from the highest folded node down get looked up again
+        folded = [i for i, link in enumerate(path) if link.up.children.get(None) is not link
+                  and link.up.children.get(link.segment) is not link]
+        if not folded:
+            return path[0] if path else node
+        node = path[folded[-1]].up
+        for link in reversed(path[:folded[-1] + 1]):
+            node = self.item(node) if link.up.children.get(None) is link else \
+                self.child(node, link.segment)
+        return node
+
+    def __getstate__(self):
+        """Flat state for pickle. Pickling the linked nodes would hit the recursion
+        limit for deeply nested data."""
+        index = {self.root: 0}
+        nodes = [(-1, None) + tuple(getattr(self.root, f) for f in STATE)]
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            for key, child in (node.children or {}).items():
+                index[child] = len(nodes)
+                nodes.append((index[node], key) + tuple(getattr(child, f) for f in STATE))
+                stack.append(child)
+        return (self.symbol_array, self.symbol_item, self.collapse, self.folds, nodes,
+                [index[node] for node in self.records], [index[node] for node in self.maps])
+
+    def __setstate__(self, state):
+        self.symbol_array, self.symbol_item, self.collapse, self.folds, nodes, records, maps = \
+            state
+        self.on_fold = None
+        linked = []
+        for up, key, *values in nodes:
+            node = PathNode()
+            for field, value in zip(STATE, values):
+                setattr(node, field, value)
+            if up >= 0:
+                node.up = linked[up]
+                if node.up.children is None:
+                    node.up.children = {}
+                node.up.children[key] = node
+            linked.append(node)
+        self.root = linked[0]
+        self.records = [linked[i] for i in records]
+        self.maps = {linked[i] for i in maps}
+
+    def wildcards(self):
+        """Wildcard nodes of collapsed keys, outer ones first"""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.keys is not None:
+                found.append(node)
+            stack.extend(reversed(list((node.children or {}).values())))
+        return found
+
+    def record_parent(self, node: PathNode):
+        """Parent name shown for a record. Arrays and objects share the
+        parent of the path holding them."""
+        if node.size is not None and node.up is not None:
+            return node.up.parent
+        return node.parent
+
+    def as_dict(self):
+        """Returns the records as dict by path name like the former Options.TREE"""
+        tree = {}
+        for node in self.records:
+            if node.size is not None:
+                tree[self.name(node)] = {"type": node.type, "size": node.size,
+                                         "parent": self.record_parent(node)}
+            else:
+                tree[self.name(node)] = {"type": node.type, "count": node.count,
+                                         "example": node.example, "parent": node.parent,
+                                         "consistent": node.consistent}
+        return tree
@@ -0,0 +1,108 @@
+"""Profiling of jsummary
+
+'--profile' measures wall time, CPU time and peak memory of the phases of a run
+(load, decode, walk, table and output) and writes them with the size of the
+json tree as a json report. '--profile-walk' adds a cProfile dump of the walk.
+Peak memory comes from tracemalloc, which slows down the run."""
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from options import Options
+
+# Phases that walk the json data. With --stream or JSON Lines loading, decoding
+# and walking happen together in 'stream'.
+WALK_PHASES = ("walk", "stream")
+
+
+def phase(name: str):
+    """Context manager that measures a phase of Options.PROFILER. Does nothing
+    without '--profile'."""
+    return Options.PROFILER.phase(name) if Options.PROFILER else nullcontext()
+
+
+class Profile:
+    """Measures the phases of a run
+
+    Args:
+        walk_stats - str: File for a cProfile dump of the walk phases or None
+    Variables:
+        phases - dict: wall, cpu and children_cpu seconds and peak_mb by phase.
+                    Phases that run several times are added up.
+        peak - int: Highest traced memory of all phases in bytes
+        peaks - list: Highest traced memory of each open phase in bytes up to
+                      the last phase that started inside it and reset the peak
+    """
+    def __init__(self, walk_stats=None):
+        self.walk_stats = walk_stats
+        self.phases = {}
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.peak = 0
+        self.peaks = []
+        tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Measures the code inside the with block as phase name"""
+        stats = self.phases.setdefault(name, {"wall": 0.0, "cpu": 0.0, "children_cpu": 0.0,
+                                              "peak_mb": 0.0})
+        profile = cProfile.Profile() if self.walk_stats and name in WALK_PHASES else None
+        # A phase inside another one keeps the peak of the outer one so far
+        if self.peaks:
+            self.peaks[-1] = max(self.peaks[-1], tracemalloc.get_traced_memory()[1])
+        self.peaks.append(0)
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        wall, cpu, times = time.perf_counter(), time.process_time(), os.times()
+        if profile:
+            profile.enable()
+        try:
+            yield stats
+        finally:
+            if profile:
+                profile.disable()
+                profile.dump_stats(self.walk_stats)
+            now = os.times()
+            stats["wall"] += time.perf_counter() - wall
+            stats["cpu"] += time.process_time() - cpu
+            # Worker processes of --jobs
+            stats["children_cpu"] += (now.children_user - times.children_user +
+                                      now.children_system - times.children_system)
+            peak = max(tracemalloc.get_traced_memory()[1], self.peaks.pop())
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], peak)
+            self.peak = max(self.peak, peak)
+            stats["peak_mb"] = max(stats["peak_mb"], (peak - before) / 1024**2)
+
+    def report(self):
+        """The profile with the counts of Options.TREE as dict"""
+        detector = Options.DETECTOR
+        return {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "input": Options.FILE or Options.URL,
+            "python": sys.version.split()[0],
+            "settings": {"stream": Options.STREAM, "jobs": Options.JOBS,
+                         "sample": Options.SAMPLE and Options.SAMPLE._asdict(),
+                         "parser": Options.PARSER, "detect": Options.DETECT},
+            "total": {"wall": time.perf_counter() - self.wall,
+                      "cpu": time.process_time() - self.cpu,
+                      "peak_mb": max(self.peak, tracemalloc.get_traced_memory()[1]) / 1024**2},
+            "phases": self.phases,
+            "counts": {"nodes": Options.CNT,
+                       "leaves": sum(Options.ITEMS_COUNT.values()),
+                       "paths": len(Options.TREE.records),
+                       "values": Options.ITEMS_COUNT,
+                       "detector_hits": {name: count for name, count in Options.ITEMS_COUNT.items()
+                                         if name in detector.names.values()},
+                       "detector_cache": len(detector.cache)},
+        }
+
+    def write(self, file: str):
+        """Writes report() to file and stops tracemalloc"""
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        tracemalloc.stop()
@@ -0,0 +1,147 @@
+"""Sampling of large arrays for jsummary
+
+Arrays with more items than Sampler.min_size are summarized from a random sample
+of their items. Everything counted inside a sampled item is weighted with the
+inverse sampling rate, so these counts are estimates and become floats."""
+import argparse
+import math
+import random
+import time
+from typing import NamedTuple
+
+# Arrays up to this size are always walked completely
+SAMPLE_MIN = 100
+# Rough time the walker needs per json node in seconds
+NODE_TIME = 1e-6
+# Maximum number of nodes counted to estimate the size of an array item
+PILOT_LIMIT = 100_000
+
+
+class Sample(NamedTuple):
+    """Setting of '--sample'. Only one of the variables is set.
+
+    Variables:
+        fraction - float: Share of the items of each large array
+        size - int: Number of items of each large array
+        seconds - float: Time budget for walking the json data
+    """
+    fraction: float = None
+    size: int = None
+    seconds: float = None
+
+
+def parse_sample(text: str):
+    """Type of the '--sample' argument. '0.1' or '10%' is a fraction, '1000' a
+    number of items per array and '30s' a time budget in seconds."""
+    try:
+        if text.endswith("s"):
+            sample = Sample(seconds=float(text[:-1]))
+            valid = sample.seconds > 0
+        elif text.endswith("%"):
+            sample = Sample(fraction=float(text[:-1]) / 100)
+            valid = 0 < sample.fraction <= 1
+        elif "." in text:
+            sample = Sample(fraction=float(text))
+            valid = 0 < sample.fraction <= 1
+        else:
+            sample = Sample(size=int(text))
+            valid = sample.size > 0
+    except ValueError:
+        valid = False
+    if not valid:
+        raise argparse.ArgumentTypeError(f"invalid sample '{text}'. Use a fraction like " +
+                                         "'0.1' or '10%', a number of items or seconds like '30s'")
+    return sample
+
+
+def count_nodes(value, limit=PILOT_LIMIT):
+    """Number of json nodes in value. Stops counting at limit."""
+    nodes = 0
+    stack = [value]
+    while stack and nodes < limit:
+        value = stack.pop()
+        nodes += 1
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return nodes
+
+
+class Sampler:
+    """Draws the samples of large arrays and keeps track of them
+
+    Args:
+        sample - Sample: The setting from '--sample'
+        seed: Seed of the random generator. The same seed draws the same sample.
+    Variables:
+        min_size - int: Arrays up to this size are not sampled
+        arrays - dict: [arrays, items, sampled items] by node of the array path
+        deadline - float: End of the time budget. Starts with the first large array.
+    """
+    def __init__(self, sample: Sample, seed=0):
+        self.sample = sample
+        self.min_size = sample.size or SAMPLE_MIN
+        self.random = random.Random(seed)
+        self.arrays = {}
+        self.deadline = None
+
+    def draw(self, array, data: list, weight):
+        """Returns a sample of the items of data in their original order and the
+        weight of the sampled items. Arrays from random access lists are
+        sampled without replacement in O(sample size)."""
+        size = len(data)
+        sample_size = min(self.sample_size(data, weight), size)
+        self.add(array, size, sample_size)
+        if sample_size == size:
+            return data, weight
+        picked = sorted(self.random.sample(range(size), sample_size))
+        return [data[i] for i in picked], weight * size / sample_size
+
+    def sample_size(self, data: list, weight):
+        """Number of items to sample from data"""
+        if self.sample.size:
+            return self.sample.size
+        if self.sample.fraction:
+            return max(self.min_size, math.ceil(len(data) * self.sample.fraction))
+
+        now = time.perf_counter()
+        if self.deadline is None:
+            self.deadline = now + self.sample.seconds
+        if now >= self.deadline:
+            return self.min_size
+        if weight != 1:
+            # The budget got planned with the outer array, which expects its items complete
+            return len(data)
+        cost = NODE_TIME * count_nodes(data[self.random.randrange(len(data))])
+        return max(self.min_size, int((self.deadline - now) / cost))
+
+    def keep(self, index: int):
+        """Bernoulli sampling of streamed arrays with unknown size. Returns the
+        weight factor of the item at index (starting with 1) or 0 to skip it.
+        Only available for fractions."""
+        if index <= self.min_size:
+            return 1
+        if self.random.random() < self.sample.fraction:
+            return 1 / self.sample.fraction
+        return 0
+
+    def add(self, array, size: int, sample_size: int, arrays=1):
+        """Records an array of size items of which sample_size got walked. Totals of
+        several arrays come with their number of arrays."""
+        stats = self.arrays.setdefault(array, [0, 0, 0])
+        stats[0] += arrays
+        stats[1] += size
+        stats[2] += sample_size
+
+    def move(self, moved: dict):
+        """Adds the records of array nodes that got folded into a wildcard path to
+        the node they went into (see pathtrie.PathTrie.fold())"""
+        for array in [array for array in self.arrays if array in moved]:
+            arrays, size, sample_size = self.arrays.pop(array)
+            self.add(moved[array], size, sample_size, arrays)
+
+    def blind_spots(self):
+        """Array nodes with items that got left out as (node, items, sampled items)"""
+        return [(array, items, sampled) for array, (_, items, sampled) in self.arrays.items()
+                if sampled < items]
@@ -0,0 +1,345 @@
+"""Summary server of jsummary
+
+'--serve' keeps a warm process that summarizes json for other programs over
+HTTP, on a local port or a Unix socket. Every request runs in its own thread
+with its own Summarizer, so requests don't share any state.
+
+    POST /summary                   Raw json body
+    GET or POST /summary?file=...   Local json file like '--file'
+    GET or POST /summary?url=...    Remote json like '--url'
+    GET /metrics                    Counters in the Prometheus text format
+
+Query parameters are the long commandline options, like
+'trim=20&detect=uuid&detect=email'. 'format' picks json (default), csv or md,
+else the Accept header does. The table is the one the commandline writes."""
+import io
+import json
+import os
+import socketserver
+import stat
+import threading
+import time
+from argparse import ArgumentTypeError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from decoders import PARSERS, get_decoder
+from detectors import EXTRA_TYPES
+from formats import TBLFMT_MD, format_table, write_csv, write_json
+from sampling import parse_sample
+from summarizer import SummaryError
+
+# Address of '--serve' without a value
+DEFAULT_ADDRESS = "127.0.0.1:8080"
+# Largest accepted request body in bytes
+MAX_BODY = 64 * 1024 * 1024
+FORMATS = {"json": "application/json", "csv": "text/csv", "md": "text/markdown"}
+
+
+def flag(value: str):
+    """Query value of an on/off option"""
+    return value.lower() in ("", "1", "true", "yes")
+
+def choice(options):
+    """Converter that only allows values from options"""
+    def convert(value: str):
+        if value not in options:
+            raise ValueError(f"'{value}' is not one of {', '.join(options)}")
+        return value
+    return convert
+
+# Query parameter -> Summarizer setting, converter of a value and if it takes several values
+PARAMS = {
+    "trim": ("trim", int, False),
+    "mask": ("mask", int, False),
+    "indent": ("indent", str, False),
+    "array": ("symbol_array", str, False),
+    "arrayitem": ("symbol_array_item", str, False),
+    "object": ("symbol_object", str, False),
+    "anykey": ("symbol_key", str, False),
+    "redacted": ("redacted", str, True),
+    "detect": ("detect", choice(EXTRA_TYPES), True),
+    "sample": ("sample", parse_sample, False),
+    "stream": ("stream", flag, False),
+    "ndjson": ("json_lines", flag, False),
+    "parser": ("parser", choice(PARSERS), False),
+    "shape-cache": ("shape_cache", int, False),
+    "collapse-ids": ("collapse_ids", int, False),
+    "collapse-keys": ("collapse_keys", int, False),
+    "stats": ("stats", flag, False),
+    "top-k": ("top_k", int, False),
+    "max-depth": ("max_depth", int, False),
+    "max-nodes": ("max_nodes", int, False),
+    "time-budget": ("time_budget", float, False),
+    "paginate": ("paginate", flag, False),
+    "max-pages": ("max_pages", int, False),
+    "max-records": ("max_records", int, False),
+    "cursor-param": ("cursor_param", str, False),
+    "timeout": ("request_timeout", float, False),
+}
+
+
+def parse_params(query: str):
+    """Summarizer settings and the other parameters of a query string
+
+    Return:
+        dict: Settings for Summarizer.replace()
+        dict: Last value of every other parameter like 'format', 'file' or 'url'
+    Raises ValueError for invalid values."""
+    settings = {}
+    others = {}
+    for name, values in parse_qs(query, keep_blank_values=True).items():
+        if name not in PARAMS:
+            others[name] = values[-1]
+            continue
+        setting, convert, several = PARAMS[name]
+        try:
+            converted = [convert(value) for value in values]
+        except (ValueError, ArgumentTypeError) as e:
+            raise ValueError(f"Invalid '{name}': {e}") from e
+        settings[setting] = converted if several else converted[-1]
+    return settings, others
+
+def loads_body(decoder, body: bytes):
+    """Json of a request body. Raises SummaryError for invalid json."""
+    if not body.strip():
+        raise SummaryError("Error: Empty body")
+    try:
+        return decoder.loads(body)
+    except ValueError as e:
+        raise SummaryError(f"Error: Couldn't parse json body. {e}") from e
+
+def render(table, fmt: str, delimiter=","):
+    """The table in the format fmt as text"""
+    if fmt == "md":
+        return format_table(table, TBLFMT_MD)
+    text = io.StringIO()
+    if fmt == "csv":
+        write_csv(table, text, delimiter)
+    else:
+        write_json(table, text)
+    return text.getvalue()
+
+
+class Metrics:
+    """Counters of the server for /metrics. Safe to use from all threads."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start = time.time()
+        self.requests = {}
+        self.seconds = 0.0
+        self.bytes = 0
+        self.nodes = 0
+        self.in_flight = 0
+
+    def begin(self):
+        """Counts a started summary"""
+        with self.lock:
+            self.in_flight += 1
+
+    def end(self, status: int, seconds: float, size: int, nodes: int):
+        """Counts a finished summary with its status, time, body size and nodes"""
+        with self.lock:
+            self.in_flight -= 1
+            self.requests[status] = self.requests.get(status, 0) + 1
+            self.seconds += seconds
+            self.bytes += size
+            self.nodes += nodes
+
+    def text(self):
+        """The counters in the Prometheus text format"""
+        with self.lock:
+            lines = ["# TYPE jsummary_requests_total counter"]
+            lines += [f'jsummary_requests_total{{status="{status}"}} {count}'
+                      for status, count in sorted(self.requests.items())]
+            lines += ["# TYPE jsummary_request_seconds_total counter",
+                      f"jsummary_request_seconds_total {self.seconds:.6f}",
+                      "# TYPE jsummary_request_bytes_total counter",
+                      f"jsummary_request_bytes_total {self.bytes}",
+                      "# TYPE jsummary_nodes_total counter",
+                      f"jsummary_nodes_total {self.nodes}",
+                      "# TYPE jsummary_in_flight gauge",
+                      f"jsummary_in_flight {self.in_flight}",
+                      "# TYPE jsummary_uptime_seconds gauge",
+                      f"jsummary_uptime_seconds {time.time() - self.start:.3f}"]
+        return "\n".join(lines) + "\n"
+
+
+class SummaryHandler(BaseHTTPRequestHandler):
+    """Answers /summary and /metrics of a SummaryServer"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self): # pylint: disable=invalid-name
+        """/metrics or a summary of a file or url"""
+        if urlsplit(self.path).path == "/metrics":
+            self.send_text(200, self.server.metrics.text(), "text/plain; version=0.0.4")
+        else:
+            self.do_POST()
+
+    def do_POST(self): # pylint: disable=invalid-name
+        """Summary of the body, a file or a url"""
+        path, _, query = self.path.partition("?")
+        if path not in ("/", "/summary"):
+            self.send_error_json(404, f"Not found: {path}")
+            return
+        start = time.perf_counter()
+        self.server.metrics.begin()
+        status, size, nodes = 500, 0, 0
+        try:
+            status, size, nodes = self.summarize(query)
+        finally:
+            self.server.metrics.end(status, time.perf_counter() - start, size, nodes)
+
+    def summarize(self, query: str):
+        """Sub-function of do_POST(). Sends the summary of a request
+
+        Return:
+            tuple: Status, size of the body and number of nodes for Metrics"""
+        try:
+            settings, others = parse_params(query)
+            fmt = others.get("format") or self.accepted_format()
+            if fmt not in FORMATS:
+                raise ValueError(f"Unknown format '{fmt}'")
+            if fmt != "md":
+                # No indent for csv and json like on the commandline
+                settings.setdefault("indent", "")
+            summarizer = self.server.summarizer.replace(**settings)
+            decoder = get_decoder(summarizer.settings["PARSER"])
+        except (ValueError, ImportError) as e:
+            return self.send_error_json(400, str(e).removeprefix("Error: "))
+        body = self.read_body() if not (others.get("file") or others.get("url")) else b""
+        if isinstance(body, tuple):
+            return body
+        try:
+            if others.get("file"):
+                summary = summarizer.summarize_file(others["file"])
+            elif others.get("url"):
+                summary = summarizer.summarize_url(others["url"])
+            else:
+                summary = summarizer.summarize(loads_body(decoder, body))
+        except SummaryError as e:
+            return self.send_error_json(422, str(e).removeprefix("Error: "), len(body))
+        text = render(summary.table, fmt, others.get("delimiter") or self.server.delimiter)
+        self.send_text(200, text, FORMATS[fmt] + "; charset=utf-8",
+                       {"X-Summary-Nodes": summary.nodes, "X-Summary-Paths": len(summary.tree)})
+        return 200, len(body), summary.nodes
+
+    def read_body(self):
+        """Body of the request. The values of summarize() if it can't be read."""
+        size = self.headers.get("Content-Length", "").strip()
+        if not size.isdigit():
+            return self.send_error_json(411, "Send a json body with Content-Length, "
+                                        "'file' or 'url'")
+        size = int(size)
+        if size > self.server.max_body:
+            self.close_connection = True
+            return self.send_error_json(413, f"Body larger than {self.server.max_body:,d} bytes")
+        return self.rfile.read(size)
+
+    def accepted_format(self):
+        """Format from the Accept header. json if none fits."""
+        accept = self.headers.get("Accept", "")
+        return next((fmt for fmt, mime in FORMATS.items() if mime in accept), "json")
+
+    def send_text(self, status: int, text: str, content_type: str, headers=None):
+        """Sends text as response"""
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: int, message: str, size=0):
+        """Sends an error as json. Returns the values of summarize()."""
+        self.send_text(status, json.dumps({"error": message}), FORMATS["json"])
+        return status, size, 0
+
+    def address_string(self):
+        """Clients of Unix sockets have no address"""
+        return self.client_address[0] if self.client_address else "unix"
+
+
+class SummaryServer: # pylint: disable=too-few-public-methods
+    """Settings of a server that all its requests share
+
+    Variables:
+        summarizer - Summarizer: Base settings. Query parameters change them per request.
+        max_body - int: Largest accepted body in bytes
+        delimiter - str: csv delimiter if a request doesn't set one
+        metrics - Metrics: Counters for /metrics
+    """
+    def __init__(self, address, summarizer, max_body=MAX_BODY, delimiter=","):
+        super().__init__(address, SummaryHandler)
+        self.summarizer = summarizer.replace(verbose=False, profiler=None)
+        self.max_body = max_body
+        self.delimiter = delimiter
+        self.metrics = Metrics()
+
+class HTTPSummaryServer(SummaryServer, ThreadingHTTPServer):
+    """Summary server on a TCP port"""
+
+class UnixSummaryServer(SummaryServer, socketserver.ThreadingMixIn,
+                        socketserver.UnixStreamServer):
+    """Summary server on a Unix socket. Removes its socket file when it gets
+    closed, unless another one replaced it in the meantime.
+
+    Variables:
+        inode - tuple: Device and inode of the socket file this server created
+    """
+    daemon_threads = True
+    inode = None
+
+    def server_bind(self):
+        super().server_bind()
+        found = os.lstat(self.server_address)
+        self.inode = (found.st_dev, found.st_ino)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            found = os.lstat(self.server_address)
+        except OSError:
+            return
+        if (found.st_dev, found.st_ino) == self.inode:
+            os.remove(self.server_address)
+
+
+def make_server(address: str, summarizer, max_body=MAX_BODY, delimiter=","):
+    """Server for address, 'host:port' or the path of a Unix socket
+
+    Args:
+        address - str: Where to listen. Port 0 picks a free port.
+        others: See SummaryServer
+    Return:
+        HTTPSummaryServer or UnixSummaryServer: Not started yet
+    A socket file left over at address gets replaced. Raises SummaryError if
+    address is any other file."""
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return HTTPSummaryServer((host, int(port)), summarizer, max_body, delimiter)
+    try:
+        found = os.lstat(address)
+    except FileNotFoundError:
+        found = None
+    if found is not None:
+        if not stat.S_ISSOCK(found.st_mode):
+            raise SummaryError(f"Error: {address} exists and is no Unix socket. " +
+                               "Choose another path for '--serve'.")
+        os.remove(address)
+    return UnixSummaryServer(address, summarizer, max_body, delimiter)
+
+def serve(address: str, summarizer, max_body=MAX_BODY, delimiter=","):
+    """Runs the server of make_server() until it gets interrupted"""
+    server = make_server(address, summarizer, max_body, delimiter)
+    where = server.server_address
+    where = f"http://{where[0]}:{where[1]}" if isinstance(where, tuple) else f"unix:{where}"
+    print(f"Success: Serving summaries on {where}. Stop with CTRL-C.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping server")
+    finally:
+        # Also removes the socket file of a Unix socket
+        server.server_close()
@@ -0,0 +1,282 @@
+"""Value statistics of jsummary
+
+'--stats' keeps statistics of the values of every leaf path next to its count.
+Every sketch has a fixed size, so the memory of a path stays the same no matter
+how many values pass through, and sketches of the same path merge, so the
+processes of '--jobs' can each keep their own.
+
+    Distinct - Number of distinct values. Exact up to EXACT_LIMIT values, then a
+               HyperLogLog estimate with a standard error of about 3%.
+    Moments - Minimum, maximum, mean and standard deviation by online updates
+              (Welford). Of the numbers of a path and of the lengths of its strings.
+    TopValues - Most frequent values by a space-saving sketch. Values that make up
+                more than 1/capacity of all values are always found."""
+import math
+from decimal import Decimal
+from hashlib import blake2b
+
+# Precision of HyperLogLog. 2**10 registers of a byte each.
+PRECISION = 10
+# Distinct values counted exactly before switching to HyperLogLog
+EXACT_LIMIT = 64
+# Counters of the space-saving sketch per value shown in the table
+TOP_FACTOR = 4
+# Strings are kept with at most this many characters as top value
+TOP_CHARS = 64
+# Moments count numbers larger than this in units of a power of two, so the
+# squares of their differences don't overflow
+SCALE_LIMIT = 2.0 ** 256
+
+
+def hash_value(value):
+    """Stable 64 bit hash of a json value. The hash of python changes between
+    processes, this one is the same everywhere."""
+    data = value.encode("utf-8", "surrogatepass") if isinstance(value, str) else \
+        f"{type(value).__name__}:{value!r}".encode()
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), "little")
+
+
+class Distinct:
+    """Counts distinct values exactly, then estimates them with HyperLogLog
+
+    Variables:
+        hashes - set: Hashes of the values while there are few. None afterwards.
+        registers - bytearray: HyperLogLog registers. None while counting exactly.
+    """
+    __slots__ = ("hashes", "registers")
+
+    def __init__(self):
+        self.hashes = set()
+        self.registers = None
+
+    def add(self, value):
+        """Counts value"""
+        if self.registers is None:
+            self.hashes.add(hash_value(value))
+            if len(self.hashes) > EXACT_LIMIT:
+                self.to_registers()
+        else:
+            self.add_hash(hash_value(value))
+
+    def add_hash(self, value_hash: int):
+        """Counts the hash of a value in the registers"""
+        index = value_hash >> (64 - PRECISION)
+        rest = value_hash & ((1 << (64 - PRECISION)) - 1)
+        rank = 64 - PRECISION - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def to_registers(self):
+        """Switches from exact counting to HyperLogLog"""
+        self.registers = bytearray(1 << PRECISION)
+        for value_hash in self.hashes:
+            self.add_hash(value_hash)
+        self.hashes = None
+
+    def merge(self, other):
+        """Adds the values of another Distinct"""
+        if other.registers is None and self.registers is None:
+            self.hashes |= other.hashes
+            if len(self.hashes) > EXACT_LIMIT:
+                self.to_registers()
+            return
+        if self.registers is None:
+            self.to_registers()
+        if other.registers is None:
+            for value_hash in other.hashes:
+                self.add_hash(value_hash)
+        else:
+            self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self):
+        """Number of distinct values. Int if exact, float for estimates."""
+        if self.registers is None:
+            return len(self.hashes)
+        size = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / size) * size * size / \
+            sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Linear counting is more precise for small numbers
+            estimate = size * math.log(size / zeros)
+        return float(estimate)
+
+
+class Moments:
+    """Minimum, maximum, mean and variance of weighted numbers by online updates
+
+    Variables:
+        weight - float: Sum of the weights of all numbers
+        scaled_mean - float: Weighted mean in units of scale
+        squares - float: Weighted sum of the squared differences from the mean
+                         in units of scale
+        scale - float: Unit of the numbers. 1 until one is larger than SCALE_LIMIT.
+        minimum, maximum: Smallest and largest number. None before the first one.
+    """
+    __slots__ = ("weight", "scaled_mean", "squares", "scale", "minimum", "maximum")
+
+    def __init__(self):
+        self.weight = 0
+        self.scaled_mean = 0.0
+        self.squares = 0.0
+        self.scale = 1.0
+        self.minimum = self.maximum = None
+
+    @property
+    def mean(self):
+        """Weighted mean"""
+        return self.scaled_mean * self.scale
+
+    def add(self, number, weight=1):
+        """Adds number with weight. Not a number and infinity only count for
+        minimum and maximum."""
+        if self.minimum is None or number < self.minimum:
+            self.minimum = number
+        if self.maximum is None or number > self.maximum:
+            self.maximum = number
+        try:
+            number = float(number)
+        except OverflowError:
+            return
+        if not math.isfinite(number):
+            return
+        if abs(number) > self.scale * SCALE_LIMIT:
+            self.rescale(2.0 ** (math.frexp(number)[1] - 1))
+        number /= self.scale
+        self.weight += weight
+        delta = number - self.scaled_mean
+        self.scaled_mean += delta * weight / self.weight
+        self.squares += weight * delta * (number - self.scaled_mean)
+
+    def rescale(self, scale: float):
+        """Changes the unit of mean and squares to scale"""
+        factor = self.scale / scale
+        self.scaled_mean *= factor
+        self.squares *= factor * factor
+        self.scale = scale
+
+    def merge(self, other):
+        """Adds the numbers of another Moments (Chan et al.)"""
+        if other.minimum is None:
+            return
+        if self.minimum is None or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.maximum is None or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        weight = self.weight + other.weight
+        if not other.weight:
+            return
+        self.rescale(max(self.scale, other.scale))
+        factor = other.scale / self.scale
+        delta = other.scaled_mean * factor - self.scaled_mean
+        self.scaled_mean += delta * other.weight / weight
+        self.squares += other.squares * factor * factor + \
+            delta * delta * self.weight * other.weight / weight
+        self.weight = weight
+
+    def stddev(self):
+        """Population standard deviation. None without numbers."""
+        return math.sqrt(max(self.squares, 0.0) / self.weight) * self.scale if self.weight \
+            else None
+
+
+class TopValues:
+    """Most frequent values by a space-saving sketch with a fixed number of counters
+
+    Variables:
+        capacity - int: Maximum number of counters
+        counts - dict: Estimated count by value
+        errors - dict: Most the count of a value can be too high, by value. A value
+                       that takes over the counter of another one inherits its count.
+        total - float: Sum of the weights of all values
+    """
+    __slots__ = ("capacity", "counts", "errors", "total")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+
+    def add(self, value, weight=1):
+        """Counts value with weight"""
+        if isinstance(value, str) and len(value) > TOP_CHARS:
+            value = value[:TOP_CHARS]
+        self.total += weight
+        counts = self.counts
+        if value in counts or len(counts) < self.capacity:
+            counts[value] = counts.get(value, 0) + weight
+            return
+        # The new value takes over the smallest counter
+        smallest = min(counts, key=counts.get)
+        error = counts.pop(smallest)
+        self.errors.pop(smallest, None)
+        counts[value] = error + weight
+        self.errors[value] = error
+
+    def floor(self):
+        """Count of values without a counter, at most the smallest counter"""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other):
+        """Adds the counts of another TopValues and keeps the largest counters.
+        A value missing in a full sketch may have had up to its smallest count."""
+        floor, other_floor = self.floor(), other.floor()
+        for value in self.counts.keys() - other.counts.keys():
+            self.counts[value] += other_floor
+            self.errors[value] = self.errors.get(value, 0) + other_floor
+        for value, count in other.counts.items():
+            missing = 0 if value in self.counts else floor
+            self.counts[value] = self.counts.get(value, 0) + count + missing
+            self.errors[value] = self.errors.get(value, 0) + other.errors.get(value, 0) + missing
+        self.total += other.total
+        if len(self.counts) > self.capacity:
+            self.counts = dict(sorted(self.counts.items(), key=lambda item: item[1],
+                                      reverse=True)[:self.capacity])
+            self.errors = {value: error for value, error in self.errors.items()
+                           if value in self.counts}
+
+    def top(self, k: int):
+        """The k most frequent values as (value, share of all values) pairs. Only
+        values that are surely more frequent than the ones without a counter."""
+        errors, floor = self.errors, self.floor()
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(value, count / self.total) for value, count in ranked
+                if count - errors.get(value, 0) > floor]
+
+
+class PathStats:
+    """Statistics of the values of a path. 'null' values aren't counted.
+
+    Variables:
+        distinct - Distinct: Distinct values
+        numbers - Moments: Numbers, without booleans
+        lengths - Moments: Lengths of the strings
+        top - TopValues: Most frequent values
+    """
+    __slots__ = ("distinct", "numbers", "lengths", "top")
+
+    def __init__(self, top_k: int):
+        self.distinct = Distinct()
+        self.numbers = Moments()
+        self.lengths = Moments()
+        self.top = TopValues(max(top_k, 1) * TOP_FACTOR)
+
+    def add(self, value, weight=1):
+        """Adds a plain json value with weight"""
+        if value is None:
+            return
+        self.distinct.add(value)
+        self.top.add(value, weight)
+        kind = type(value)
+        if kind is str:
+            self.lengths.add(len(value), weight)
+        elif kind is int or kind is float or kind is Decimal:
+            self.numbers.add(value, weight)
+
+    def merge(self, other):
+        """Adds the values of the statistics of the same path from another walk"""
+        self.distinct.merge(other.distinct)
+        self.numbers.merge(other.numbers)
+        self.lengths.merge(other.lengths)
+        self.top.merge(other.top)
@@ -0,0 +1,690 @@
+"""Summarizer of jsummary
+
+Builds the summary of json data, files and urls as library without the
+commandline. Every Summarizer has its own settings, and the results of a run
+live in the Options of its thread, so summarizers can run side by side in
+threads:
+
+    from summarizer import Summarizer
+    summary = Summarizer(trim=20, detect=["uuid"]).summarize_file("data.json")
+    for row in summary.table:
+        print(row)
+"""
+import math
+import os
+from argparse import ArgumentTypeError
+from contextlib import ExitStack
+from copy import copy, deepcopy
+from typing import NamedTuple
+from cache import SummaryCache, Unchanged, check_file, check_response, conditional_headers
+from decoders import get_decoder
+from detectors import TEXT_TYPES
+from errors import SummaryError
+from files import READ_ERRORS, open_input, read_input
+from json_lines import is_json_lines
+from limits import DEPTH, NODES, TIME
+from options import Options, ThreadOptions
+from parallel import get_json_lines_parallel, get_json_tree_parallel
+from pathtrie import PathTrie
+from profiler import phase
+from sampling import parse_sample
+from walker import stream_json_tree
+
+# Columns of '--stats'
+STATS_HEADER = ["DISTINCT", "MIN", "MAX", "MEAN", "STDDEV", "LENGTH", "TOP"]
+# Options a Summarizer takes as settings. Everything else belongs to the commandline.
+CONFIG = ("HEADERS", "PAGINATE", "MAX_PAGES", "MAX_RECORDS", "CURSOR_PARAM", "SYMBOL_ARRAY",
+          "SYMBOL_OBJECT", "SYMBOL_ARRAY_ITEM", "INDENT", "MASK", "TRIM", "REDACTED",
+          "REQUEST_TIMEOUT", "DEBUG", "STREAM", "CHUNK_SIZE", "DETECT", "SHAPE_CACHE", "SAMPLE",
+          "SYMBOL_KEY", "COLLAPSE_IDS", "COLLAPSE_KEYS", "MAX_DEPTH", "MAX_NODES", "TIME_BUDGET",
+          "STATS", "TOP_K", "JOBS", "JSON_LINES", "PARSER", "PROFILER", "VERBOSE", "CACHE",
+          "CACHE_SIZE")
+# Settings that don't change the summary, so they aren't part of the cache key
+UNCACHED = ("DEBUG", "JOBS", "PROFILER", "VERBOSE", "CACHE", "CACHE_SIZE")
+
+
+class Summary(NamedTuple):
+    """Result of a Summarizer
+
+    Variables:
+        rows - list: Dicts of all paths from list_json(). With lazy=True the
+                     generator iter_json().
+        table - list: Rows of get_summary_table(), the header first. With lazy=True
+                      the generator iter_summary_table(), which makes the rows
+                      while they are written. Consume it in the same thread before
+                      the next summary.
+        items_count - dict: Number of json values by type
+        nodes - int: Number of walked json nodes
+        tree - PathTrie: Trie of all json paths
+    """
+    rows: list
+    table: list
+    items_count: dict
+    nodes: int
+    tree: PathTrie
+
+
+class Summarizer:
+    """Summarizes json data, files and urls with its own settings
+
+    Args:
+        **settings: Options from CONFIG in lower case, like trim=20, detect=["uuid"]
+                    or sample="10%". The rest keeps the defaults of Options.
+                    Messages are only printed with verbose=True.
+    Variables:
+        settings - dict: All CONFIG options by name
+    Raises ValueError for unknown settings and SummaryError for input that
+    can't be summarized."""
+    def __init__(self, **settings):
+        unknown = [name for name in settings if name.upper() not in CONFIG]
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(unknown)}")
+        self.settings = {name: copy(getattr(ThreadOptions, name)) for name in CONFIG}
+        self.settings["VERBOSE"] = False
+        self.settings.update((name.upper(), value) for name, value in settings.items())
+        if isinstance(self.settings["SAMPLE"], str):
+            try:
+                self.settings["SAMPLE"] = parse_sample(self.settings["SAMPLE"])
+            except ArgumentTypeError as e:
+                raise ValueError(str(e)) from e
+
+    @classmethod
+    def from_options(cls):
+        """Summarizer with the current Options of the thread, like the ones of
+        the commandline"""
+        return cls(**{name.lower(): getattr(Options, name) for name in CONFIG})
+
+    def replace(self, **settings):
+        """New Summarizer with the settings of this one, changed by settings"""
+        changed = {name.lower(): value for name, value in self.settings.items()}
+        changed.update(settings)
+        return Summarizer(**changed)
+
+    def summarize(self, data, lazy=False):
+        """Summary of decoded json data. See result() for lazy."""
+        self.configure()
+        with phase("walk"):
+            get_json_tree_parallel(data, Options.JOBS)
+        return self.result(lazy)
+
+    def summarize_file(self, path: str, lazy=False):
+        """Summary of a json or JSON Lines file, compressed or not"""
+        self.configure(file=path)
+        return self.load(lazy)
+
+    def summarize_url(self, url: str, lazy=False):
+        """Summary of the json response of url"""
+        self.configure(url=url)
+        return self.load(lazy)
+
+    def load(self, lazy=False):
+        """Summary of Options.FILE or Options.URL. With Options.CACHE it comes
+        from the cache as long as the input didn't change. See result() for lazy.
+        Samples and walks stopped by a node or time limit differ from run to run
+        and are never cached."""
+        if not Options.CACHE or Options.PAGINATE or Options.SAMPLE or Options.MAX_NODES or \
+                Options.TIME_BUDGET:
+            load_json_tree()
+            return self.result(lazy)
+        cache = SummaryCache.shared(Options.CACHE, Options.CACHE_SIZE)
+        key = cache.key(os.path.abspath(Options.FILE) if Options.FILE else Options.URL,
+                        {name: value for name, value in self.settings.items()
+                         if name not in UNCACHED})
+        with phase("cache"):
+            entry = cache.get(key)
+        Options.CACHED = entry[0] if entry else None
+        try:
+            if Options.FILE:
+                Options.VALIDATORS = check_file(Options.FILE, Options.CACHED)
+            load_json_tree()
+        except Unchanged as e:
+            if e.validators != Options.CACHED:
+                cache.put(key, e.validators, entry[1])
+            return restore(entry[1], lazy)
+        summary = self.result(lazy)
+        if Options.VALIDATORS is None:
+            return summary
+        if lazy:
+            return summary._replace(table=stored_table(summary, cache, key, Options.VALIDATORS))
+        with phase("cache"):
+            cache.put(key, Options.VALIDATORS, (summary.table, summary.items_count,
+                                                summary.nodes, cached_tree(summary.tree)))
+        return summary
+
+    def configure(self, file=None, url=None):
+        """Sets the settings and the input in the Options of this thread"""
+        Options.configure(self.settings)
+        Options.FILE = file
+        Options.URL = url
+
+    def result(self, lazy=False):
+        """Summary of the results in the Options of this thread. lazy=True
+        returns rows and table as generators instead of lists, so large tables
+        can be written row by row."""
+        if lazy:
+            rows = iter_json(Options.TREE)
+            return Summary(rows, iter_summary_table(rows), Options.ITEMS_COUNT, Options.CNT,
+                           Options.TREE)
+        with phase("table"):
+            rows = list_json(Options.TREE)
+            table = get_summary_table(rows)
+        return Summary(rows, table, Options.ITEMS_COUNT, Options.CNT, Options.TREE)
+
+
+def restore(cached, lazy=False):
+    """Summary of the cache. Its tree and counts become the results of this thread.
+
+    Args:
+        cached - tuple: Table, items count, nodes and tree of the summary"""
+    table, items_count, nodes, tree = cached
+    info("Success: Input unchanged, summary taken from the cache")
+    Options.TREE, Options.ITEMS_COUNT, Options.CNT = tree, items_count, nodes
+    if lazy:
+        return Summary(iter_json(tree), iter(table), items_count, nodes, tree)
+    return Summary(list_json(tree), table, items_count, nodes, tree)
+
+def stored_table(summary, cache, key: str, validators):
+    """Generator of the rows of the lazy table of summary that stores the
+    summary in cache after the last row"""
+    table = []
+    for row in summary.table:
+        table.append(row)
+        yield row
+    with phase("cache"):
+        cache.put(key, validators, (table, summary.items_count, summary.nodes,
+                                    cached_tree(summary.tree)))
+
+def cached_tree(tree):
+    """Copy of tree for the cache that holds no more of the values than the
+    table shows. Paths in Options.REDACTED lose example and statistics, the
+    strings of the others are masked by Options.MASK."""
+    tree = deepcopy(tree)
+    names = {}
+    for node in tree.records:
+        if tree.name(node, names).split(".")[-1] in Options.REDACTED:
+            node.example = node.stats = None
+        elif Options.MASK:
+            node.example = mask_value(node.example)
+            if node.stats is not None:
+                top = node.stats.top
+                counts, errors = {}, {}
+                for value, count in top.counts.items():
+                    masked = mask_value(value)
+                    counts[masked] = counts.get(masked, 0) + count
+                    errors[masked] = errors.get(masked, 0) + top.errors.get(value, 0)
+                top.counts, top.errors = counts, errors
+    return tree
+
+def mask_value(value):
+    """value with the first Options.MASK characters masked if it is a string"""
+    return "*" * Options.MASK + value[Options.MASK:] if isinstance(value, str) else value
+
+def load_json_tree():
+    """Loads the json input and fills Options.TREE. Raises SummaryError if
+    nothing could be loaded"""
+    json_lines = Options.FILE and (Options.JSON_LINES or is_json_lines(Options.FILE))
+    if (json_lines or Options.STREAM) and Options.SAMPLE and not Options.SAMPLE.fraction:
+        raise SummaryError("Error: Streaming only supports sampling by fraction " +
+                           "like '0.1' or '10%'.")
+    if json_lines:
+        with phase("stream"):
+            items = lines_from_file(Options.FILE)
+        if not items:
+            raise SummaryError("Error: Can't load json data.")
+        return
+    if Options.URL and Options.PAGINATE:
+        # requests is only imported for urls
+        from paginate import get_json_tree_paged # pylint: disable=import-outside-toplevel
+        with phase("stream"):
+            pager = get_json_tree_paged(Options.URL)
+        Options.NOTES.append(("PAGES:", f"Summary of {pager.records:,d} records from " +
+                              f"{pager.pages:,d} pages."))
+        if pager.stopped:
+            Options.NOTES.append(("INFO:", pager.stopped))
+        return
+    if Options.STREAM:
+        with phase("stream"):
+            loaded = stream_from_file(Options.FILE) if Options.FILE else \
+                stream_from_url(Options.URL)
+        if not loaded:
+            raise SummaryError("Error: Can't load json data.")
+        return
+
+    if Options.FILE:
+        jsn = load_from_file(Options.FILE)
+    else:
+        jsn = load_from_url(Options.URL)
+    if not jsn:
+        raise SummaryError("Error: Can't load json data.")
+
+    with phase("walk"):
+        get_json_tree_parallel(jsn, Options.JOBS)
+
+def load_from_file(file: str):
+    """Loads and parses a local json file
+
+    Args:
+        file - str: String with filename or path
+    Return:
+        jsn: Json decoded object.
+    Compressed files are decompressed in memory, large files are memory-mapped.
+    Handles FILENOTFOUND, missing zstandard and JSONDecodeError with SummaryError"""
+    if os.name != "nt":
+        file = file.replace("\\","/")
+    try:
+        with ExitStack() as stack:
+            with phase("load"):
+                content = stack.enter_context(read_input(file))
+            info("Success: File loaded")
+            with phase("decode"):
+                jsn = get_decoder(Options.PARSER).loads(content)
+            info("Success: JSON decoded from file")
+    except FileNotFoundError as e:
+        raise SummaryError(f"File not found in {file}") from e
+    except ImportError as e:
+        raise SummaryError(e.msg) from e
+    except (ValueError, *READ_ERRORS) as e:
+        # JSONDecodeError, invalid utf-8 or a broken compressed file
+        raise SummaryError("Error: Couldn't parse json file") from e
+
+    return jsn
+
+def stream_from_file(file: str):
+    """Parses a local json file in chunks and builds Options.TREE on the fly
+
+    Args:
+        file - str: String with filename or path
+    Return:
+        bool: False if the json root is empty (like load_from_file() returning
+              an empty object), else True
+    Handles FILENOTFOUND, missing ijson and parse errors with SummaryError"""
+    ijson = import_ijson()
+    if os.name != "nt":
+        file = file.replace("\\","/")
+    try:
+        with open_input(file) as f:
+            info("Success: File opened for streaming")
+            loaded = stream_json_tree(ijson.parse(f, buf_size=Options.CHUNK_SIZE))
+            info("Success: JSON streamed from file")
+    except FileNotFoundError as e:
+        raise SummaryError(f"File not found in {file}") from e
+    except ImportError as e:
+        raise SummaryError(e.msg) from e
+    except (ijson.JSONError, *READ_ERRORS) as e:
+        raise SummaryError("Error: Couldn't parse json file") from e
+
+    return loaded
+
+def stream_from_url(url):
+    """Streams the body of an HTTP response into the incremental parser and
+    builds Options.TREE while the data arrives
+
+    Args:
+        url - str: String with url
+    Return:
+        bool: Like stream_from_file(). None on errors -> SummaryError in load_json_tree()
+    gzip and deflate bodies get decoded on the fly. '--timeout' applies to the
+    connection and to every chunk, not to the whole download. Raises cache.Unchanged
+    like load_from_url(), only for '304 Not Modified'."""
+    import requests # pylint: disable=import-outside-toplevel
+    from fetch import BodyReader # pylint: disable=import-outside-toplevel
+    ijson = import_ijson()
+    try:
+        with requests.get(url, headers=conditional_headers(Options.HEADERS, Options.CACHED),
+                          timeout=Options.REQUEST_TIMEOUT, stream=True) as req:
+            if Options.CACHE:
+                Options.VALIDATORS = check_response(req, Options.CACHED)
+            if req.status_code != 200:
+                info(f"Error: Status {req.status_code}")
+                return None
+            info(f"Sucess: Streaming Data from {url}")
+            body = BodyReader(req, Options.CHUNK_SIZE)
+            loaded = stream_json_tree(ijson.parse(body, buf_size=Options.CHUNK_SIZE))
+            info(f"Success: JSON streamed from url ({body.size:,d} bytes)")
+    except (requests.ConnectTimeout, requests.ConnectionError, requests.ReadTimeout) as e:
+        raise SummaryError(f"Error: Timeout from {url}. " +
+                           f"Current setting is {Options.REQUEST_TIMEOUT} seconds per chunk.\n" +
+                           "Maybe try to increase '--timeout' in the commandline options.") from e
+    except ijson.JSONError:
+        info("Error: Couldn't parse json data\n")
+        return None
+
+    return loaded
+
+def import_ijson():
+    """Imports ijson for '--stream'. Raises SummaryError if it is not installed."""
+    try:
+        import ijson # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise SummaryError("Error: Streaming requires ijson. " +
+                           "Install with 'pip install ijson'") from e
+    return ijson
+
+def lines_from_file(file: str):
+    """Reads a JSON Lines file line by line and builds Options.TREE on the fly
+
+    Args:
+        file - str: String with filename or path
+    Return:
+        int: Number of json values. Malformed lines are skipped.
+    Handles FILENOTFOUND with SummaryError"""
+    if os.name != "nt":
+        file = file.replace("\\","/")
+    try:
+        info("Success: File opened as JSON Lines")
+        items = get_json_lines_parallel(file, Options.JOBS)
+        info("Success: JSON Lines read from file")
+    except FileNotFoundError as e:
+        raise SummaryError(f"File not found in {file}") from e
+    except ImportError as e:
+        raise SummaryError(e.msg) from e
+    except READ_ERRORS as e:
+        raise SummaryError("Error: Couldn't read compressed file") from e
+    if Options.MALFORMED:
+        info(f"Warning: Skipped {Options.MALFORMED:,d} malformed lines")
+
+    return items
+
+def load_from_url(url):
+    """HTTP request and json decoding
+
+    Args:
+        url - str: String with url
+    Return:
+        jsn: Json decoded object
+    Handles HTTPError, ConnectionError, ConnectTimeout, ReadTimeout and 
+    JSONDecodeError with None return -> SummaryError in load_json_tree()
+    With Options.CACHE the request is conditional on Options.CACHED and raises
+    cache.Unchanged if the response didn't change."""
+    import requests # pylint: disable=import-outside-toplevel
+    try:
+        with phase("load"):
+            req = requests.get(url, headers=conditional_headers(Options.HEADERS, Options.CACHED),
+                               timeout=Options.REQUEST_TIMEOUT)
+        if Options.CACHE:
+            Options.VALIDATORS = check_response(req, Options.CACHED, req.content)
+        if req.status_code != 200:
+            info(f"Error: Status {req.status_code}")
+            return None
+
+        info(f"Sucess: Loading Data from {Options.URL}")
+
+    except requests.HTTPError as e:
+        info(f"Error: {e.args[0]}")
+        return None
+    except (requests.ConnectTimeout, requests.ConnectionError, requests.ReadTimeout) as e:
+        raise SummaryError(f"Error: Timeout from {url}. " +
+                           f"Current setting is {Options.REQUEST_TIMEOUT} seconds.\n" +
+                           "Maybe try to increase '--timeout' in the commandline options.") from e
+
+    try:
+        info("Success: Parsing json data")
+        with phase("decode"):
+            return get_decoder(Options.PARSER).loads(req.content)
+    except ValueError:
+        info("Error: Couldn't parse json file\n")
+        return None
+
+def list_json(tree):
+    """Creates an aggregated list of dicts from the Options.TREE trie
+
+    Args:
+        tree - PathTrie: The Options.TREE trie
+    Return:
+        json_summary - list: Contains the aggregated values"""
+    return list(iter_json(tree))
+
+def iter_json(tree):
+    """Generator of the dicts of list_json(), a path at a time"""
+    names = {}
+    for node in tree.records:
+        name = tree.name(node, names)
+        depth = max(node.dots, 0)
+        if node.size or node.truncated:
+            if node.type == "array":
+                symbol = Options.SYMBOL_ARRAY
+            else:
+                symbol = Options.SYMBOL_OBJECT
+            yield {"name": name, "depth": depth, "type": node.type, "symbol": symbol,
+                   "size": node.size, "parent": tree.record_parent(node),
+                   "truncated": node.truncated}
+        else:
+            yield {"name": name, "depth": depth, "type": node.type,
+                   "consistent": node.consistent, "count": node.count,
+                   "example": node.example, "length": node.length,
+                   "parent": tree.record_parent(node), "stats": node.stats}
+
+def get_summary_table(json_summary):
+    """Creates the final summary table for csv or tabulate2 output
+    
+    Args:
+        json_summary - list: The list of dicts created in reduce_json()
+    Return:
+        table - list: List from json_summary and Options.ITEM_COUNT
+        
+    Note that all the modifications INDENT, MASK, TRIM and REDACTED are handled here"""
+    return list(iter_summary_table(json_summary))
+
+def iter_summary_table(json_summary):
+    """Generator of the rows of get_summary_table(). Rows are made while
+    json_summary, also a generator like iter_json(), gets consumed. The
+    statistics come after the last path."""
+    header = ["NAME", "TYPE", "SIZE", "COUNT", "EXAMPLE", "CONSITENT", "PARENT"]
+    yield header + STATS_HEADER if Options.STATS else header
+    sum_item_count = 0
+    secondary_itemcount = {}
+    is_consistent = True
+    for entry in json_summary:
+        name = entry.get("name")
+        # Indent, if output is not csv
+        name = Options.INDENT * entry.get("depth", name.count(".")) + name
+        entry_type = entry.get("type", "")
+        size = entry.get("size", 0)
+        count = entry.get("count", 0)
+
+        # double checking
+        if count is None:
+            count = 0
+        if size is None:
+            size = 0
+
+        example = "truncated" if entry.get("truncated") else get_example(entry, name)
+        consistent = entry.get("consistent", None)
+
+        # Add row items count to secondary counter
+        if count:
+            if secondary_itemcount.get(entry_type):
+                secondary_itemcount[entry_type] += count
+            else:
+                secondary_itemcount[entry_type] = count
+        # create a marker for consistency check
+        if not consistent and entry_type not in ["array", "object"]:
+            is_consistent = False
+
+        # Second counter for verification of Options.ITEMS_COUNT
+        if isinstance(count, (int, float)):
+            sum_item_count += count
+
+        row = [name, entry_type, f"{size:,d}" if size > 0 else None,
+               format_count(count) if count > 0 else None, example, consistent,
+               entry.get("parent", None)]
+        if Options.STATS:
+            row += get_stats_cells(entry.get("stats"), name)
+        yield row
+
+    # Append statistics to the table
+    yield from table_statistics(is_consistent, sum_item_count, secondary_itemcount)
+
+def get_example(entry, name):
+    """Masking, trimming and redacting of the example cell of a summary entry"""
+    example = entry.get("example", "N/A")
+    if entry.get("type") in TEXT_TYPES:
+        example = example.replace("\n","\\n")
+        # Long examples are stored trimmed, together with their full length
+        length = entry.get("length") or len(example)
+        if Options.REDACTED:
+            key = name.split(".")[-1]
+            if example and key in Options.REDACTED:
+                example = "*" * length
+        if example:
+            example = "*" * Options.MASK + example[Options.MASK:Options.TRIM] + (""
+                        "..." if length > Options.TRIM - length else "")
+    return example
+
+def get_stats_cells(stats, name):
+    """Cells of the '--stats' columns of a path. Paths in Options.REDACTED only
+    get the number of distinct values and the lengths."""
+    if stats is None:
+        return [None] * len(STATS_HEADER)
+    numbers, lengths = stats.numbers, stats.lengths
+    redacted = name.split(".")[-1] in Options.REDACTED
+    cells = [format_count(stats.distinct.count())]
+    if numbers.minimum is None or redacted:
+        cells += [None, None, None, None]
+    elif not numbers.weight:
+        # Only numbers beyond the range of floats
+        cells += [numbers.minimum, numbers.maximum, None, None]
+    else:
+        cells += [numbers.minimum, numbers.maximum, f"{numbers.mean:.6g}",
+                  f"{numbers.stddev():.6g}"]
+    cells.append(f"{lengths.minimum:,d}..{lengths.maximum:,d}, mean {lengths.mean:.1f}"
+                 if lengths.minimum is not None else None)
+    top = stats.top.top(Options.TOP_K)
+    cells.append(None if redacted or not top else
+                 ", ".join(f"{get_top_value(value)} {share:.0%}" for value, share in top))
+    return cells
+
+def get_top_value(value):
+    """Masking and trimming of a value of the TOP column"""
+    if not isinstance(value, str):
+        return "true" if value is True else "false" if value is False else str(value)
+    value = value.replace("\n", "\\n")
+    trimmed = value[Options.MASK:Options.TRIM] if Options.TRIM > 0 else value[Options.MASK:]
+    return "*" * Options.MASK + trimmed + (
+        "..." if 0 < Options.TRIM < len(value) else "")
+
+def table_statistics(is_consistent, sum_item_count, secondary_itemcount):
+    """Generator of the statistics rows at the end of the table"""
+    yield [None, None, None, None, None, None]
+    checksum = 0
+    for k, v in sorted(Options.ITEMS_COUNT.items(), key=lambda v: v[1], reverse=True):
+        yield [f"Sum of {k}:",None, None, format_count(v), None, None, None]
+
+        item_sum = sum(list(Options.ITEMS_COUNT.values()))
+        debug(item_sum)
+
+        # Estimated counts are floats, summed up in a different order
+        checksum = 0 if math.isclose(sum_item_count, item_sum) else ("Count mismatch" +
+                        f"{format_count(item_sum)}/{format_count(sum_item_count)}")
+
+    yield ["Sum of all items:", None, None,
+           format_count(sum_item_count) if sum_item_count > 0 else None,
+           f"{checksum:,d}" if checksum > 0 else None, None, None]
+    debug("Results ITEM_COUNT", Options.ITEMS_COUNT)
+    debug("Results from rows", secondary_itemcount)
+    if not is_consistent:
+        level, msg = check_consistency(Options.ITEMS_COUNT, secondary_itemcount)
+        yield [level, None, None, None, msg[0], None, None]
+        yield [None, None, None, None, msg[1], None, None]
+    if Options.MALFORMED:
+        yield ["WARNING:", None, None, None,
+               f"Skipped {Options.MALFORMED:,d} malformed json lines.", None, None]
+    for level, msg in Options.NOTES:
+        yield [level, None, None, None, msg, None, None]
+    if Options.TREE.collapse is not None:
+        yield from table_collapsed()
+    if Options.LIMITS:
+        yield from table_limits()
+    if Options.SAMPLER:
+        yield from table_sampling()
+
+def table_collapsed():
+    """Generator of the notes about object keys collapsed into a wildcard"""
+    for node in Options.TREE.wildcards():
+        yield ["COLLAPSED:", None, None, None,
+               f"{Options.TREE.name(node.up) or 'Root'}: {format_count(node.keys.count())} " +
+               f"keys collapsed into '{node.segment}'.", None, None]
+
+def table_limits():
+    """Generator of the notes about the limits that cut the walk short"""
+    truncated = {node.truncated for node in Options.TREE.records if node.truncated}
+    reasons = truncated | {Options.LIMITS.stopped}
+    notes = {DEPTH: f"Arrays and objects deeper than --max-depth {Options.MAX_DEPTH:,d} " +
+                    "were not walked.",
+             NODES: f"Stopped after --max-nodes {Options.MAX_NODES:,d} nodes. The summary " +
+                    "only covers the part before.",
+             TIME: f"Stopped after --time-budget {Options.TIME_BUDGET:g}s. The summary " +
+                   "only covers the part before."}
+    for reason in (DEPTH, NODES, TIME):
+        if reason in reasons:
+            yield ["LIMIT:", None, None, None, notes[reason], None, None]
+    if truncated:
+        yield [None, None, None, None, "Arrays and objects with the example 'truncated' " +
+               "are incomplete.", None, None]
+
+def table_sampling():
+    """Generator of the notes about estimated counts and sampled arrays"""
+    blind_spots = Options.SAMPLER.blind_spots()
+    if not blind_spots:
+        return
+    yield ["ESTIMATE:", None, None, None,
+           "Counts with '~' are estimates from sampled arrays.", None, None]
+    for node, items, sampled in blind_spots:
+        # Rule of three: paths in more than 3/n of the items show up with 95% probability
+        yield ["BLIND SPOT:", None, None, None,
+               f"{Options.TREE.name(node)}: {sampled:,d} of {items:,d} items sampled.",
+               None, None]
+        yield [None, None, None, None,
+               f"Paths in less than {min(300 / sampled, 100):.2g}% of the items may be " +
+               "missing.",
+               None, None]
+
+def check_consistency(a: dict, b: dict):
+    """Checks if a count mismatch results from 'null' values
+    
+    Args:
+        a - dict: Options.ITEMS_COUNT
+        b - dict: Counted items from the output table
+    Return:
+        level - str: 'Info' or 'Warning'
+        msg - list: Infomessage for 2 tablerows"""
+    difference = {}
+    for k, v in a.items():
+        difference[k] = v - b.get(k, 0)
+    nulls = abs(difference.get("null", 0))
+    rest = sum(abs(v) for (k, v) in difference.items() if k != "null")
+    debug("Difference", difference)
+    if nulls == rest:
+        level = "INFO:"
+        msg = ["Inconsistent data detected.", "Most likely from occasional 'null' values."]
+    else:
+        level = "WARNING:"
+        msg = ["Inconsistent data detected.", "Most likely due to mixed types in json values"]
+    return level, msg
+
+def format_count(count):
+    """Count with thousands separator. Estimated counts are floats and get a '~'"""
+    if isinstance(count, float):
+        return f"~{round(count):,d}"
+    return f"{count:,d}"
+
+def info(*args):
+    """Prints a message about the progress unless Options.VERBOSE is False"""
+    if Options.VERBOSE:
+        print(*args)
+
+def debug(*args):
+    """Print debug messages if a global variable 'DEBUG' is true.
+    
+    Args:
+        *args
+    Side effects:
+        'DEBUG: arg[0] --- arg[...] --- arg[n] :::END'
+    Return:
+        None"""
+    if Options.is_debug():
+        print("DEBUG: ", end="")
+        for a in args:
+
+            print(a, end=" --- ")
+        print("   :::End")
@@ -0,0 +1,624 @@
+"""Tree walker of jsummary. Builds Options.TREE and Options.ITEMS_COUNT from json data"""
+from collections import Counter
+from decimal import Decimal
+from itertools import islice
+from detectors import StringTypes, TEXT_TYPES
+from limits import DEPTH
+from options import Options
+
+JSON_TYPES = {type(None): "null", bool: "boolean", int: "number", float: "number",
+              Decimal: "number", list: "array", dict: "object"}
+DATE_TIME = StringTypes()
+# Arrays with at least this many values are counted in bulk when possible
+BULK_SIZE = 8
+# Objects with more keys are never cached as shape
+SHAPE_KEYS = 64
+# Values per bulk count of plain arrays under a node or time limit
+LIMIT_CHUNK = 4096
+# Change of the nesting depth by ijson events
+NESTING = {"start_map": 1, "start_array": 1, "end_map": -1, "end_array": -1}
+
+
+def check_date_time(s: str):
+    """Detects date, date-time and time patterns in a string
+
+    Args:
+        s - string: Input string that will be checked
+    Return:
+        str: String with value 'date', 'date-time', 'time' or 'string'
+    """
+    return DATE_TIME(s)
+
+
+def adjust_json_type(t: str):
+    """Swap python types to json types
+
+    Args:
+        s - str: String valie of python type
+    Return:
+        t - str: String value of json type"""
+    match t:
+        case "NoneType":
+            t = "null"
+        case "list":
+            t = "array"
+        case "dict":
+            t = "object"
+        case "int":
+            t = "number"
+        case "float" | "Decimal":
+            t = "number"
+        case "bool":
+            t = "boolean"
+        case _:
+            pass
+    return t
+
+def get_item_type(value):
+    """Json type of a value. Strings are checked by Options.DETECTOR"""
+    if isinstance(value, str):
+        return Options.DETECTOR(value)
+    return JSON_TYPES.get(type(value)) or adjust_json_type(type(value).__name__)
+
+def get_json_tree(data, node=None):
+    """Walks through the JSON structure
+
+    Args:
+        data: Initially a json object. Later any type that is inside the jason values.
+        node - PathNode: Node of data in Options.TREE. Default is the root.
+    Return:
+        None: Function is only updating the Options.TREE trie
+
+    Open arrays and objects are kept on an explicit stack instead of recursion, so
+    any nesting depth works. Paths are nodes of the trie, so no path strings get
+    built and parents come straight from the structure."""
+    tree = Options.TREE
+    node = tree.root if node is None else node
+    Options.CNT += 1
+    if not isinstance(data, (dict, list)):
+        count_items(node, get_item_type(data), data)
+        return
+    walk(open_container(data, node, 1))
+
+def find_array(data):
+    """Returns the key and the top-level array of data. The key is None if data
+    is the array itself. The array is None if there is none."""
+    if isinstance(data, list):
+        return None, data
+    if isinstance(data, dict):
+        arrays = [(len(v), k) for k, v in data.items() if isinstance(v, list)]
+        if arrays:
+            key = max(arrays)[1]
+            return key, data[key]
+    return None, None
+
+def get_json_tree_around(data, key, walk_items):
+    """Walks data like get_json_tree(), but leaves the items of the top-level
+    array to walk_items(items, node, weight)
+
+    Args:
+        data: The json data
+        key: Key of the top-level array in data. None if data is the array.
+        walk_items: Callable walking the items into the array node
+    Return:
+        PathNode: Node of the top-level array
+
+    Keys before and after the array are walked in their order."""
+    tree = Options.TREE
+    node = tree.root
+    Options.CNT += 1
+    array = data
+    if key is not None:
+        items = list(data.items())
+        index = list(data).index(key)
+        container = tree.child(node, Options.SYMBOL_OBJECT)
+        set_container(container, "object", len(data))
+        walk((limited(iter(items[:index]), container), node, node.children, 1))
+        Options.CNT += 1
+        node = tree.child(node, key)
+        array = data[key]
+
+    node = tree.child(node, Options.SYMBOL_ARRAY)
+    set_container(node, "array", len(array))
+    walk_items(array, node, 1)
+
+    if key is not None:
+        walk((limited(iter(items[index + 1:]), tree.root.children[Options.SYMBOL_OBJECT]),
+              tree.root, tree.root.children, 1))
+    return node
+
+def walk(frame, depth=1):
+    """Sub-function of get_json_tree(). Walks everything inside an opened array
+    or object
+
+    Args:
+        frame - tuple: Stack frame from open_container() or open_array()
+        depth - int: Nesting level of the opened array or object, 1 for the root
+    Return:
+        None: Updates Options.TREE, Options.ITEMS_COUNT and Options.CNT
+
+    With Options.LIMITS every array and object is checked for its depth before it
+    gets walked and the frames count their values (see limited()). Once the walk
+    has to stop, the open arrays and objects are marked as truncated."""
+    tree = Options.TREE
+    limits = Options.LIMITS
+    nodes = 0
+    stack = [frame]
+    while stack and (limits is None or not limits.stopped):
+        items, node, children, weight = stack[-1]
+        if children is None:
+            # Arrays: values directly inside go to the item node of the array
+            item = None
+            for value in items:
+                if isinstance(value, (dict, list)):
+                    nodes += 1
+                    if limits is None and isinstance(value, dict) and \
+                            count_object(value, node, weight):
+                        continue
+                    stack.append(open_container(value, node, weight) if limits is None else
+                                 limit_container(value, node, weight, depth + len(stack)))
+                    break
+                if item is None:
+                    item = tree.item(node)
+                count_items(item, get_item_type(value), value, weight)
+            else:
+                stack.pop()
+            continue
+
+        for key, value in items:
+            nodes += 1
+            child = children.get(key) or tree.child(node, key)
+            if isinstance(value, (dict, list)):
+                if limits is None and isinstance(value, dict) and \
+                        count_object(value, child, weight):
+                    continue
+                stack.append(open_container(value, child, weight) if limits is None else
+                             limit_container(value, child, weight, depth + len(stack)))
+                break
+            count_items(child, get_item_type(value), value, weight)
+        else:
+            stack.pop()
+    Options.CNT += nodes
+    if limits is not None and limits.stopped:
+        truncate_stack(stack, limits.stopped)
+
+def truncate_stack(stack, reason: str):
+    """Sub-function of walk(). Marks the arrays and objects of the stack frames
+    of an interrupted walk as truncated for reason"""
+    for _, node, children, _ in stack:
+        container = node if children is None else node.children[Options.SYMBOL_OBJECT]
+        container.truncated = container.truncated or reason
+
+def limit_container(data, node, weight, level: int):
+    """Sub-function of walk(). open_container() and count_object() if
+    Options.LIMITS allows to walk data
+
+    Args:
+        level - int: Nesting level of data
+        others: See open_container()
+    Return:
+        tuple: Stack frame of data. Without items if data is counted already or
+               must not be walked, then it is recorded and marked as truncated."""
+    limits = Options.LIMITS
+    reason = limits.check(level)
+    if reason is None:
+        # Objects of a cached shape are only counted at once if all values fit
+        if isinstance(data, dict) and limits.allowed(len(data)) == len(data) and \
+                count_object(data, node, weight):
+            limits.count(len(data))
+            return iter(()), node, None, weight
+        return open_container(data, node, weight)
+    symbol = Options.SYMBOL_ARRAY if isinstance(data, list) else Options.SYMBOL_OBJECT
+    container = Options.TREE.child(node, symbol)
+    set_container(container, "array" if isinstance(data, list) else "object", len(data))
+    if data:
+        container.truncated = container.truncated or reason
+    return iter(()), container, None, weight
+
+def open_container(data, node, weight=1):
+    """Sub-function of get_json_tree(). Records an array or object in Options.TREE
+
+    Args:
+        data - list or dict: The array or object
+        node - PathNode: Node of data
+        weight: Number of values each value of data stands for
+    Return:
+        tuple: Stack frame with an iterator over the children, the node of the
+               children, the child dict of objects (None for arrays) and the
+               weight of the children"""
+    tree = Options.TREE
+    if isinstance(data, dict):
+        container = tree.child(node, Options.SYMBOL_OBJECT)
+        set_container(container, "object", len(data))
+        return limited(iter(data.items()), container), node, node.children, weight
+
+    array = tree.child(node, Options.SYMBOL_ARRAY)
+    set_container(array, "array", len(data))
+    sampler = Options.SAMPLER
+    if sampler and len(data) > sampler.min_size:
+        data, weight = sampler.draw(array, data, weight)
+    return open_array(data, array, weight)
+
+def open_array(data, array, weight=1):
+    """Sub-function of open_container(). Stack frame for the values of an array
+    of which type and size are already recorded. Plain arrays get counted right away."""
+    if Options.LIMITS is not None and Options.LIMITS.counting:
+        return limit_array(data, array, weight)
+    if len(data) >= BULK_SIZE and count_array(array, data, weight):
+        return iter(()), array, None, weight
+    return iter(data), array, None, weight
+
+def limit_array(data, array, weight=1):
+    """Sub-function of open_array() under a node or time limit. Plain arrays are
+    counted in bulk slices of at most LIMIT_CHUNK values that fit into the
+    limits, the values of other arrays one by one through limit_items()."""
+    limits = Options.LIMITS
+    start = 0
+    while len(data) >= BULK_SIZE and start < len(data) and limits.stopped is None:
+        end = start + limits.allowed(min(LIMIT_CHUNK, len(data) - start))
+        if end == start or not count_array(array, data[start:end], weight):
+            break
+        limits.count(end - start)
+        start = end
+    return limit_items(islice(data, start, None), array, limits), array, None, weight
+
+def limited(items, container):
+    """items of a stack frame for walk(). Under a node or time limit of
+    Options.LIMITS they are counted and end once the walk has to stop."""
+    limits = Options.LIMITS
+    if limits is None or not limits.counting:
+        return items
+    return limit_items(items, container, limits)
+
+def limit_items(items, container, limits):
+    """Generator of items until limits stop the walk. The array or object
+    container gets marked as truncated then."""
+    for item in items:
+        if limits.count():
+            container.truncated = container.truncated or limits.stopped
+            return
+        yield item
+
+def count_array(array, data, weight=1):
+    """Sub-function of open_container(). Counts an array of plain json values
+    in bulk instead of calling count_items() for every value
+
+    Args:
+        array - PathNode: Node of the array
+        data - list: The array
+        weight: Number of values each value of data stands for
+    Return:
+        bool: False if data contains arrays or objects. Nothing is counted then.
+    """
+    types = Counter(map(type, data))
+    if dict in types or list in types:
+        return False
+
+    counts = {}
+    for value_type, count in types.items():
+        if value_type is not str:
+            item_type = JSON_TYPES.get(value_type) or adjust_json_type(value_type.__name__)
+            counts[item_type] = counts.get(item_type, 0) + count
+    if str in types:
+        strings = data if len(types) == 1 else [v for v in data if isinstance(v, str)]
+        for item_type, count in Counter(map(Options.DETECTOR, strings)).items():
+            counts[item_type] = counts.get(item_type, 0) + count
+
+    node = Options.TREE.item(array)
+    counted = 0
+    if node.type is None or node.size is not None:
+        count_items(node, get_item_type(data[0]), data[0], weight)
+        counted = 1
+        counts[node.type] -= 1
+        if not counts[node.type]:
+            del counts[node.type]
+    if Options.STATS:
+        for value in islice(data, counted, None):
+            add_stats(node, value, weight)
+    if counts:
+        node.count += sum(counts.values()) * weight
+        if len(counts) > 1 or node.type not in counts:
+            # Same rules as count_items(): only 'null' gets replaced by the first real value
+            if node.type == "null":
+                value = next(v for v in data if v is not None)
+                node.type = get_item_type(value)
+                set_example(node, value, node.type)
+            node.consistent = False
+        add_items_count(counts, data, weight)
+    return True
+
+def add_items_count(counts, data, weight=1):
+    """Adds the counts of a bulk counted array to Options.ITEMS_COUNT. New types
+    are added in order of their first appearance in data, like count_items() does."""
+    new = [t for t in counts if t not in Options.ITEMS_COUNT]
+    if len(new) > 1:
+        order = {}
+        for value in data:
+            item_type = get_item_type(value)
+            if item_type in counts and item_type not in order:
+                order[item_type] = len(order)
+                if len(order) == len(counts):
+                    break
+        new.sort(key=order.get)
+    for item_type in new:
+        Options.ITEMS_COUNT[item_type] = 0
+    for item_type, count in counts.items():
+        Options.ITEMS_COUNT[item_type] += count * weight
+
+def count_object(data, node, weight=1):
+    """Sub-function of get_json_tree(). Counts an object with plain values only
+    through Options.SHAPES
+
+    Args:
+        data - dict: The object
+        node - PathNode: Node of data
+        weight: Number of objects data stands for
+    Return:
+        bool: False if data contains arrays or objects or is too wide to be
+              cached. Nothing is counted then.
+
+    Objects with the same keys and value types at the same path share a shape.
+    It holds the nodes and json types of all values, so records repeating a known
+    shape only bump counters. Strings are still checked one by one, because
+    their type depends on the content."""
+    if not Options.SHAPE_CACHE or len(data) > SHAPE_KEYS:
+        return False
+    types = tuple(map(type, data.values()))
+    if dict in types or list in types:
+        return False
+
+    key = (node, tuple(data), types)
+    shape = Options.SHAPES.get(key)
+    if shape is None:
+        shape = make_shape(node, key[1], types)
+        if shape is None:
+            return False
+        Options.SHAPES[key] = shape
+        if len(Options.SHAPES) > Options.SHAPE_CACHE:
+            Options.SHAPES.popitem(last=False)
+    else:
+        Options.SHAPES.move_to_end(key)
+
+    set_container(shape[0], "object", len(data))
+    children, item_types = shape[1:]
+    items_count = Options.ITEMS_COUNT
+    detect = Options.DETECTOR
+    stats = Options.STATS
+    for child, item_type, value in zip(children, item_types, data.values()):
+        if item_type is None:
+            item_type = detect(value)
+        if child.type == item_type:
+            child.count += weight
+            items_count[item_type] += weight
+            if stats:
+                add_stats(child, value, weight)
+        else:
+            count_items(child, item_type, value, weight)
+    Options.CNT += len(data)
+    return True
+
+def make_shape(node, keys, types):
+    """Sub-function of count_object(). Shape of objects at node with keys and
+    value types. None if keys got collapsed meanwhile, the nodes may be gone then."""
+    tree = Options.TREE
+    folds = tree.folds
+    shape = (tree.child(node, Options.SYMBOL_OBJECT), [tree.child(node, k) for k in keys],
+             [None if t is str else JSON_TYPES.get(t) or adjust_json_type(t.__name__)
+              for t in types])
+    return shape if tree.folds == folds else None
+
+def set_container(node, item_type, size):
+    """Records type and size of an array or object. The last one seen wins."""
+    if node.size is None:
+        if node.type is None:
+            Options.TREE.records.append(node)
+        node.count = node.example = node.length = node.consistent = node.stats = None
+    node.type = item_type
+    node.size = size
+
+def count_items(node, item_type, content, weight=1):
+    """Sub-function of get_json_tree() handling the counting logic
+    
+    Args:
+        node - PathNode: Node of the current path in Options.TREE
+        item_type - str: Current dataype in the pipeline
+        content: Current value of the json object
+        weight: Number of values content stands for. Float for sampled values.
+    Return:
+        None: Updates the node and Options.ITEMS_COUNT
+    """
+    # Path exists in Tree
+    if node.type is not None and node.size is None:
+        node.count += weight
+        if node.type != item_type:
+            # Only change type and example if it was "null"
+            if node.type == "null":
+                node.type = item_type
+                set_example(node, content, item_type)
+            node.consistent = False
+    else:
+        if node.type is None:
+            Options.TREE.records.append(node)
+        node.type = item_type
+        node.count = weight
+        node.size = None
+        node.consistent = True
+        set_example(node, content, item_type)
+    items_count = Options.ITEMS_COUNT
+    items_count[item_type] = items_count.get(item_type, 0) + weight
+    if Options.STATS:
+        add_stats(node, content, weight)
+
+def add_stats(node, value, weight=1):
+    """Adds a plain value to the statistics of node for '--stats'"""
+    stats = node.stats
+    if stats is None:
+        # hashlib is only imported for '--stats'
+        from stats import PathStats # pylint: disable=import-outside-toplevel
+        stats = node.stats = PathStats(Options.TOP_K)
+    stats.add(value, weight)
+
+def merge_node(node, part):
+    """Adds the summary of a node from a partial tree to node. The values of part
+    come after the ones already counted in node, like in a serial walk.
+
+    Args:
+        node - PathNode: Node of Options.TREE
+        part - PathNode: Record of the same path in a partial tree
+    Return:
+        None: Updates node with the rules of count_items() and set_container()
+    """
+    if node.type is None:
+        Options.TREE.records.append(node)
+    Options.TREE.merge(node, part)
+
+def merge_tree(tree, items_count, cnt):
+    """Adds a partial summary from a walk over later values to the Options
+
+    Args:
+        tree - PathTrie: Partial tree
+        items_count - dict: Its ITEMS_COUNT
+        cnt - int: Its CNT
+    Return:
+        list: (node of Options.TREE, record of tree) pairs"""
+    pairs = Options.TREE.match(tree)
+    for node, part in pairs:
+        merge_node(node, part)
+    for item_type, count in items_count.items():
+        Options.ITEMS_COUNT[item_type] = Options.ITEMS_COUNT.get(item_type, 0) + count
+    Options.CNT += cnt
+    return pairs
+
+def set_example(node, content, item_type):
+    """Stores the example of a node. Text longer than Options.TRIM is
+    trimmed, but keeps its full length for get_summary_table()"""
+    if item_type in TEXT_TYPES and 0 < Options.TRIM < len(content):
+        node.length = len(content) + content.count("\n")
+        content = content[:Options.TRIM]
+    else:
+        node.length = None
+    node.example = content
+
+def stream_json_tree(events):
+    """Event based counterpart of get_json_tree() for streamed json
+
+    Args:
+        events: Iterable of (prefix, event, value) tuples from ijson.parse()
+    Return:
+        bool: False if the json root is empty, else True
+
+    Only the open arrays and objects are kept on a stack, so memory depends on
+    the nesting depth. Each frame is [node of the children, node of the
+    container, size, is_array, key, weight, sampled items]. Items left out by
+    Options.SAMPLER and the items of arrays and objects deeper than the depth of
+    Options.LIMITS (weight 0) are skipped until their closing event. A node or time
+    limit is counted at every walked value. Fractions become floats, integers
+    stay exact."""
+    tree = Options.TREE
+    sampler = Options.SAMPLER
+    limits = Options.LIMITS if Options.LIMITS is not None and Options.LIMITS.counting else None
+    stack = []
+    root = False
+    skip = 0
+    for _, event, value in events:
+        if skip:
+            skip += NESTING.get(event, 0)
+            continue
+        if event == "map_key":
+            stack[-1][4] = value
+            continue
+        if event in ("end_map", "end_array"):
+            frame = stack.pop()
+            close_frame(frame, sampler)
+            if not stack:
+                root = frame[2] > 0
+            continue
+
+        # Any other event is a value inside the open container or the root itself
+        node = tree.root
+        frame = None
+        weight = 1
+        if stack:
+            frame = stack[-1]
+            weight = add_item(frame, sampler, limits)
+            if not weight:
+                if weight is None:
+                    truncate_frames(stack, limits.stopped)
+                    return True
+                skip = max(NESTING.get(event, 0), 0)
+                continue
+            node = frame[0] if frame[3] else tree.child(frame[0], frame[4])
+
+        if event in ("start_map", "start_array"):
+            weight = check_depth(stack, weight)
+            Options.CNT += 1
+            is_array = event == "start_array"
+            container = tree.child(node, Options.SYMBOL_ARRAY if is_array
+                                   else Options.SYMBOL_OBJECT)
+            set_container(container, "array" if is_array else "object", 0)
+            stack.append([container if is_array else node, container, 0, is_array, None,
+                          weight, 0])
+            continue
+
+        add_value(node, frame, value, weight)
+        if not stack:
+            root = bool(value)
+    return root
+
+def add_value(node, frame, value, weight):
+    """Sub-function of stream_json_tree(). Counts a plain value. ijson keeps
+    integers exact and returns fractions as Decimal, which are counted as floats
+    like json.loads() returns them."""
+    if isinstance(value, Decimal):
+        value = float(value)
+    if frame and frame[3]:
+        # Values directly inside an array
+        count_items(Options.TREE.item(node), get_item_type(value), value, weight)
+    else:
+        Options.CNT += 1
+        count_items(node, get_item_type(value), value, weight)
+
+def add_item(frame, sampler, limits=None):
+    """Sub-function of stream_json_tree(). Counts an item of the open container
+
+    Args:
+        limits - Limits: Options.LIMITS with a node or time limit, else None
+    Return:
+        Weight of the item. 0 if the sampler leaves it out, None if limits stop
+        the walk before it."""
+    frame[2] += 1
+    weight = frame[5]
+    if frame[3] and sampler and weight:
+        factor = sampler.keep(frame[2])
+        if not factor:
+            return 0
+        frame[6] += 1
+        weight *= factor
+    if weight and limits is not None and limits.count():
+        frame[2] -= 1
+        return None
+    return weight
+
+def close_frame(frame, sampler):
+    """Sub-function of stream_json_tree(). Stores the final size of a container"""
+    frame[1].size = frame[2]
+    if not frame[5] and frame[2]:
+        frame[1].truncated = frame[1].truncated or DEPTH
+    elif sampler and frame[3] and frame[2] > sampler.min_size:
+        sampler.add(frame[1], frame[2], frame[6])
+
+def check_depth(stack, weight):
+    """Sub-function of stream_json_tree(). Checks the depth of Options.LIMITS
+    for a new array or object inside the open ones on stack
+
+    Return:
+        Weight of its items, 0 if they get skipped"""
+    limits = Options.LIMITS
+    return weight if limits is None or limits.check(len(stack) + 1) is None else 0
+
+def truncate_frames(stack, reason: str):
+    """Sub-function of stream_json_tree(). Closes the open arrays and objects on
+    stack of an interrupted walk and marks them as truncated for reason"""
+    for frame in stack:
+        frame[1].size = frame[2]
+        frame[1].truncated = frame[1].truncated or reason